@@ -0,0 +1,49 @@
+""" bounded, coalescing send queue for one connection """
+from collections import deque
+
+class Outbox:
+    __slots__ = ("capacity", "entries", "queued", "sent", "dropped", "coalesced", "peak")
+
+    def __init__(self, capacity: int=64) -> None:
+        self.capacity: int = capacity
+        self.entries: deque[tuple[str|None, object]] = deque()
+        self.queued: int = 0
+        self.sent: int = 0
+        self.dropped: int = 0
+        self.coalesced: int = 0
+        self.peak: int = 0     # deepest the queue has been
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def push(self, data: object, key: str=None) -> None:
+        self.queued += 1
+        if key is not None and self.entries and self.supersede(data, key): return None
+        if len(self.entries) >= self.capacity:
+            self.entries.popleft()
+            self.dropped += 1
+        self.entries.append((key, data))
+        self.peak = max(self.peak, len(self.entries))
+
+    def supersede(self, data: object, key: str) -> bool:
+        """ drop the unsent entries `key` makes obsolete; True when `data` took the slot of an unsent `key` """
+        prefix = key + "/"
+        replaced = False
+        kept = deque()
+        for queuedKey, queued in self.entries:
+            if queuedKey is not None and (queuedKey == key or queuedKey.startswith(prefix)):
+                self.coalesced += 1
+                if queuedKey == key and not replaced:     # there is never more than one per key
+                    kept.append((key, data))
+                    replaced = True
+                continue
+            kept.append((queuedKey, queued))
+        self.entries = kept
+        return replaced
+
+    def take(self) -> list[object]:
+        """ everything unsent, oldest first, for one write """
+        batch = [data for _, data in self.entries]
+        self.entries.clear()
+        self.sent += len(batch)
+        return batch
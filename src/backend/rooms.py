@@ -0,0 +1,270 @@
+""" two-player rooms and the lobby that seats connections in them, independent of the server hosting them """
+import os, sys, time, itertools
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # src/ (pMatch, protocol, replication, profiler)
+import pMatch, protocol, replication, profiler
+
+class settings:
+    authoritative: bool = True # run the matches here on a fixed tick; clients only send inputs ("update" relay otherwise)
+    tickRate: float = 60.0 # simulation ticks per second
+    sendInterval: int = 1 # ticks between published snapshots; clients interpolate across the gaps
+    maxCatchUp: int = 5 # most late ticks run back to back before the backlog is dropped
+    maxInputQueue: int = 8 # sequenced inputs buffered per player (one is consumed per tick); older ones are dropped
+    keyframeInterval: int = 240 # ticks between full "state" keyframes for delta-replicated connections
+    ackTimeout: int = 120 # ticks without a client "ack" before an early keyframe (must be < keyframeInterval)
+    sendQueue: int = 64 # messages held per connection that can't keep up; snapshots coalesce, then the oldest are dropped
+    logSample: int = 100 # per-message logs: one in this many is printed
+    telemetrySample: int = 16 # time one broadcast encode in this many
+    windowSize: list[int] = [1280, 720]
+
+class Member:
+    __slots__ = ("addr", "pong2id", "index", "codec", "replica")
+
+    def __init__(self, addr: tuple, pong2id: str, index: int) -> None:
+        self.addr: tuple = addr
+        self.pong2id: str = pong2id
+        self.index: int = index    # seat: bar 0 (player1) or bar 1 (player2)
+        self.codec: str = protocol.DictCodec.name
+        self.replica: replication.Replica = None   # set when the client asked for deltas
+
+class Room:
+    def __init__(self, roomid: str, settings, host) -> None:
+        self.roomid: str = roomid
+        self.settings = settings
+        self.host = host
+        self.match: pMatch.Match = pMatch.Match(settings.windowSize)
+        self.seats: list[Member] = [None, None]
+        self.inputs: list[tuple[int, int]] = [(0, 0), (0, 0)]
+        self.inputQueues: list[deque[tuple[int, int, int]]] = [deque(maxlen=settings.maxInputQueue) for _ in range(2)]
+        self.acks: list[int] = [0, 0]  # last input sequence applied to each bar
+        self.relay: list[dict] = [None, None]   # relay mode: last client-simulated state per seat
+        self.tick: int = 0
+        self.awake: bool = True     # something to simulate or send on the next tick
+
+    @property
+    def members(self) -> list[Member]:
+        return [member for member in self.seats if member is not None]
+
+    def full(self) -> bool:
+        return None not in self.seats
+
+    def empty(self) -> bool:
+        return self.seats == [None, None]
+
+    def seat(self, addr: tuple, pong2id: str) -> Member:
+        index = self.seats.index(None)
+        member = self.seats[index] = Member(addr, pong2id, index)
+        self.awake = True
+        return member
+
+    def leave(self, member: Member) -> None:
+        """ free the seat; a match that loses a player starts over and waits for "start" """
+        self.seats[member.index] = None
+        self.inputs[member.index] = (0, 0)
+        self.inputQueues[member.index].clear()
+        self.relay[member.index] = None
+        self.match.fullReset()
+        self.match.countdown = 0
+        self.awake = True
+
+    def idle(self) -> bool:
+        """ nothing moves and nothing is pending: the tick can skip this room """
+        if self.awake or self.match.countdown > 0: return False
+        puck = self.match.puck
+        if puck.vx or puck.vy: return False
+        for bar, held, queue in zip(self.match.bars, self.inputs, self.inputQueues):
+            if bar.vx or bar.vy or any(held) or queue: return False
+        return True
+
+    def handle(self, member: Member, method: str, params: dict) -> None:
+        self.awake = True
+        match method.lower():
+            case "hello":   # the client's pick from the codecs offered with "join"
+                member.codec = protocol.negotiate(list(protocol.CODECS), params.get("codec"))
+                if params.get("deltas"):
+                    member.replica = replication.Replica(self.settings.keyframeInterval, self.settings.ackTimeout)
+            case "ack":     # delta replication: last applied tick, or a request for a keyframe
+                if member.replica is not None: member.replica.acknowledge(params.get("tick", 0), params.get("resync", False))
+            case "input":   # authoritative: held directions (-1, 0, 1) for the sender's bar
+                held = (int(params.get("dx", 0)), int(params.get("dy", 0)))
+                if params.get("sequence") is None:
+                    self.inputs[member.index] = held
+                else:   # predicted client: one input per tick, in order
+                    self.inputQueues[member.index].append((params["sequence"], *held))
+            case "start":
+                if self.match.countdown <= 0: self.match.countdown = 3
+            case "reset":
+                self.match.fullReset()
+            case "update":  # relay: echo client-simulated state to the room
+                if self.settings.authoritative: return None
+                seat = f"p{member.index + 1}"   # keyed by seat: what the client maps to player1/player2
+                self.relay[member.index] = {"location": params.get("location"), "velocity": params.get("velocity")}
+                response = {seat: self.relay[member.index]}   # only the sender changed
+                response["pucklocation"] = params.get("pucklocation")
+                response["puckvelocity"] = params.get("puckvelocity")
+                self.host.broadcast("update", response, self.members, f"update/{seat}")
+
+    def step(self, deltaTime: float) -> dict:
+        """ one authoritative tick: apply the latest inputs, step the match, return the snapshot """
+        self.awake = False
+        for index, queue in enumerate(self.inputQueues):
+            if not queue: continue  # late input: the last one stays held
+            sequence, dx, dy = queue.popleft()
+            self.inputs[index] = (dx, dy)
+            self.acks[index] = sequence
+        for bar, (dx, dy) in zip(self.match.bars, self.inputs):
+            bar.move(dx, dy)
+        self.match.step(deltaTime)
+        self.match.drainEvents()    # sounds/effects are the clients' business
+        self.tick += 1
+        state = self.match.getState()
+        state["acks"] = list(self.acks)
+        state["tick"] = self.tick
+        return state
+
+    def publish(self, state: dict) -> None:
+        """ the full snapshot for plain members, changes since their baseline for replicated ones """
+        if state["tick"] % self.settings.sendInterval: return None
+        plain, current = [], None
+        for member in self.members:
+            if member.replica is None:
+                plain.append(member)
+                continue
+            if current is None: current = replication.flatten(state)    # compared once for both members
+            message = member.replica.update(state["tick"], state, current)
+            if message is None: continue
+            kind, params = message
+            self.host.broadcast(kind, params, [member], "state" if kind == "state" else f"state/{params['tick']}")   # a keyframe drops the deltas before it
+        if plain: self.host.broadcast("state", state, plain, "state")
+
+    def update(self, deltaTime: float) -> bool:
+        """ tick the room unless it is idle; whether it ran """
+        if self.idle(): return False
+        self.publish(self.step(deltaTime))
+        return True
+
+class TickClock:
+    """ deadlines of a fixed-rate tick """
+    def __init__(self, rate: float, maxCatchUp: int, now: float) -> None:
+        self.step: float = 1.0 / rate
+        self.maxCatchUp: int = maxCatchUp
+        self.deadline: float = now
+        self.late: int = 0      # ticks that were already due when the previous one finished
+
+    def wait(self, now: float) -> float:
+        """ seconds until the next tick is due (0: it is late, run it now) """
+        self.deadline += self.step
+        delay = self.deadline - now
+        if delay > 0: return delay
+        self.late += 1
+        if -delay > self.step * self.maxCatchUp:   # too far behind: drop the backlog instead of spiraling
+            self.deadline = now
+        return 0.0
+
+class Host:
+    """ the server side of a `Lobby`: messages are encoded once per negotiated codec, then queued for each recipient """
+    settings = settings
+
+    def __init__(self) -> None:
+        self.encoders: dict[str, object] = {name: codec() for name, codec in protocol.CODECS.items()}   # one shared encoder per format
+        self.decoder: protocol.BinaryCodec = protocol.BinaryCodec()
+        self.serialize: profiler.RingBuffer = profiler.RingBuffer(120)    # us per broadcast encode
+        self.broadcasts: int = 0
+
+    def frame(self, method: str, body: dict) -> object:
+        """ one encoded message as the host sends it, shared by all its recipients """
+        raise NotImplementedError
+
+    def enqueue(self, member: Member, message: object, key: str) -> None:
+        """ queue a `frame` for one recipient; `key` as in `broadcast` """
+        raise NotImplementedError
+
+    def respond(self, member: Member, method: str, params: dict) -> None:
+        self.broadcast(method, params, [member])
+
+    def broadcast(self, method: str, params: dict, recipients: list[Member], key: str=None) -> None:
+        """ queue one message for every member in `recipients`; a newer one with the same `key` supersedes it, with anything under `key/` """
+        messages = {}
+        self.broadcasts += 1
+        timed = self.broadcasts % self.settings.telemetrySample == 0
+        for member in recipients:
+            message = messages.get(member.codec)
+            if message is None:
+                if timed: started = time.perf_counter()
+                message = messages[member.codec] = self.frame(*protocol.wrap(self.encoders[member.codec], method, params))
+                if timed: self.serialize.push((time.perf_counter() - started) * 1e6)
+            self.enqueue(member, message, key)
+
+class Lobby:
+    def __init__(self, settings, host, firstId: int=1, idStep: int=1) -> None:
+        self.settings = settings
+        self.host = host
+        self.rooms: dict[str, Room] = {}
+        self.waiting: dict[str, Room] = {}     # rooms with a free seat, oldest first
+        self.members: dict[tuple, Member] = {}
+        self.seating: dict[tuple, Room] = {}
+        self.playerIds = itertools.count(firstId, idStep)  # interleaved when several lobbies share the id space
+        self.roomIds = itertools.count(firstId, idStep)
+
+        self.opened: int = 0
+        self.closed: int = 0
+        self.ticked: int = 0    # rooms stepped on the last tick
+
+    def join(self, addr: tuple) -> tuple[Room, Member]:
+        """ seat a new connection: the oldest waiting room, or a new one """
+        if self.waiting:
+            room = next(iter(self.waiting.values()))
+        else:
+            room = Room(f"r{next(self.roomIds)}", self.settings, self.host)
+            self.rooms[room.roomid] = self.waiting[room.roomid] = room
+            self.opened += 1
+        member = room.seat(addr, f"p{next(self.playerIds)}")
+        if room.full(): del self.waiting[room.roomid]
+        self.members[addr] = member
+        self.seating[addr] = room
+        return room, member
+
+    def leave(self, addr: tuple) -> Member|None:
+        member = self.members.pop(addr, None)
+        if member is None: return None
+        room = self.seating.pop(addr)
+        room.leave(member)
+        if room.empty():
+            del self.rooms[room.roomid]
+            self.waiting.pop(room.roomid, None)
+            self.closed += 1
+        else:
+            self.waiting[room.roomid] = room
+        return member
+
+    def prune(self, connected) -> None:
+        """ drop members whose connection is gone """
+        for addr in [addr for addr in self.members if addr not in connected]:
+            self.leave(addr)
+
+    def lookup(self, addr: tuple) -> tuple[Room, Member]|tuple[None, None]:
+        member = self.members.get(addr)
+        if member is None: return None, None
+        return self.seating[addr], member
+
+    def handle(self, addr: tuple, method: str, params: dict) -> None:
+        room, member = self.lookup(addr)
+        if room is None: return None
+        if method == "ping":    # answered at once, without waking the room
+            self.host.broadcast("pong", {"t": params.get("t")}, [member])
+        else:
+            room.handle(member, method, params)
+
+    def update(self, deltaTime: float, rooms: list[Room]=None) -> int:
+        """ tick every room (or just `rooms`); the number that weren't idle """
+        ticked = 0
+        for room in (self.rooms.values() if rooms is None else rooms):
+            if not room.empty() and room.update(deltaTime): ticked += 1
+        return ticked
+
+    def getStats(self) -> dict:
+        return {
+            "rooms": len(self.rooms), "waiting": len(self.waiting), "players": len(self.members),
+            "ticked": self.ticked, "opened": self.opened, "closed": self.closed
+        }
@@ -0,0 +1,183 @@
+"""
+multi-room Pong2 server on one asyncio event loop: the threaded server's `rooms.Lobby`, a coroutine per connection
+
+    python src/backend/roomserver.py [--host 127.0.0.1] [--port 8081] [--tick-rate 60] [--send-interval 1] [--relay]
+                                     [--stats SECONDS] [--log-level INFO]
+"""
+import os, sys, json, time, asyncio, logging, argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # src/ (protocol, telemetry)
+import protocol, telemetry
+import rooms, outbox
+
+class Connection:
+    __slots__ = ("writer", "queue", "ready", "sender", "stats")
+
+    def __init__(self, writer: asyncio.StreamWriter, capacity: int, sampleEvery: int=1) -> None:
+        self.writer: asyncio.StreamWriter = writer
+        self.queue: outbox.Outbox = outbox.Outbox(capacity)
+        self.ready: asyncio.Event = asyncio.Event()    # something was queued
+        self.sender: asyncio.Task = None
+        self.stats: telemetry.ConnectionStats = telemetry.ConnectionStats(sampleEvery=sampleEvery)
+
+class RoomServer(rooms.Host):
+    class settings(rooms.settings):
+        host: str = "127.0.0.1"
+        port: int = 8081
+        shardSize: int = 256 # rooms stepped between yields to the event loop
+        sendBuffer: int = 16384 # bytes the socket may hold unsent before a connection waits on its queue
+        statsInterval: float = 0.0 # seconds between stats dumps to the "pong2.server" log at INFO (0: never)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.lobby: rooms.Lobby = rooms.Lobby(self.settings, self)
+        self.connections: dict[tuple, Connection] = {}
+        self.server: asyncio.Server = None
+        self.ticker: asyncio.Task = None
+        self.reporter: asyncio.Task = None
+        self.clock: rooms.TickClock = None
+        self.netLog: telemetry.SampledLogger = telemetry.SampledLogger("pong2.server", self.settings.logSample)
+
+        self.ticks: int = 0
+        self.tickTime: float = 0.0     # seconds spent stepping rooms on the last tick
+        self.dropped: int = 0       # send queue counters of closed connections
+        self.coalesced: int = 0
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self.serve, self.settings.host, self.settings.port)
+        if self.settings.authoritative:
+            self.ticker = asyncio.create_task(self.tickLoop())
+        if self.settings.statsInterval:
+            self.reporter = asyncio.create_task(self.statsLoop())
+
+    async def stop(self) -> None:
+        if self.ticker is not None: self.ticker.cancel()
+        if self.reporter is not None: self.reporter.cancel()
+        self.server.close()
+        for connection in list(self.connections.values()):
+            connection.writer.close()
+        await self.server.wait_closed()
+
+    async def run(self) -> None:
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ one connection: a seat in the lobby until the client leaves or the socket drops """
+        addr = writer.get_extra_info("peername")
+        writer.transport.set_write_buffer_limits(high=self.settings.sendBuffer)
+        connection = self.connections[addr] = Connection(writer, self.settings.sendQueue, self.settings.telemetrySample)
+        connection.sender = asyncio.create_task(self.sendLoop(connection))
+        room, member = self.lobby.join(addr)
+        self.respond(member, "join", {
+            "pong2id": member.pong2id, "player": member.index + 1, "room": room.roomid,
+            "codecs": list(protocol.CODECS), "tickRate": self.settings.tickRate
+        })
+        try:
+            while line := await reader.readline():
+                connection.stats.received(len(line))
+                try:
+                    request = json.loads(line)
+                    method, params = protocol.unwrap(request.get("method"), request.get("params"), self.decoder)
+                except (ValueError, AttributeError) as e:   # not JSON, not an object, or a corrupt binary frame
+                    self.netLog.debug("dropped a malformed frame from %s: %s", addr, e)
+                    continue
+                if method == "disconnect": break
+                if method == "ping" and params.get("rtt") is not None:  # as the client measured it
+                    connection.stats.roundTrip(params["rtt"])
+                self.lobby.handle(addr, method, params)
+        except (ConnectionError, ValueError):
+            pass    # reset, or a line past the reader's limit: drop the client, not the server
+        finally:
+            self.lobby.leave(addr)
+            del self.connections[addr]
+            connection.sender.cancel()
+            self.dropped += connection.queue.dropped
+            self.coalesced += connection.queue.coalesced
+            writer.close()
+
+    async def sendLoop(self, connection: Connection) -> None:
+        """ write whatever is queued as one batch, then wait until the socket has taken it """
+        try:
+            while True:
+                await connection.ready.wait()
+                connection.ready.clear()
+                batch = connection.queue.take()
+                if not batch: continue
+                data = b"".join(batch)
+                connection.stats.sent(len(data), len(batch))
+                connection.stats.queued(len(batch))     # what piled up since the socket last took a batch
+                connection.writer.write(data)
+                await connection.writer.drain()
+        except ConnectionError:
+            pass    # the reader side notices and cleans up
+
+    def frame(self, method: str, body: dict) -> bytes:
+        return json.dumps({"method": method, "params": body}, separators=(",", ":")).encode() + b"\n"
+
+    def enqueue(self, member: rooms.Member, message: bytes, key: str) -> None:
+        connection = self.connections.get(member.addr)
+        if connection is None or connection.writer.is_closing(): return None
+        connection.queue.push(message, key)
+        connection.ready.set()
+
+    async def tickLoop(self) -> None:
+        """ fixed-rate tick of every room that isn't idle, in shards of `shardSize` """
+        loop = asyncio.get_running_loop()
+        step = 1.0 / self.settings.tickRate
+        self.clock = rooms.TickClock(self.settings.tickRate, self.settings.maxCatchUp, loop.time())
+        while True:
+            started, ticked = time.perf_counter(), 0
+            active = list(self.lobby.rooms.values())
+            for start in range(0, len(active), self.settings.shardSize):
+                ticked += self.lobby.update(step, active[start:start + self.settings.shardSize])
+                await asyncio.sleep(0)
+            self.lobby.ticked = ticked
+            self.tickTime = time.perf_counter() - started
+            self.ticks += 1
+            await asyncio.sleep(self.clock.wait(loop.time()))
+
+    def getStats(self) -> dict:
+        queues = [connection.queue for connection in self.connections.values()]
+        return {
+            **self.lobby.getStats(), "connections": len(self.connections),
+            "ticks": self.ticks, "tickMs": self.tickTime * 1000.0, "lateTicks": self.clock.late if self.clock else 0,
+            "sendQueue": {
+                "queued": sum(len(queue) for queue in queues), "peak": max((queue.peak for queue in queues), default=0),
+                "dropped": self.dropped + sum(queue.dropped for queue in queues),
+                "coalesced": self.coalesced + sum(queue.coalesced for queue in queues),
+            },
+            "traffic": telemetry.combine([connection.stats for connection in self.connections.values()], self.serialize),
+        }
+
+    def getConnectionStats(self) -> dict[str, dict]:
+        return {str(addr): connection.stats.getStats() for addr, connection in self.connections.items()}
+
+    async def statsLoop(self) -> None:
+        """ the periodic stats line (per-connection detail at DEBUG) """
+        while True:
+            await asyncio.sleep(self.settings.statsInterval)
+            self.netLog.logger.info("stats %s", json.dumps(self.getStats()))
+            if self.netLog.logger.isEnabledFor(logging.DEBUG):
+                self.netLog.logger.debug("connections %s", json.dumps(self.getConnectionStats()))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pong2 multi-room asyncio server")
+    parser.add_argument("--host", default=RoomServer.settings.host)
+    parser.add_argument("--port", type=int, default=RoomServer.settings.port)
+    parser.add_argument("--tick-rate", type=float, default=RoomServer.settings.tickRate)
+    parser.add_argument("--send-interval", type=int, default=RoomServer.settings.sendInterval)
+    parser.add_argument("--relay", action="store_true", help="echo client-simulated \"update\"s instead of running the matches")
+    parser.add_argument("--stats", type=float, default=RoomServer.settings.statsInterval, help="log server stats every N seconds")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level)
+    RoomServer.settings.statsInterval = args.stats
+    RoomServer.settings.host, RoomServer.settings.port, RoomServer.settings.tickRate = args.host, args.port, args.tick_rate
+    RoomServer.settings.sendInterval, RoomServer.settings.authoritative = args.send_interval, not args.relay
+
+    try:
+        asyncio.run(RoomServer().run())
+    except KeyboardInterrupt:
+        pass
@@ -1,57 +1,226 @@
-import pygame as pg
+import os, sys, json, time, logging, secrets, argparse, threading
 import d34dnet as dnet
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # src/ (protocol, telemetry)
+import protocol, telemetry
+import rooms, outbox
+
 # TODO: consider moving server-side code to the PBoard object as it already houses all the same info.
 
-class Pong2Server(dnet.inet.BaseServer):
+class Connection:
+    __slots__ = ("queue", "stats", "heard")
+
+    def __init__(self, capacity: int, heard: float) -> None:
+        self.queue: outbox.Outbox = outbox.Outbox(capacity)
+        self.stats: telemetry.ConnectionStats = telemetry.ConnectionStats()
+        self.heard: float = heard     # when the client last sent anything
+
+class Pong2Server(dnet.inet.BaseServer, rooms.Host):
+    class settings(rooms.settings):
+        host: str = "127.0.0.1"
+        port: int = 8080
+        stallTimeout: float = 3.0 # seconds a client (it pings every second) may go unheard before its sends wait in its queue instead of d34dnet's
+        statsInterval: float = 10.0 # seconds between stats dumps to the "pong2.server" log at INFO (0: never)
+        logLevel: str = "INFO" # pong2 loggers; DEBUG also lets d34dnet print every message
+
     def __init__(self):
-        super().__init__(ip = "127.0.0.1", port = 8080)
-        self.server_data: dict = {
-            "players": dict()
-        }
-        self.players: dict = self.server_data["players"]
-        # self.set_state("log-stdout", False)
+        super().__init__(ip = self.settings.host, port = self.settings.port)
+        rooms.Host.__init__(self)
+        self.netLog = telemetry.SampledLogger("pong2.server", self.settings.logSample)
+        self.set_state("log-stdout", self.netLog.logger.isEnabledFor(logging.DEBUG))    # d34dnet's own per-message prints
+
+        # send queue and traffic per connection (sizes are JSON estimates: d34dnet frames the messages)
+        self.clients: dict[tuple, Connection] = {}
+        self.pending: set[tuple] = set()    # clients with something queued
+        self.dropped: int = 0       # send queue counters of closed connections
+        self.coalesced: int = 0
+        self.readSizes: telemetry.SizeSampler = telemetry.SizeSampler(self.settings.telemetrySample)
+        self.sendSizes: telemetry.SizeSampler = telemetry.SizeSampler(self.settings.telemetrySample)
+
+        # rooms of two players each: only ever touched on d34dnet's loop, the tick included
+        self.lobby: rooms.Lobby = rooms.Lobby(self.settings, self)
+        self.arrivals: list[tuple] = []    # connections seated on the next tick
+        self.token: str = secrets.token_hex(16)    # what makes a "roomTick" request the server's own
+        self.tickAddr: tuple = None
+        self.ticking: bool = False
+        self.ticker: threading.Thread = None
+        self.requested: int = 0     # ticks the tick thread asked for
+        self.ticks: int = 0         # ticks run
+        self.nextDump: float = 0.0
+
+    def start(self) -> None:
+        super().start()
+        self.ticking = True
+        self.ticker = threading.Thread(target=self.tickLoop, name="pong2-tick", daemon=True)
+        self.ticker.start()
+
+    def stop(self) -> None:
+        self.ticking = False
+        if self.ticker is not None and self.ticker is not threading.current_thread():
+            self.ticker.join()
+        self.ticker = None
+        super().stop()
+
+    def timestamp(self) -> float:
+        return time.perf_counter()
 
     @dnet.inet.BaseServer.server_method
     def disconnect(self, endpoint, request) -> None:
-        params = request.get("params")
-        pong2id = params.get("pong2id")
+        self.lobby.leave(endpoint.getpeername())
+        self.forget(endpoint.getpeername())
         self._handle_disconnect(endpoint)
 
+    @dnet.inet.BaseServer.server_method
+    def roomTick(self, endpoint, request) -> None:
+        """ a due tick, sent by the server's own `Ticker` so that rooms step (and queue responses) on d34dnet's loop """
+        if (request.get("params") or {}).get("token") != self.token: return None
+        if self.tickAddr is None:   # the ticker's first request: it never takes a seat
+            self.tickAddr = endpoint.getpeername()
+            self.clients.pop(self.tickAddr, None)
+            if self.tickAddr in self.arrivals: self.arrivals.remove(self.tickAddr)
+        self.step(1.0 / self.settings.tickRate)
+
     def on_connect(self, endpoint):
-        pong2id = f"p{len(self.connections)}"
-        self.players[pong2id] = {"name": "pong2-player", "velocity": [0.0, 0.0], "location": [100.0, 100.0]}
-        self.queue_response(endpoint.getpeername(),self.build_response("join", {"pong2id": pong2id}))
+        self.clients[endpoint.getpeername()] = Connection(self.settings.sendQueue, self.timestamp())
+        self.arrivals.append(endpoint.getpeername())
 
     def on_disconnect(self, endpoint):
-        if not self.connections: self.stop()
+        self.lobby.prune(self.connections)  # the room goes when its last member does; the server keeps serving
+        self.arrivals = [addr for addr in self.arrivals if addr in self.connections]
+        for addr in [addr for addr in self.clients if addr not in self.connections]:
+            self.forget(addr)
+
+    def forget(self, addr: tuple) -> None:
+        connection = self.clients.pop(addr, None)
+        if connection is None: return None
+        self.pending.discard(addr)
+        self.dropped += connection.queue.dropped
+        self.coalesced += connection.queue.coalesced
 
     def on_read(self, endpoint, request) -> None:
-        method = request.get("method")
-        params = request.get("params")
-        match method.lower():
-            case "update":
-                pong2id = params.get("pong2id")
-                location = params.get("location")
-                velocity = params.get("velocity")
-                pucklocation = params.get("pucklocation")
-                puckvelocity = params.get("puckvelocity")
-                
-                self.server_data["players"][pong2id]["location"] = location
-                self.server_data["players"][pong2id]["velocity"] = velocity
-                
-                response = {k: v for (k, v) in self.players.items()}
-                response["pucklocation"] = pucklocation
-                response["puckvelocity"] = puckvelocity
-                
-                self.broadcast(self.build_response("update", response))
-
-    def broadcast(self, response: dict) -> None:
-        for addr in self.connections:
-            self.queue_response(addr, response)
-
-s = Pong2Server()
-s.start()
-s.run()
-s.stop()
+        addr, size = endpoint.getpeername(), self.readSizes.size(request)
+        try:
+            method, params = protocol.unwrap(request.get("method"), request.get("params"), self.decoder)
+        except ValueError as e:     # a corrupt binary frame: drop it, not d34dnet's loop
+            self.netLog.debug("dropped a malformed frame from %s: %s", addr, e)
+            return None
+        self.netLog.debug("request from %s: %s", addr, method)
+        connection = self.clients.get(addr)
+        if connection is not None:
+            connection.heard = self.timestamp()
+            connection.stats.received(size)
+            if method == "ping" and params.get("rtt") is not None: connection.stats.roundTrip(params["rtt"])   # as the client measured it
+        self.lobby.handle(addr, method, params)
+        self.flush()
+
+    def frame(self, method: str, body: dict) -> tuple[dict, int]:
+        response = self.build_response(method, body)
+        return response, self.sendSizes.size(response)
+
+    def enqueue(self, member: rooms.Member, message: tuple[dict, int], key: str) -> None:
+        connection = self.clients.get(member.addr)
+        if connection is None: return None
+        connection.queue.push(message, key)
+        self.pending.add(member.addr)
+
+    def flush(self) -> None:
+        """ hand queued responses to d34dnet, except for clients gone quiet: theirs stay queued, coalescing, until they speak again """
+        now = self.timestamp()
+        for addr in list(self.pending):
+            connection = self.clients.get(addr)
+            if connection is not None and now - connection.heard > self.settings.stallTimeout: continue
+            self.pending.discard(addr)
+            if connection is None: continue
+            batch = connection.queue.take()
+            connection.stats.queued(len(batch))
+            for response, size in batch:
+                self.queue_response(addr, response)
+                connection.stats.sent(size)
+
+    def getStats(self) -> dict:
+        queues = [connection.queue for connection in self.clients.values()]
+        return {
+            **self.lobby.getStats(), "connections": len(self.connections) - (self.tickAddr is not None), "ticks": self.ticks,
+            "sendQueue": {
+                "queued": sum(len(queue) for queue in queues), "peak": max((queue.peak for queue in queues), default=0),
+                "stalled": len(self.pending), "dropped": self.dropped + sum(queue.dropped for queue in queues),
+                "coalesced": self.coalesced + sum(queue.coalesced for queue in queues),
+            },
+            "traffic": telemetry.combine([connection.stats for connection in self.clients.values()], self.serialize),
+        }
+
+    def getConnectionStats(self) -> dict[str, dict]:
+        return {str(addr): connection.stats.getStats() for addr, connection in list(self.clients.items())}
+
+    def dumpStats(self) -> None:
+        """ the periodic stats line (per-connection detail at DEBUG) """
+        self.netLog.logger.info("stats %s", json.dumps(self.getStats()))
+        if self.netLog.logger.isEnabledFor(logging.DEBUG):
+            self.netLog.logger.debug("connections %s", json.dumps(self.getConnectionStats()))
+
+    def seat(self) -> None:
+        """ give the connections that arrived since the last tick their seats """
+        for addr in self.arrivals:
+            room, member = self.lobby.join(addr)
+            self.respond(member, "join", {
+                "pong2id": member.pong2id, "player": member.index + 1, "room": room.roomid,
+                "codecs": list(protocol.CODECS), "tickRate": self.settings.tickRate
+            })
+        self.arrivals.clear()
+
+    def step(self, deltaTime: float) -> None:
+        """ one tick: seat new connections, step every room that isn't idle, dump stats when they're due """
+        self.seat()
+        if self.settings.authoritative:
+            self.lobby.ticked = self.lobby.update(deltaTime)
+        self.flush()
+        self.ticks += 1
+        if self.settings.statsInterval and self.timestamp() >= self.nextDump:
+            self.nextDump = self.timestamp() + self.settings.statsInterval
+            self.dumpStats()
+
+    def tickLoop(self) -> None:
+        """ the tick's clock: a "roomTick" request whenever one is due, unless d34dnet's loop is `maxCatchUp` behind already """
+        ticker = Ticker((self.settings.host, self.settings.port), self.token)
+        try:
+            ticker.connect()
+        except OSError as e:
+            self.netLog.logger.error("the tick thread could not reach the server: %s", e)
+            return None
+        clock = rooms.TickClock(self.settings.tickRate, self.settings.maxCatchUp, time.perf_counter())
+        while self.ticking:
+            if self.requested - self.ticks <= self.settings.maxCatchUp:
+                ticker.tick()
+                self.requested += 1
+            time.sleep(clock.wait(time.perf_counter()))
+        ticker.disconnect()
+
+class Ticker(dnet.inet.BaseClient):
+    """ the tick thread's own connection to the server: created, connected and written on that thread only """
+    def __init__(self, address: tuple, token: str) -> None:
+        super().__init__()
+        self.address = address
+        self.token: str = token
+
+    def tick(self) -> None:
+        self.write(self.build_request("roomTick", {"token": self.token}))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pong2 d34dnet server")
+    parser.add_argument("--host", default=Pong2Server.settings.host)
+    parser.add_argument("--port", type=int, default=Pong2Server.settings.port)
+    parser.add_argument("--tick-rate", type=float, default=Pong2Server.settings.tickRate)
+    parser.add_argument("--send-interval", type=int, default=Pong2Server.settings.sendInterval)
+    parser.add_argument("--relay", action="store_true", help="echo client-simulated \"update\"s instead of running the matches")
+    parser.add_argument("--stats", type=float, default=Pong2Server.settings.statsInterval, help="log server stats every N seconds")
+    parser.add_argument("--log-level", default=Pong2Server.settings.logLevel)
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level)
+    Pong2Server.settings.statsInterval, Pong2Server.settings.logLevel = args.stats, args.log_level
+    Pong2Server.settings.host, Pong2Server.settings.port, Pong2Server.settings.tickRate = args.host, args.port, args.tick_rate
+    Pong2Server.settings.sendInterval, Pong2Server.settings.authoritative = args.send_interval, not args.relay
 
+    s = Pong2Server()
+    s.start()
+    s.run()
+    s.stop()
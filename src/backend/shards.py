@@ -0,0 +1,224 @@
+"""
+multi-process Pong2 rooms: a dispatcher places each match on one of `workers` RoomServer processes
+
+    python src/backend/shards.py [--workers N] [--host 127.0.0.1] [--port 8081] [--send-interval 1] [--relay] [--stats SECONDS] [--log-level INFO]
+"""
+import os, sys, json, signal, socket, asyncio, logging, argparse
+import multiprocessing as mp
+from multiprocessing import reduction
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))   # backend/ (roomserver, rooms)
+import roomserver, rooms
+
+class Shard:
+    """ the dispatcher's handle on one worker process """
+    def __init__(self, index: int, process: mp.Process, handles, reports) -> None:
+        self.index: int = index
+        self.process: mp.Process = process
+        self.handles = handles     # dispatcher -> worker: accepted sockets
+        self.reports = reports     # worker -> dispatcher: ("ready", port) then ("load", stats)
+        self.port: int = None
+        self.stats: dict = {}
+        self.placed: int = 0        # players sent since the last report
+        self.waiting: int = 0       # rooms with a free seat, as last reported
+        self.alive: bool = True
+
+    def load(self) -> int:
+        return self.stats.get("players", 0) + self.placed
+
+class ShardWorker:
+    """ worker process: a `RoomServer` fed with sockets by the dispatcher """
+    def __init__(self, index: int, workers: int, handles, reports, reportInterval: float) -> None:
+        self.handles = handles
+        self.reports = reports
+        self.reportInterval: float = reportInterval
+        self.rooms: roomserver.RoomServer = roomserver.RoomServer()
+        self.rooms.lobby = rooms.Lobby(self.rooms.settings, self.rooms, index + 1, workers)   # ids unique across shards
+
+    async def run(self) -> None:
+        self.rooms.settings.port = 0    # its own port only matters when the dispatcher proxies
+        await self.rooms.start()
+        self.reports.send(("ready", self.rooms.server.sockets[0].getsockname()[1]))
+        loop = asyncio.get_running_loop()
+        if hasattr(socket, "send_fds"):
+            loop.add_reader(self.handles.fileno(), self.adopt)
+        while True:
+            await asyncio.sleep(self.reportInterval)
+            try:
+                self.reports.send(("load", {**self.rooms.getStats(), "pid": os.getpid()}))
+            except (BrokenPipeError, EOFError):
+                break   # the dispatcher is gone: so is this shard
+
+    def adopt(self) -> None:
+        try:
+            fd = reduction.recv_handle(self.handles)
+        except EOFError:    # the dispatcher is gone
+            asyncio.get_running_loop().remove_reader(self.handles.fileno())
+            return None
+        asyncio.create_task(self.serve(socket.socket(fileno=fd)))
+
+    async def serve(self, sock: socket.socket) -> None:
+        reader, writer = await asyncio.open_connection(sock=sock)
+        await self.rooms.serve(reader, writer)
+
+def work(index: int, workers: int, handles, reports, reportInterval: float, authoritative: bool, sendInterval: int) -> None:
+    roomserver.RoomServer.settings.authoritative = authoritative    # a spawned process: the dispatcher's settings don't carry over
+    roomserver.RoomServer.settings.sendInterval = sendInterval
+    try:
+        asyncio.run(ShardWorker(index, workers, handles, reports, reportInterval).run())
+    except KeyboardInterrupt:
+        pass
+
+class Dispatcher:
+    class settings:
+        host: str = "127.0.0.1"
+        port: int = 8081
+        workers: int = os.cpu_count() or 1
+        handoff: bool = hasattr(socket, "send_fds") # pass sockets to the shards; proxy bytes otherwise
+        reportInterval: float = 1.0 # seconds between worker load reports
+        authoritative: bool = True # the workers run the matches; False relays client-simulated "update"s
+        sendInterval: int = 1 # the workers' ticks between snapshots
+
+    def __init__(self) -> None:
+        self.shards: list[Shard] = []
+        self.open: Shard = None     # where the last unpaired player went
+        self.listener: socket.socket = None
+        self.server: asyncio.Server = None
+        self.accepter: asyncio.Task = None
+        self.connections: int = 0
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        context = mp.get_context("spawn")   # no forked event loop state in the workers
+        for index in range(self.settings.workers):
+            handles, workerHandles = context.Pipe(duplex=True)      # a socketpair: can carry descriptors
+            reports, workerReports = context.Pipe(duplex=False)
+            process = context.Process(
+                target=work, args=(
+                    index, self.settings.workers, workerHandles, workerReports, self.settings.reportInterval,
+                    self.settings.authoritative, self.settings.sendInterval
+                ), name=f"pong2-shard-{index}", daemon=True
+            )
+            process.start()
+            shard = Shard(index, process, handles, reports)
+            self.shards.append(shard)
+            loop.add_reader(reports.fileno(), self.report, shard)
+
+        while any(shard.port is None for shard in self.shards if shard.alive):   # every worker listening
+            await asyncio.sleep(0.05)
+
+        if self.settings.handoff:
+            self.listener = socket.create_server((self.settings.host, self.settings.port), backlog=1024)
+            self.listener.setblocking(False)
+            self.accepter = asyncio.create_task(self.acceptLoop())
+        else:
+            self.server = await asyncio.start_server(self.proxy, self.settings.host, self.settings.port)
+
+    async def stop(self) -> None:
+        if self.accepter is not None: self.accepter.cancel()
+        if self.listener is not None: self.listener.close()
+        if self.server is not None: self.server.close()
+        for shard in self.shards:
+            asyncio.get_running_loop().remove_reader(shard.reports.fileno())
+            shard.process.terminate()
+            shard.process.join()
+
+    def report(self, shard: Shard) -> None:
+        try:
+            kind, payload = shard.reports.recv()
+        except (EOFError, OSError):     # the worker died: stop placing matches there
+            asyncio.get_running_loop().remove_reader(shard.reports.fileno())
+            shard.alive = False
+            if self.open is shard: self.open = None
+            return None
+        if kind == "ready":
+            shard.port = payload
+        else:
+            shard.stats, shard.placed, shard.waiting = payload, 0, payload.get("waiting", 0)
+
+    def place(self) -> Shard:
+        """ the shard for a new connection: where an opponent waits, else the least loaded """
+        shard, self.open = self.open, None
+        if shard is None or not shard.alive:
+            live = [shard for shard in self.shards if shard.alive]
+            waiting = [shard for shard in live if shard.waiting > 0]
+            if waiting:
+                shard = waiting[0]
+                shard.waiting -= 1
+            else:
+                shard = min(live, key=Shard.load)
+                self.open = shard   # the next player completes this match
+        shard.placed += 1
+        self.connections += 1
+        return shard
+
+    async def acceptLoop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            sock, _ = await loop.sock_accept(self.listener)
+            try:
+                reduction.send_handle(self.place().handles, sock.fileno(), None)
+            finally:
+                sock.close()    # the shard holds its own descriptor now
+
+    async def proxy(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ fallback without descriptor passing: relay bytes to the shard's port """
+        shard = self.place()
+        try:
+            shardReader, shardWriter = await asyncio.open_connection("127.0.0.1", shard.port)
+        except OSError:
+            writer.close()
+            return None
+
+        async def pipe(source: asyncio.StreamReader, sink: asyncio.StreamWriter) -> None:
+            try:
+                while data := await source.read(65536):
+                    sink.write(data)
+                    await sink.drain()
+            except ConnectionError:
+                pass
+            finally:
+                sink.close()
+
+        await asyncio.gather(pipe(reader, shardWriter), pipe(shardReader, writer))
+
+    def getStats(self) -> dict:
+        shards = [{"index": shard.index, "alive": shard.alive, "placed": shard.placed, **shard.stats} for shard in self.shards]
+        return {
+            "connections": self.connections,
+            "rooms": sum(shard.get("rooms", 0) for shard in shards),
+            "players": sum(shard.get("players", 0) for shard in shards),
+            "shards": shards,
+        }
+
+async def main(statsInterval: float) -> None:
+    dispatcher = Dispatcher()
+    await dispatcher.start()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)   # stop the workers too
+    try:
+        while True:
+            await asyncio.sleep(statsInterval or 3600.0)
+            if statsInterval: logging.getLogger("pong2.dispatcher").info("stats %s", json.dumps(dispatcher.getStats()))
+    finally:
+        await dispatcher.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pong2 rooms sharded over worker processes")
+    parser.add_argument("--workers", type=int, default=Dispatcher.settings.workers)
+    parser.add_argument("--host", default=Dispatcher.settings.host)
+    parser.add_argument("--port", type=int, default=Dispatcher.settings.port)
+    parser.add_argument("--send-interval", type=int, default=Dispatcher.settings.sendInterval)
+    parser.add_argument("--relay", action="store_true", help="echo client-simulated \"update\"s instead of running the matches")
+    parser.add_argument("--proxy", action="store_true", help="relay bytes instead of handing sockets to the workers")
+    parser.add_argument("--stats", type=float, default=0.0, help="log dispatcher stats every N seconds")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level)
+    Dispatcher.settings.workers, Dispatcher.settings.host, Dispatcher.settings.port = args.workers, args.host, args.port
+    Dispatcher.settings.sendInterval, Dispatcher.settings.authoritative = args.send_interval, not args.relay
+    if args.proxy: Dispatcher.settings.handoff = False
+
+    try:
+        asyncio.run(main(args.stats))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
@@ -0,0 +1,176 @@
+"""
+Headless, deterministic benchmark of the full Pong2 frame loop.
+
+    python src/bench.py [--frames N] [--seed S] [--particles array|sprite] [--unbatched] [--dirty] [--output bench.json]
+
+Runs `main.Pong2` under SDL's dummy video/audio drivers with a fixed
+timestep and no network, replays `SCRIPT` (a serve, rallies, goals for both
+sides and a win burst) and prints frame-time percentiles, per-phase timings,
+particle peaks and allocation counters as JSON.
+"""
+import os, sys, gc, json, time, random, argparse, contextlib
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")   # keep stdout clean for the JSON report
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # assets are loaded relative to the repo root
+
+import numpy as np
+import pygame as pg
+import main, gfx, events, inputs, profiler
+
+# (action, frames) -- "until-*" actions end early once their condition is met
+SCRIPT: list[tuple[str, int]] = [
+    ("serve", 1),               # F1
+    ("rally", 600),             # both bars track the puck
+    ("until-goal2", 3000),      # player1 idles until player2 scores
+    ("rally", 600),
+    ("until-gameover", 12000),  # player2 idles until player1 wins (PPuckWin burst)
+    ("idle", 300),              # let the win burst play out
+    ("reset", 1),               # F2
+    ("serve", 1),
+    ("rally", 300),
+]
+
+class ScriptedEvents(events.EventHandler):
+    """ EventHandler fed from the benchmark script instead of the live keyboard """
+    def __init__(self) -> None:
+        super().__init__()
+        self.pressed: set[int] = set()
+
+    def update(self) -> bool:
+        self.keyboardOld = self.keyboard.copy()
+        self.keyboard = {key: True for key in self.pressed}
+        pg.event.pump()
+        return True
+
+class OfflinePong2(main.Pong2):
+    """ Pong2 with networking stubbed out """
+    def connect(self) -> None: ...
+    def disconnect(self) -> None: ...
+    def write(self, request) -> None: ...
+
+def track(bar, puck) -> int:
+    """ -1 up | 0 hold | 1 down, to keep the bar centered on the puck """
+    offset = (puck.location[1] + puck.size[1] / 2) - (bar.location[1] + bar.size[1] / 2)
+    if abs(offset) < 8: return 0
+    return 1 if offset > 0 else -1
+
+def steer(game: OfflinePong2, action: str) -> None:
+    board = game.board
+    pressed = game.events.pressed
+    pressed.clear()
+    match action:
+        case "serve": pressed.add(inputs.Keyboard.F1)
+        case "reset": pressed.add(inputs.Keyboard.F2)
+
+    if action in ("rally", "until-gameover"):   # local player (keyboard)
+        direction = track(board.player1, board.puck)
+        if direction < 0: pressed.add(inputs.Keyboard.W)
+        if direction > 0: pressed.add(inputs.Keyboard.S)
+
+    if action in ("rally", "until-goal2"):      # opponent (driven like a remote player)
+        direction = track(board.player2, board.puck)
+        if direction < 0: board.player2.moveUp()
+        if direction > 0: board.player2.moveDown()
+
+def finished(game: OfflinePong2, action: str, scores: list[int]) -> bool:
+    info = game.board.matchInfo
+    match action:
+        case "until-goal2": return info["playerInfo"]["player2"]["score"] > scores[1]
+        case "until-gameover": return info["gameover"]
+    return False
+
+def run(frames: int=None, seed: int=0) -> dict:
+    random.seed(seed)
+    game = OfflinePong2()
+    game.events = ScriptedEvents()
+    game.profiler.enabled = True
+    game.profiler.clear()
+    deltaTime = 1.0 / game.settings.fps
+
+    goals, wins = 0, 0
+    frameTimes, blockDeltas, particleCounts = [], [], []
+    collections = gc.get_stats()[0]["collections"]
+    started = time.perf_counter()
+    frame = 0
+    for action, length in SCRIPT:
+        info = game.board.matchInfo
+        scores = [info["playerInfo"]["player1"]["score"], info["playerInfo"]["player2"]["score"]]
+        for _ in range(length):
+            if frames is not None and frame >= frames: break
+            steer(game, action)
+            blocks = sys.getallocatedblocks()
+            start = time.perf_counter()
+
+            game.game_state.deltaTime = deltaTime
+            game.profiler.begin()
+            game.events.update()
+            game.profiler.lap("events")
+            game.update()
+            game.render()
+            game.profiler.end()
+
+            frameTimes.append((time.perf_counter() - start) * 1000.0)
+            blockDeltas.append(sys.getallocatedblocks() - blocks)
+            particleCounts.append(game.particles.liveCount)
+            frame += 1
+
+            info = game.board.matchInfo
+            current = [info["playerInfo"]["player1"]["score"], info["playerInfo"]["player2"]["score"]]
+            goals += max(sum(current) - sum(scores), 0)
+            if finished(game, action, scores): break
+            scores = current
+        wins += action == "until-gameover" and game.board.matchInfo["gameover"]
+
+    return {
+        "frames": frame,
+        "seed": seed,
+        "fixedDeltaTime": deltaTime,
+        "settings": {
+            "particleBackend": game.settings.particleBackend,
+            "batchedRender": game.renderer.batched,
+            "dirtyRender": game.window.dirty,
+            "fixedStep": game.settings.fixedStep,
+            "tickRate": game.settings.tickRate,
+        },
+        "wallSeconds": time.perf_counter() - started,
+        "frameMs": profiler.summarize(frameTimes),
+        "phasesMs": {phase: dict(zip(["p50", "p95", "p99"], stats)) for phase, stats in game.profiler.getStats().items()},
+        "particles": {"peak": game.particles.peakCount, "mean": float(np.mean(particleCounts)) if particleCounts else 0.0},
+        "allocations": {
+            "blocksPerFrame": profiler.summarize(blockDeltas),
+            "gen0CollectionsPerFrame": (gc.get_stats()[0]["collections"] - collections) / max(frame, 1),
+            "caches": {
+                "surfaces": gfx.surfaceCache.getStats(),
+                "rotations": gfx.rotationCache.getStats(),
+                "text": gfx.textCache.getStats(),
+            },
+        },
+        "goals": goals,
+        "wins": wins,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="headless Pong2 frame-loop benchmark")
+    parser.add_argument("--frames", type=int, default=None, help="stop after this many frames (default: the whole script)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--particles", choices=["array", "sprite"], default=main.Pong2.settings.particleBackend)
+    parser.add_argument("--unbatched", action="store_true", help="use the per-sprite Group.draw path")
+    parser.add_argument("--dirty", action="store_true", help="present with dirty rects")
+    parser.add_argument("--tick-rate", type=float, default=main.Pong2.settings.tickRate, help="simulation ticks per second (0: step once per frame)")
+    parser.add_argument("--output", default=None, help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    main.Pong2.settings.particleBackend = args.particles
+    main.Pong2.settings.batchedRender = not args.unbatched
+    main.Pong2.settings.dirtyRender = args.dirty
+    main.Pong2.settings.fixedStep = args.tick_rate > 0
+    main.Pong2.settings.tickRate = args.tick_rate or main.Pong2.settings.tickRate
+
+    with contextlib.redirect_stdout(sys.stderr):  # the game prints match results
+        report = json.dumps(run(args.frames, args.seed), indent=2)
+    if args.output:
+        with open(args.output, "w") as file: file.write(report)
+    else:
+        print(report)
@@ -1,29 +1,209 @@
 import os, re
+from collections import OrderedDict
+import numpy as np
 import pygame as pg
 from pygame.math import Vector2
 
 # ------------------------------------------------------------ #
 class Window:
-    def __init__(self, width: int, height: int, title: str) -> None:
+    """ offscreen display presented to the real window, optionally only where it changed (`dirty`) """
+    def __init__(self, width: int, height: int, title: str, dirty: bool=False) -> None:
         self.zoom: float = 1.0
         self.size: list[int] = [width, height]
         self.display: pg.Surface = pg.Surface([width, height])
         self.window: pg.Surface = pg.display.set_mode([width, height], pg.WINDOWPOS_CENTERED)
         pg.display.set_caption(title)
 
+        self.dirty: bool = dirty
+        self.dirtyLimit: float = 0.4
+        self.dirtyMaxRects: int = 256
+        self.dirtyRects: list[pg.Rect] = []
+        self.lastDirtyRects: list[pg.Rect] = []
+        self.blits: dict[tuple, tuple] = {}         # location -> (surface, rect) blitted this frame
+        self.lastBlits: dict[tuple, tuple] = {}
+        self.fullRedraw: bool = True
+
+    def invalidate(self) -> None:
+        self.fullRedraw = True
+
+    def markDirty(self, rect: pg.Rect) -> None:
+        self.dirtyRects.append(rect)
+
     def fill(self, color: list[int]) -> None:
         self.display.fill(color)
-        self.window.fill(color)
+        if self.zoom != 1.0:    # a zoomed display doesn't cover the whole window
+            self.window.fill(color)
 
     def blit(self, surface: pg.Surface, location: list[float]) -> None:
-        self.display.blit(surface, location)
+        rect = self.display.blit(surface, location)
+        if self.dirty:
+            key = (int(location[0]), int(location[1]))
+            last = self.lastBlits.pop(key, None)
+            if last is None or last[0] is not surface:
+                self.dirtyRects.append(rect)
+                if last is not None: self.dirtyRects.append(last[1])
+            self.blits[key] = (surface, rect)
 
     def render(self) -> None:
-        self.window.blit(
-            dest = [0, 0],
-            source = pg.transform.scale(self.display, [self.size[0] / self.zoom, self.size[1] / self.zoom])
-        )
+        rects = None
+        if self.dirty:
+            for surface, rect in self.lastBlits.values():   # blitted last frame but not this one
+                self.dirtyRects.append(rect)
+            self.lastBlits, self.blits = self.blits, {}
+            rects = self.presentRects()
+            self.lastDirtyRects, self.dirtyRects = self.dirtyRects, []
+
+        if rects is not None:
+            for rect in rects:
+                self.window.blit(self.display, rect, rect)
+            pg.display.update(rects)
+            return None
+
+        self.fullRedraw = False
+        if self.zoom == 1.0:
+            self.window.blit(self.display, [0, 0])
+        else:
+            self.window.blit(
+                dest = [0, 0],
+                source = pg.transform.scale(self.display, [self.size[0] / self.zoom, self.size[1] / self.zoom])
+            )
         pg.display.flip()
+
+    def presentRects(self) -> list[pg.Rect]|None:
+        """ clipped regions to present this frame, or None when a full redraw is cheaper or required """
+        if self.fullRedraw or self.zoom != 1.0: return None
+        if len(self.dirtyRects) + len(self.lastDirtyRects) > self.dirtyMaxRects: return None
+
+        area = 0
+        rects = []
+        bounds = self.display.get_rect()
+        for rect in self.dirtyRects + self.lastDirtyRects:
+            rect = rect.clip(bounds)
+            if rect.w and rect.h:
+                area += rect.w * rect.h
+                rects.append(rect)
+        if area > self.dirtyLimit * bounds.w * bounds.h: return None
+        return rects
+# ------------------------------------------------------------ #
+
+# ------------------------------------------------------------ #
+class SurfaceCache:
+    """ bounded LRU cache of shared, read-only surfaces """
+    def __init__(self, maxSize: int=512) -> None:
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.maxSize: int = maxSize
+        self.surfaces: OrderedDict = OrderedDict()
+
+    def fetch(self, key: tuple, factory) -> pg.Surface:
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = factory()
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.maxSize:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def get(self, size: list[int], color: list[int]=[255, 255, 255], wireSize: int=0, asset: str=None, assetManager=None) -> pg.Surface:
+        if asset and assetManager is not None:
+            image = assetManager.getImage(asset)
+            if image is not None:
+                return self.fetch((asset,), lambda: image)
+
+        size = (int(size[0]), int(size[1]))
+        def factory() -> pg.Surface:
+            surface = pg.Surface(size, pg.SRCALPHA)
+            if wireSize != 0:
+                drawRect(surface, size, [0, 0], color, wireSize)
+            else:
+                surface.fill(color)
+            return surface
+        return self.fetch((size, tuple(color), wireSize, None), factory)
+
+    def clear(self) -> None:
+        self.surfaces.clear()
+
+    def getStats(self) -> dict[str, int]:
+        return {"size": len(self.surfaces), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+surfaceCache: SurfaceCache = SurfaceCache()
+# ------------------------------------------------------------ #
+
+# ------------------------------------------------------------ #
+class RotationCache:
+    """ memoized sprite rotations, quantized to `step` degrees and bounded by `maxBytes` """
+    def __init__(self, step: float=2.0, maxBytes: int=32*1024*1024) -> None:
+        self.hits: int = 0
+        self.bytes: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.step: float = step
+        self.maxBytes: int = maxBytes
+        self.surfaces: OrderedDict = OrderedDict()          # (image, angle) -> (rotated, offsetX, offsetY)
+        self.angles: dict[pg.Surface, set[float]] = {}      # image -> cached angles
+
+    def setStep(self, step: float) -> None:
+        self.step = step
+        self.clear()
+
+    def quantize(self, angle: float) -> float:
+        return (round(angle / self.step) * self.step) % 360
+
+    def rotate(self, image: pg.Surface, angle: float) -> tuple[pg.Surface, int, int]:
+        angle = self.quantize(angle)
+        if angle == 0: return image, 0, 0
+
+        key = (image, angle)
+        entry = self.surfaces.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        rotated = pg.transform.rotate(image, angle)
+        width, height = image.get_size()
+        rotatedWidth, rotatedHeight = rotated.get_size()
+        entry = (rotated, width // 2 - rotatedWidth // 2, height // 2 - rotatedHeight // 2)
+        self.surfaces[key] = entry
+        self.angles.setdefault(image, set()).add(angle)
+        self.bytes += rotatedWidth * rotatedHeight * rotated.get_bytesize()
+
+        while self.bytes > self.maxBytes and len(self.surfaces) > 1:
+            self.evict(*self.surfaces.popitem(last=False))
+            self.evictions += 1
+        return entry
+
+    def evict(self, key: tuple, entry: tuple) -> None:
+        image, angle = key
+        rotated = entry[0]
+        self.bytes -= rotated.get_width() * rotated.get_height() * rotated.get_bytesize()
+        angles = self.angles.get(image)
+        if angles is not None:
+            angles.discard(angle)
+            if not angles: self.angles.pop(image)
+
+    def invalidate(self, image: pg.Surface) -> None:
+        for angle in self.angles.pop(image, ()):
+            key = (image, angle)
+            self.evict(key, self.surfaces.pop(key))
+
+    def clear(self) -> None:
+        self.surfaces.clear()
+        self.angles.clear()
+        self.bytes = 0
+
+    def getStats(self) -> dict[str, int]:
+        return {"size": len(self.surfaces), "bytes": self.bytes, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+rotationCache: RotationCache = RotationCache()
 # ------------------------------------------------------------ #
 
 # ------------------------------------------------------------ #
@@ -34,8 +214,8 @@ class Sprite(pg.sprite.Sprite):
         self.color = color
         self.speed = speed
 
-        self._image = pg.Surface(size, pg.SRCALPHA)
-        self._image.fill(color)
+        self._image = surfaceCache.get(size, color)
+        self._shared: bool = True   # `_image` is shared (cache/asset) and copied before any in-place draw
 
         self.image = self._image
         self.rect = self.image.get_rect(topleft=location)
@@ -43,9 +223,31 @@ class Sprite(pg.sprite.Sprite):
         self.rotation = 0.0
         self.rotSpeed = 0.0
         self.rotate: bool = rotate
+        self.integrate: bool = True     # `update` applies velocity (cleared when physics moves the sprite itself)
         self.friction: float = (90/100) # dampens movement by 90% by default
         self.velocity = pg.math.Vector2(0, 0)
         self.location = pg.math.Vector2(location)
+        self.lastLocation = pg.math.Vector2(location)   # location at the previous simulation step, for interpolation
+        self.drawOffset: tuple[int, int] = (0, 0)       # rect topleft relative to `location` (rotation)
+
+    def snap(self) -> None:
+        self.lastLocation.update(self.location)
+
+    @property
+    def drawnLocation(self) -> tuple[int, int]:
+        """ where the sprite is drawn this frame: `location`, or wherever `interpolate`/`place` put it """
+        return (self.rect.x - self.drawOffset[0], self.rect.y - self.drawOffset[1])
+
+    def place(self, x: float, y: float) -> None:
+        """ draw at (x, y) instead of `location`, without moving the sprite """
+        self.rect.topleft = (int(x) + self.drawOffset[0], int(y) + self.drawOffset[1])
+
+    def interpolate(self, alpha: float) -> None:
+        """ draw `alpha` of the way from `lastLocation` to `location` """
+        self.place(
+            self.lastLocation[0] + (self.location[0] - self.lastLocation[0]) * alpha,
+            self.lastLocation[1] + (self.location[1] - self.lastLocation[1]) * alpha
+        )
     
     def moveRight(self) -> None:
         self.velocity[0] = self.speed
@@ -59,29 +261,42 @@ class Sprite(pg.sprite.Sprite):
     def moveDown(self) -> None:
         self.velocity[1] = self.speed
 
+    def ownImage(self) -> pg.Surface:
+        if self._shared:
+            image = self._image
+            self._image = image.copy()
+            self._shared = False
+            if self.image is image:
+                self.image = self._image
+        return self._image
+
     def fillImage(self, color: list[int]=[255, 255, 255]) -> None:
-        self._image.fill(color)
+        self.ownImage().fill(color)
+        rotationCache.invalidate(self._image)
 
     def setColor(self, color: list[int]=[255, 255, 255]) -> None:
-        self._image.fill(color)
+        self.ownImage().fill(color)
+        rotationCache.invalidate(self._image)
         self.color = color
 
     def setImage(self, image: pg.Surface=None, color: list=[255, 255, 255], wireSize: int = 0) -> None:
+        if not self._shared:    # nothing else references an owned image's rotations
+            rotationCache.invalidate(self._image)
         if image is None:
-            self._image = pg.Surface(self.size, pg.SRCALPHA)
-            if wireSize != 0:
-                drawRect(self._image, self.size, self._image.get_rect().topleft, color, wireSize)
-            else:
-                self._image.fill(color)
+            self._image = surfaceCache.get(self.size, color, wireSize)
         else:
             self._image = image
+        self._shared = True
 
         self.image = self._image
         self.rect = self.image.get_rect(topleft=self.location)
+        self.drawOffset = (0, 0)
 
     def update(self, deltaTime: float) -> None:
-        self.location += self.velocity * deltaTime
+        if self.integrate:
+            self.location += self.velocity * deltaTime
         self.rect.topleft = self.location
+        self.drawOffset = (0, 0)
 
         if self.rotate and self.rotSpeed != 0:
             self.rotation += self.rotSpeed * deltaTime
@@ -90,8 +305,9 @@ class Sprite(pg.sprite.Sprite):
             if abs(self.rotSpeed) < 0.1:
                 self.rotSpeed = 0.0
 
-            self.image = pg.transform.rotate(self._image, -self.rotation)
-            self.rect = self.image.get_rect(center=self.rect.center)
+            self.image, offsetX, offsetY = rotationCache.rotate(self._image, -self.rotation)
+            self.rect = pg.Rect(self.rect.x + offsetX, self.rect.y + offsetY, *self.image.get_size())
+            self.drawOffset = (offsetX, offsetY)
         
         # normalize rotation to -180 to 180
         if self.rotation > 180:
@@ -102,12 +318,16 @@ class Sprite(pg.sprite.Sprite):
 
 # ------------------------------------------------------------ #
 class Renderer:
-    def __init__(self):
+    """ layered sprite renderer: one `Surface.fblits` call per layer when `batched` """
+    def __init__(self, batched: bool=True):
+        self.batched: bool = batched
         self.groups = {
             "background": pg.sprite.Group(),
             "midground": pg.sprite.Group(),
             "foreground": pg.sprite.Group()
         }
+        self.systems = {group: [] for group in self.groups}
+        self.lastDrawn: dict = {}   # sprite -> (x, y, w, h, image) presented last frame, for dirty tracking
 
     def addSprite(self, sprite:Sprite, group:str="background") -> bool:
         try:
@@ -121,9 +341,62 @@ class Renderer:
             return True
         except (Exception) as e: return False
 
-    def render(self, target:pg.Surface) -> None:
+    def addSystem(self, system, group:str="background") -> bool:
+        try:
+            self.systems[group].append(system)
+            return True
+        except (Exception) as e: return False
+
+    def remSystem(self, system, group:str="background") -> bool:
+        try:
+            self.systems[group].remove(system)
+            return True
+        except (Exception) as e: return False
+
+    def spriteCount(self) -> int:
+        return sum(len(group) for group in self.groups.values())
+
+    def trackSprites(self, dirtyRects: list[pg.Rect]) -> None:
+        """ mark the old and new rects of every sprite that moved, changed image, was added or was removed """
+        drawn = {}
+        lastDrawn = self.lastDrawn
+        for group in self.groups:
+            for sprite in self.groups[group]:
+                rect = sprite.rect
+                state = (rect.x, rect.y, rect.w, rect.h, sprite.image)
+                last = lastDrawn.pop(sprite, None)
+                if last != state:
+                    dirtyRects.append(rect.copy())
+                    if last is not None: dirtyRects.append(pg.Rect(last[:4]))
+                drawn[sprite] = state
+        for last in lastDrawn.values():
+            dirtyRects.append(pg.Rect(last[:4]))
+        self.lastDrawn = drawn
+
+    def render(self, target:pg.Surface, dirtyRects: list[pg.Rect]=None) -> None:
+        if dirtyRects is not None:
+            self.trackSprites(dirtyRects)
+
+        if self.batched:
+            blits = getattr(target, "fblits", None)
+            for group in self.groups:
+                drawList = [(sprite.image, sprite.rect) for sprite in self.groups[group]]
+                for system in self.systems[group]:
+                    systemList = system.drawList()
+                    if dirtyRects is not None:
+                        dirtyRects.extend(blitRect(surface, location) for surface, location in systemList)
+                    drawList.extend(systemList)
+                if not drawList: continue
+                if blits is not None: blits(drawList)
+                else: target.blits(drawList, doreturn=False)
+            return None
+
         for group in self.groups:
             self.groups[group].draw(target)
+            for system in self.systems[group]:
+                system.render(target)
+                if dirtyRects is not None:
+                    dirtyRects.extend(blitRect(surface, location) for surface, location in system.drawList())
 # ------------------------------------------------------------ #
 
 # ------------------------------------------------------------ #
@@ -181,14 +454,25 @@ class Animation:
 
 # ------------------------------------------------------------ #
 class Particle(Sprite):
-    def __init__(self, lifeSpan: float, size:list[int], location:list[float], color:list[int]=[0, 255, 0], wireSize: int=0) -> None:
+    def __init__(self, lifeSpan: float, size:list[int], location:list[float], color:list[int]=[0, 255, 0], wireSize: int=0, image: pg.Surface=None) -> None:
         super().__init__(size, 0.0, location, color)
         self.lifeSpan: float = lifeSpan
-        self.setImage(color=color, wireSize=wireSize)
+        self.setImage(image, color=color, wireSize=wireSize)
 
     def kill(self) -> None:
         del self
 
+    def reset(self, lifeSpan: float, size:list[int], location:list[float], color:list[int]=[0, 255, 0], wireSize: int=0, image: pg.Surface=None) -> None:
+        """ re-initialize a pooled particle in place """
+        self.size = size
+        self.color = color
+        self.lifeSpan = lifeSpan
+        self.rotation = 0.0
+        self.rotSpeed = 0.0
+        self.velocity.update(0, 0)
+        self.location.update(location[0], location[1])
+        self.setImage(image, color=color, wireSize=wireSize)
+
     def update(self, deltaTime: float) -> None:
         super().update(deltaTime)
         
@@ -203,34 +487,203 @@ class Particle(Sprite):
 
 # ------------------------------------------------------------ #
 class ParticleSystem:
+    """ fixed-capacity particle pool: dense live list, swap-remove expiry, reused dead particles """
     def __init__(self, assetManager: AssetManager, renderer: Renderer, location: list[int], maximum: int) -> None:
+        self.pool = []
         self.particles = []
+        self.peakCount = 0
         self.maximum = maximum
         self.location = location
         self.renderer = renderer
         self.assetManager = assetManager
+        self.renderer.addSystem(self)
+
+    @property
+    def liveCount(self) -> int:
+        return len(self.particles)
+
+    @property
+    def freeCount(self) -> int:
+        return self.maximum - len(self.particles)
+
+    def getStats(self) -> dict[str, int]:
+        return {"live": self.liveCount, "free": self.freeCount, "peak": self.peakCount, "pooled": len(self.pool)}
 
     def addParticle(self, lifeSpan: float, size: list[int], location, velocity:list[float]=Vector2(0, 0), color: list[int]=[255, 255, 255], wireSize: int=0, asset: str=None) -> None:
         if len(self.particles)+1 > self.maximum: return None
-        particle = Particle(lifeSpan, size, [
+        location = [
             location[0] + self.location[0],
             location[1] + self.location[1]
-        ], color, wireSize)
-        particle.velocity = Vector2(velocity)
-        if asset:
-            try:
-                image = self.assetManager.getImage(asset)
-                particle.setImage(image)
-            except KeyError as e: pass
+        ]
+        image = surfaceCache.get(size, color, wireSize, asset, self.assetManager)
+        if self.pool:
+            particle = self.pool.pop()
+            particle.reset(lifeSpan, size, location, color, wireSize, image)
+        else:
+            particle = Particle(lifeSpan, size, location, color, wireSize, image)
+        particle.velocity.update(velocity[0], velocity[1])
         self.particles.append(particle)
-        self.renderer.addSprite(particle)
+        if len(self.particles) > self.peakCount:
+            self.peakCount = len(self.particles)
 
     def update(self, deltaTime: float) -> None:
-        for particle in self.particles:
+        index = 0
+        particles = self.particles
+        while index < len(particles):
+            particle = particles[index]
             if particle.update(deltaTime):
-                self.particles.remove(particle)
-                self.renderer.remSprite(particle)
-                particle.kill()
+                # swap-remove: move the last particle into this slot and re-check the slot
+                last = particles.pop()
+                if last is not particle:
+                    particles[index] = last
+                self.pool.append(particle)
+            else:
+                index += 1
+
+    def drawList(self) -> list[tuple[pg.Surface, pg.Rect]]:
+        return [(particle.image, particle.rect) for particle in self.particles]
+
+    def render(self, target: pg.Surface) -> None:
+        for particle in self.particles:
+            target.blit(particle.image, particle.rect)
+# ------------------------------------------------------------ #
+class ParticleArray:
+    """ struct-of-arrays drop-in for `ParticleSystem`: NumPy state, vectorized update, one blits call """
+    def __init__(self, assetManager: AssetManager, renderer: Renderer, location: list[int], maximum: int) -> None:
+        self.count: int = 0
+        self.peakCount: int = 0
+        self.maximum = maximum
+        self.location = location
+        self.renderer = renderer
+        self.assetManager = assetManager
+
+        self.locations = np.zeros((maximum, 2), dtype=np.float32)
+        self.velocities = np.zeros((maximum, 2), dtype=np.float32)
+        self.lifeSpans = np.zeros(maximum, dtype=np.float32)
+        self.assets = np.zeros(maximum, dtype=np.int32)     # index into `images`: size, color and wire size are baked in
+
+        self.images: list[pg.Surface] = []
+        self.imageIndex: dict[tuple, int] = {}
+        self.renderer.addSystem(self)
+
+    @property
+    def liveCount(self) -> int:
+        return self.count
+
+    @property
+    def freeCount(self) -> int:
+        return self.maximum - self.count
+
+    def getStats(self) -> dict[str, int]:
+        return {"live": self.liveCount, "free": self.freeCount, "peak": self.peakCount}
+
+    def getImage(self, size: list[int], color: list[int], wireSize: int, asset: str) -> int:
+        key = (int(size[0]), int(size[1]), *color[:3], wireSize, asset)
+        index = self.imageIndex.get(key)
+        if index is None:
+            index = len(self.images)
+            self.images.append(surfaceCache.get(size, color, wireSize, asset, self.assetManager))
+            self.imageIndex[key] = index
+        return index
+
+    def addParticle(self, lifeSpan: float, size: list[int], location, velocity:list[float]=Vector2(0, 0), color: list[int]=[255, 255, 255], wireSize: int=0, asset: str=None) -> None:
+        if self.count+1 > self.maximum: return None
+        index = self.count
+        self.locations[index] = (location[0] + self.location[0], location[1] + self.location[1])
+        self.velocities[index] = (velocity[0], velocity[1])
+        self.lifeSpans[index] = lifeSpan
+        self.assets[index] = self.getImage(size, color, wireSize, asset)
+        self.count += 1
+        if self.count > self.peakCount:
+            self.peakCount = self.count
+
+    def update(self, deltaTime: float) -> None:
+        count = self.count
+        if not count: return None
+        self.locations[:count] += self.velocities[:count] * deltaTime
+        self.lifeSpans[:count] -= deltaTime
+
+        alive = self.lifeSpans[:count] > 0
+        living = int(np.count_nonzero(alive))
+        if living != count:     # compact survivors to the front, keeping draw order
+            for array in (self.locations, self.velocities, self.lifeSpans, self.assets):
+                array[:living] = array[:count][alive]
+            self.count = living
+
+    def drawList(self) -> list[tuple[pg.Surface, list[float]]]:
+        if not self.count: return []
+        images = self.images
+        return [
+            (images[asset], location)
+            for asset, location in zip(self.assets[:self.count].tolist(), self.locations[:self.count].tolist())
+        ]
+
+    def render(self, target: pg.Surface) -> None:
+        if not self.count: return None
+        target.blits(self.drawList(), doreturn=False)
+# ------------------------------------------------------------ #
+
+# ------------------------------------------------------------ #
+class TextCache:
+    """
+    Bounded LRU cache of rendered text keyed by (font, text, color, antialias),
+    so unchanged strings are rasterized once instead of every frame.
+    """
+    def __init__(self, maxSize: int=256) -> None:
+        self.hits: int = 0
+        self.misses: int = 0
+        self.maxSize: int = maxSize
+        self.surfaces: OrderedDict = OrderedDict()
+
+    def render(self, font: pg.Font, text: str, color: list[int], antialias: bool=True) -> pg.Surface:
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.maxSize:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self) -> None:
+        self.surfaces.clear()
+
+    def getStats(self) -> dict[str, int]:
+        return {"size": len(self.surfaces), "hits": self.hits, "misses": self.misses}
+
+textCache: TextCache = TextCache()
+# ------------------------------------------------------------ #
+
+# ------------------------------------------------------------ #
+class GlyphAtlas:
+    """
+    Pre-rasterized glyphs for fast-changing numeric text (FPS, timings), which
+    is composed glyph by glyph instead of rasterized whenever it changes.
+    """
+    def __init__(self, font: pg.Font, color: list[int], antialias: bool=True, characters: str="0123456789.-+e:%| ") -> None:
+        self.font: pg.Font = font
+        self.color: list[int] = color
+        self.glyphs: dict[str, pg.Surface] = {
+            character: font.render(character, antialias, color) for character in characters
+        }
+
+    def supports(self, text: str) -> bool:
+        glyphs = self.glyphs
+        return all(character in glyphs for character in text)
+
+    def drawList(self, text: str, location: list[float]) -> list[tuple[pg.Surface, list[float]]]:
+        x, y = location
+        drawList = []
+        for character in text:
+            glyph = self.glyphs[character]
+            drawList.append((glyph, [x, y]))
+            x += glyph.get_width()
+        return drawList
 # ------------------------------------------------------------ #
 
 # ------------------------------------------------------------ #
@@ -242,12 +695,25 @@ class DevDisplay:
         
         self.textSize: int = textSize
         self.textFields: dict[str, str] = {}
+        self.glyphFields: set[str] = set()   # fields composed from `atlas` instead of rasterized
         self.textColor: list[int] = textColor
         self.font: pg.Font = pg.Font(fontPath, textSize)
+        self.atlas: GlyphAtlas = GlyphAtlas(self.font, textColor)
+
+        self.graph: list[float] = []     # samples drawn as a line graph under the text fields
+        self.graphScale: float = 1.0     # sample value at the top of the graph
+        self.graphLimit: float = None    # optional reference line (e.g. the frame budget)
+        self.graphHeight: int = 40
+
+    def setGraph(self, samples: list[float], scale: float, limit: float=None) -> None:
+        self.graph = samples
+        self.graphScale = scale
+        self.graphLimit = limit
 
-    def setTextField(self, field: str, text: str) -> bool:
+    def setTextField(self, field: str, text: str, glyphs: bool=False) -> bool:
         try:
             self.textFields[field] = text
+            if glyphs: self.glyphFields.add(field)
             return True
         except KeyError as e:
             print(f"DevDisplay TextField Not Found: {field}")
@@ -256,21 +722,46 @@ class DevDisplay:
     def remTextField(self, field: str) -> bool:
         try:
             self.textFields.pop(field)
+            self.glyphFields.discard(field)
             return True
         except KeyError as e:
             print(f"DevDisplay TextField Not Found: {field}")
             return False
 
-    def render(self, window: pg.Surface) -> None:
-        window.blit(self.font.render(f"Dev-Display", True, self.textColor), self.location)
+    def render(self, window: Window) -> None:
+        window.blit(textCache.render(self.font, "Dev-Display", self.textColor), self.location)
+        lineHeight = self.font.get_height()
         for index, field in enumerate(self.textFields.keys()):
-            text = f"{field}: {self.textFields[field]}"
-            textSurface = self.font.render(text, True, self.textColor)
+            value = self.textFields[field]
             textLocation = [
                 self.location[0],
-                self.location[1] + (textSurface.get_size()[1] * (index + 1))
+                self.location[1] + (lineHeight * (index + 1))
             ]
-            window.blit(textSurface, textLocation)
+            if field in self.glyphFields and self.atlas.supports(value):
+                label = textCache.render(self.font, f"{field}: ", self.textColor)
+                window.blit(label, textLocation)
+                for glyph, glyphLocation in self.atlas.drawList(value, [textLocation[0] + label.get_width(), textLocation[1]]):
+                    window.blit(glyph, glyphLocation)
+            else:
+                window.blit(textCache.render(self.font, f"{field}: {value}", self.textColor), textLocation)
+
+        if len(self.graph) > 1:
+            self.renderGraph(window, [self.location[0], self.location[1] + lineHeight * (len(self.textFields) + 1)])
+
+    def renderGraph(self, window: Window, location: list[float]) -> None:
+        width, height = self.size[0], self.graphHeight
+        bottom = location[1] + height
+        step = width / (len(self.graph) - 1)
+        points = [
+            (location[0] + index * step, bottom - min(sample / self.graphScale, 1.0) * height)
+            for index, sample in enumerate(self.graph)
+        ]
+        if self.graphLimit is not None:
+            limit = bottom - min(self.graphLimit / self.graphScale, 1.0) * height
+            drawLine(window.display, [90, 90, 90], [location[0], limit], [location[0] + width, limit])
+        pg.draw.lines(window.display, self.textColor, False, points)
+        if window.dirty:
+            window.markDirty(pg.Rect(location, [width + 1, height + 1]))
 # ------------------------------------------------------------ #
 
 # ------------------------------------------------------------ #
@@ -288,6 +779,10 @@ def createSurface(size:list[int], color:list[int]) -> pg.Surface:
 def createRect(location:list, size:list) -> pg.Rect :
     return pg.Rect(location, size)
 
+def blitRect(surface:pg.Surface, location:list|pg.Rect) -> pg.Rect :
+    """ the area a blit of `surface` covers; `location` is a point or a Rect (its topleft is used) """
+    return pg.Rect(location[0], location[1], *surface.get_size())
+
 def flipSurface(surface:pg.Surface, x:bool, y:bool) -> pg.Surface:
     return pg.transform.flip(surface, x, y)
 
@@ -299,33 +794,42 @@ import pygame
 def createSurfaceFADE(size, color, dx, dy):
     """
     Creates a surface with a color fading out to transparency in a given direction.
+    The alpha ramp is written as one array into the surface's alpha channel.
     
     Args:
         size (tuple): Width and height of the surface.
         color (tuple): RGB color to fade out.
-        direction (str): Direction of fade ('left', 'right', 'up', 'down').
+        dx (int): Horizontal fade direction (-1 fades out to the right, 1 fades in to the right).
+        dy (int): Vertical fade direction, used when dx is 0 (1 fades out downwards, -1 fades in downwards).
     
     Returns:
         pygame.Surface: Surface with the fade effect.
     """
-    width, height = size
+    width, height = int(size[0]), int(size[1])
     fade_surface = pygame.Surface((width, height), pygame.SRCALPHA)
-    r, g, b = color
+    r, g, b = color[:3]
 
     if dx != 0:
-        for x in range(width):
-            alpha = 255 - int((x / width) * 255) if dx < 0 else int((x / width) * 255)
-            pygame.draw.line(fade_surface, (r, g, b, alpha), (x, 0), (x, height - 1))
+        ramp = (np.arange(width) / width * 255).astype(np.uint8)
+        if dx < 0: ramp = 255 - ramp
+        fade_surface.fill((r, g, b, 0))
+        alpha = pygame.surfarray.pixels_alpha(fade_surface)
+        alpha[:] = ramp[:, None]
+        del alpha   # release the surface lock
     elif dy != 0:
-        for y in range(height):
-            alpha = 255 - int((y / height) * 255) if dy > 0 else int((y / height) * 255)
-            pygame.draw.line(fade_surface, (r, g, b, alpha), (0, y), (width - 1, y))
+        ramp = (np.arange(height) / height * 255).astype(np.uint8)
+        if dy > 0: ramp = 255 - ramp
+        fade_surface.fill((r, g, b, 0))
+        alpha = pygame.surfarray.pixels_alpha(fade_surface)
+        alpha[:] = ramp[None, :]
+        del alpha
     
     return fade_surface
 
 def createSurfaceLERP(size, start_color, end_color):
     """
     Creates a surface with a gradient linearly-interpolating between two colors.
+    The gradient is computed for every column at once and written as one pixel array.
     
     Args:
         size (tuple): Width and height of the surface.
@@ -335,21 +839,27 @@ def createSurfaceLERP(size, start_color, end_color):
     Returns:
         pygame.Surface: Surface with the gradient effect.
     """
-    width, height = size
+    width, height = int(size[0]), int(size[1])
     gradient_surface = pygame.Surface((width, height))
-    sr, sg, sb = start_color
-    er, eg, eb = end_color
-
-    for x in range(width):
-        # Interpolate color
-        t = x / (width - 1) if width > 1 else 0
-        r = int(sr + (er - sr) * t)
-        g = int(sg + (eg - sg) * t)
-        b = int(sb + (eb - sb) * t)
-        pygame.draw.line(gradient_surface, (r, g, b), (x, 0), (x, height - 1))
+    start = np.array(start_color[:3], dtype=np.float64)
+    end = np.array(end_color[:3], dtype=np.float64)
+
+    t = np.arange(width) / (width - 1) if width > 1 else np.zeros(width)
+    columns = (start + (end - start) * t[:, None]).astype(np.int32)
+    pygame.surfarray.blit_array(gradient_surface, np.repeat(columns[:, None, :], height, axis=1))
     
     return gradient_surface
 
+def getSurfaceFADE(size, color, dx, dy) -> pg.Surface:
+    """ shared (read-only) `createSurfaceFADE` surface, memoized by (size, color, direction) in `surfaceCache` """
+    key = ("fade", int(size[0]), int(size[1]), tuple(color), dx, dy)
+    return surfaceCache.fetch(key, lambda: createSurfaceFADE(size, color, dx, dy))
+
+def getSurfaceLERP(size, start_color, end_color) -> pg.Surface:
+    """ shared (read-only) `createSurfaceLERP` surface, memoized by (size, colors) in `surfaceCache` """
+    key = ("lerp", int(size[0]), int(size[1]), tuple(start_color), tuple(end_color))
+    return surfaceCache.fetch(key, lambda: createSurfaceLERP(size, start_color, end_color))
+
 def naturalKey(string_) -> list[int] :
     return [int(s) if s.isdigit() else s for s in re.split(r'(\d+)', string_)]
 
@@ -0,0 +1,114 @@
+""" snapshot interpolation: the opponent's bar and the puck drawn `delay` seconds behind the server's newest snapshot """
+from collections import deque
+import profiler
+
+class SnapshotBuffer:
+    def __init__(self, delay: float=0.1, maxExtrapolation: float=0.25, capacity: int=64, window: int=120) -> None:
+        self.delay: float = delay
+        self.maxExtrapolation: float = maxExtrapolation
+        self.blendTime: float = 0.05
+        self.snapDistance: float = 64.0
+        self.slew: float = 0.05
+        self.renderTime: float = None
+        self.lastNow: float = None
+        self.samples: deque[tuple[float, list[float], list[list[float]]]] = deque(maxlen=capacity)
+        self.offsets: profiler.RingBuffer = profiler.RingBuffer(window)
+        self.offset: float = None
+        self.jitter: float = 0.0
+        self.lastArrival: tuple[float, float] = None
+
+        self.depth: int = 0
+        self.underruns: int = 0
+        self.extrapolated: int = 0
+
+    def clear(self) -> None:
+        self.samples.clear()
+        self.offsets.clear()
+        self.offset = self.lastArrival = None
+        self.renderTime = self.lastNow = None
+        self.jitter = 0.0
+
+    def push(self, serverTime: float, arrival: float, puck: list[float]|None, bars: list[list[float]|None]) -> None:
+        """
+        a snapshot sent at `serverTime` and received at local time `arrival`: the puck and the remote
+        `bars`, each None when the server left it out (unchanged, or still on its straight line)
+        """
+        if self.samples:
+            lastTime, lastPuck, lastBars = self.samples[-1]
+            if serverTime <= lastTime: return None
+            if puck is None:    # dead-reckoned since it was last sent
+                elapsed = serverTime - lastTime
+                puck = [lastPuck[0] + lastPuck[2] * elapsed, lastPuck[1] + lastPuck[3] * elapsed, lastPuck[2], lastPuck[3]]
+            bars = [bar if bar is not None else last for bar, last in zip(bars, lastBars)]
+        elif puck is None or None in bars:
+            return None     # deltas need a keyframe first
+
+        self.samples.append((serverTime, list(puck), [list(bar) for bar in bars]))
+
+        if self.lastArrival is not None:
+            transit = (arrival - self.lastArrival[0]) - (serverTime - self.lastArrival[1])
+            self.jitter += (abs(transit) - self.jitter) / 16
+        self.lastArrival = (arrival, serverTime)
+        self.offsets.push(arrival - serverTime)
+        self.offset = float(self.offsets.values().min())
+
+    def sample(self, now: float) -> tuple[list[float], list[list[float]]]|None:
+        """ (puck, bars) as they were `delay` seconds before the newest data expected at local time `now` """
+        if not self.samples: return None
+        renderTime = self.advance(now)
+        samples = self.samples
+        self.depth = sum(1 for sample in samples if sample[0] > renderTime)
+
+        if renderTime <= samples[0][0]:
+            _, puck, bars = samples[0]
+            return list(puck), [list(bar) for bar in bars]
+
+        newest = samples[-1]
+        if renderTime >= newest[0]:
+            time, puck, bars = newest
+            elapsed = renderTime - time
+            puck = [puck[0] + puck[2] * elapsed, puck[1] + puck[3] * elapsed, puck[2], puck[3]]
+            moving = [bar for bar in bars if bar[2] or bar[3]]
+            if moving:
+                self.underruns += 1
+                elapsed = min(elapsed, self.maxExtrapolation)
+            if elapsed > 0: self.extrapolated += 1
+            bars = [[bar[0] + bar[2] * elapsed, bar[1] + bar[3] * elapsed, bar[2], bar[3]] for bar in bars]
+            return puck, bars
+
+        for index in range(len(samples) - 1, 0, -1):
+            if samples[index - 1][0] <= renderTime: break
+        (timeA, puckA, barsA), (timeB, puckB, barsB) = samples[index - 1], samples[index]
+        blend = lambda a, b: self.blend(a, b, renderTime - timeA, timeB - timeA)
+        return blend(puckA, puckB), [blend(barA, barB) for barA, barB in zip(barsA, barsB)]
+
+    def advance(self, now: float) -> float:
+        """ move the render clock to local time `now` """
+        target = now - self.offset - self.delay
+        if self.renderTime is None or abs(target - self.renderTime) > self.maxExtrapolation:
+            self.renderTime = target
+        else:
+            elapsed = now - self.lastNow
+            self.renderTime += elapsed + max(-self.slew * elapsed, min(self.slew * elapsed, target - self.renderTime - elapsed))
+        self.lastNow = now
+        return self.renderTime
+
+    def blend(self, a: list[float], b: list[float], elapsed: float, interval: float) -> list[float]:
+        """
+        body `a` carried `elapsed` seconds along its own velocity, eased into `b` over the last
+        `blendTime` seconds of the `interval` between them: a long quiet gap (dead reckoning, a bar
+        at rest) isn't smeared into a slow crawl, and a jump of `snapDistance` or more is a reset
+        """
+        x, y = a[0] + a[2] * elapsed, a[1] + a[3] * elapsed
+        errorX, errorY = b[0] - (a[0] + a[2] * interval), b[1] - (a[1] + a[3] * interval)
+        if errorX * errorX + errorY * errorY >= self.snapDistance * self.snapDistance:
+            return [x, y, a[2], a[3]]
+        span = min(interval, self.blendTime)
+        alpha = max(0.0, (elapsed - (interval - span)) / span)
+        return [x + errorX * alpha, y + errorY * alpha, a[2] + (b[2] - a[2]) * alpha, a[3] + (b[3] - a[3]) * alpha]
+
+    def getStats(self) -> dict:
+        return {
+            "depth": self.depth, "jitterMs": self.jitter * 1000.0,
+            "underruns": self.underruns, "extrapolated": self.extrapolated, "buffered": len(self.samples)
+        }
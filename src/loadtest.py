@@ -0,0 +1,433 @@
+"""
+headless load generator for the Pong2 servers: scripted bots, JSON report of throughput, round trips, loss and server CPU
+
+    python src/loadtest.py [--transport rooms|d34dnet] [--bots 200] [--duration 30] [--rate 60] [--mode input|update]
+                           [--codec json|binary/2] [--deltas] [--lifetime 0] [--ramp 200] [--processes 1]
+                           [--spawn [--shards N] | --host 127.0.0.1 --port 8081 [--server-pid PID ...]] [--output FILE]
+"""
+import os, sys, json, time, random, socket, asyncio, argparse, subprocess
+import multiprocessing as mp
+from collections import deque
+import d34dnet as dnet
+
+import protocol, profiler, telemetry
+
+# held directions (dx, dy) over the bot's lifetime, in seconds
+PATTERNS: dict[str, object] = {
+    "sweep": lambda t: (0, -1 if int(t / 1.5) % 2 else 1),                                 # up and down the goal line
+    "zigzag": lambda t: (-1 if int(t / 0.8) % 2 else 1, -1 if int(t / 1.3) % 2 else 1),   # diagonals across the half
+    "taps": lambda t: (0, (1, 0, -1, 0)[int(t * 6) % 4]),                                 # short presses, both ways
+}
+
+BAR_SPEED: float = 550.0
+PING_INTERVAL: float = 1.0     # seconds; backend/server.py holds back sends to clients it hasn't heard from in a while
+BAR_BOUNDS: tuple[tuple[float, float], tuple[float, float]] = ((64.0, 512.0), (0.0, 620.0))  # x, y range for the relay bars
+
+class Totals:
+    """ what one process's bots saw, merged across processes for the report """
+    def __init__(self) -> None:
+        self.joins: int = 0
+        self.disconnects: int = 0
+        self.errors: int = 0
+        self.messagesOut: int = 0
+        self.messagesIn: int = 0
+        self.bytesOut: int = 0
+        self.bytesIn: int = 0
+        self.sent: int = 0          # inputs or updates
+        self.answered: int = 0      # acknowledged inputs or echoed updates
+        self.discarded: int = 0     # inputs the server's queue dropped (acks ran ahead of ticks)
+        self.snapshots: int = 0
+        self.missed: int = 0        # snapshot ticks skipped over
+        self.rtts: list[float] = []
+
+    def merge(self, other: "Totals") -> None:
+        for name, value in vars(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+class Bot:
+    """ one scripted player: what it sends and how the answers are scored, whatever carries them """
+    def __init__(self, index: int, options: argparse.Namespace, totals: Totals) -> None:
+        self.options: argparse.Namespace = options
+        self.totals: Totals = totals
+        self.pattern = list(PATTERNS.values())[index % len(PATTERNS)]
+        self.codec = protocol.DictCodec()
+        self.decoder: protocol.BinaryCodec = protocol.BinaryCodec()
+        self.pong2id: str = None
+        self.seat: int = 0
+        self.sequence: int = 0
+        self.pending: dict = {}     # input sequence or quantized position -> send time, oldest first
+        self.lastTick: int = None
+        self.lastAck: tuple[int, int] = None     # (ack, tick)
+        self.location: list[float] = [BAR_BOUNDS[0][0], BAR_BOUNDS[1][0] + random.random() * (BAR_BOUNDS[1][1] - BAR_BOUNDS[1][0])]
+        self.started: float = None  # when play began ("join")
+        self.last: float = None     # the previous `step`
+        self.lastPing: float = None
+
+    def output(self, method: str, params: dict) -> int:
+        """ put one message on the wire; its size in bytes """
+        raise NotImplementedError
+
+    def send(self, method: str, params: dict) -> None:
+        name, body = protocol.wrap(self.codec, method, params)
+        self.totals.bytesOut += self.output(name, body)
+        self.totals.messagesOut += 1
+
+    def receive(self, response: dict, size: int, now: float) -> str:
+        """ count, decode and score one message from the server; its method """
+        self.totals.messagesIn += 1
+        self.totals.bytesIn += size
+        method, params = protocol.unwrap(response.get("method"), response.get("params"), self.decoder)
+        if method == "join":
+            self.join(params, now)
+        elif method in ("state", "delta"):
+            tick = params.get("tick", 0)
+            if self.lastTick is not None and tick > self.lastTick + self.options.sendInterval:
+                self.totals.missed += (tick - self.lastTick) // self.options.sendInterval - 1
+            self.lastTick = tick
+            self.totals.snapshots += 1
+            acks = params.get("acks")
+            if acks is not None: self.acknowledge(acks[self.seat], tick, now)
+        elif method == "update":
+            own = params.get(f"p{self.seat + 1}")
+            if own is not None and own.get("location") is not None:
+                self.echo(self.key(own["location"]), now)
+        return method
+
+    def join(self, params: dict, now: float) -> None:
+        self.pong2id, self.seat = params["pong2id"], params.get("player", 1) - 1
+        codec = protocol.negotiate(params.get("codecs", []), self.options.codec)
+        self.send("hello", {"pong2id": self.pong2id, "codec": codec, "deltas": self.options.deltas})
+        self.codec = protocol.CODECS[codec]()
+        self.send("start", {"pong2id": self.pong2id})
+        self.started = self.last = self.lastPing = now
+        self.totals.joins += 1
+
+    def step(self, now: float) -> None:
+        """ one send at `rate`: an input, or the bar's update if it moved; a ping every PING_INTERVAL """
+        dx, dy = self.pattern(now - self.started)
+        if self.options.mode == "input":
+            self.sequence += 1
+            self.pending[self.sequence] = now
+            self.send("input", {"pong2id": self.pong2id, "dx": dx, "dy": dy, "sequence": self.sequence})
+            self.totals.sent += 1
+        elif self.move(dx, dy, now - self.last):
+            key = self.key(self.location)
+            self.pending.pop(key, None)     # back where it was: time the newest send
+            self.pending[key] = now
+            self.send("update", {
+                "pong2id": self.pong2id, "location": list(self.location), "velocity": [dx * BAR_SPEED, dy * BAR_SPEED],
+                "pucklocation": [0.0, 0.0], "puckvelocity": [0.0, 0.0]
+            })
+            self.totals.sent += 1
+        self.last = now
+        if now - self.lastPing >= PING_INTERVAL:
+            self.lastPing = now
+            self.send("ping", {"pong2id": self.pong2id, "t": now})
+
+    def move(self, dx: int, dy: int, elapsed: float) -> bool:
+        """ relay mode: the bar's own simulation; whether it moved (unchanged updates aren't sent) """
+        before = self.key(self.location)
+        for axis, direction in enumerate((dx, dy)):
+            low, high = BAR_BOUNDS[axis]
+            self.location[axis] = min(high, max(low, self.location[axis] + direction * BAR_SPEED * elapsed))
+        return self.key(self.location) != before
+
+    def key(self, location: list[float]) -> tuple[int, int]:
+        return tuple(protocol.quantize(location, protocol.BODY_SCALES[:2]))  # survives the binary codec
+
+    def acknowledge(self, ack: int, tick: int, now: float) -> None:
+        """ every input up to `ack` has been applied (or dropped); the round trip is timed on `ack` itself """
+        if self.lastAck is not None:    # one input is applied per tick: a bigger step means the queue overflowed
+            lastAck, lastTick = self.lastAck
+            self.totals.discarded += max(0, (ack - lastAck) - (tick - lastTick))
+        self.lastAck = (ack, tick)
+        sent = self.pending.get(ack)
+        if sent is None: return None
+        self.totals.rtts.append((now - sent) * 1000.0)
+        for sequence in [sequence for sequence in self.pending if sequence <= ack]:
+            del self.pending[sequence]
+            self.totals.answered += 1
+
+    def echo(self, key: tuple[int, int], now: float) -> None:
+        """ relay: the server sent our position back; anything sent before it was coalesced away """
+        if key not in self.pending: return None
+        while True:
+            pending, sent = next(iter(self.pending.items()))
+            del self.pending[pending]
+            if pending == key: break
+        self.totals.rtts.append((now - sent) * 1000.0)
+        self.totals.answered += 1
+
+class LineBot(Bot):
+    """ a bot on backend/roomserver.py's JSON lines, one coroutine per bot """
+    def __init__(self, index: int, options: argparse.Namespace, totals: Totals) -> None:
+        super().__init__(index, options, totals)
+        self.writer: asyncio.StreamWriter = None
+
+    def output(self, method: str, params: dict) -> int:
+        line = json.dumps({"method": method, "params": params}, separators=(",", ":")).encode() + b"\n"
+        self.writer.write(line)
+        return len(line)
+
+    async def read(self, reader: asyncio.StreamReader) -> str|None:
+        line = await reader.readline()
+        if not line: return None
+        return self.receive(json.loads(line), len(line), time.perf_counter())
+
+    async def run(self, lifetime: float) -> None:
+        try:
+            reader, self.writer = await asyncio.open_connection(self.options.host, self.options.port)
+        except OSError:
+            self.totals.errors += 1
+            return None
+        try:
+            if await self.read(reader) != "join": raise ConnectionError("no join")
+            listener = asyncio.create_task(self.listen(reader))
+            await self.play(lifetime)
+            await asyncio.sleep(self.options.grace)     # answers still in flight aren't losses
+            listener.cancel()
+            self.send("disconnect", {"pong2id": self.pong2id})
+            await self.writer.drain()
+            self.totals.disconnects += 1
+        except (ConnectionError, ValueError, KeyError):
+            self.totals.errors += 1
+        finally:
+            self.writer.close()
+
+    async def play(self, lifetime: float) -> None:
+        interval = 1.0 / self.options.rate
+        deadline = self.started
+        while (now := time.perf_counter()) - self.started < lifetime:
+            self.step(now)
+            await self.writer.drain()
+            deadline += interval
+            await asyncio.sleep(max(0.0, deadline - time.perf_counter()))
+
+    async def listen(self, reader: asyncio.StreamReader) -> None:
+        while await self.read(reader) is not None:
+            pass
+
+class DnetBot(dnet.inet.BaseClient, Bot):
+    """ a bot on d34dnet, for backend/server.py: responses wait in `inbox` until the process's bot loop polls """
+    def __init__(self, index: int, options: argparse.Namespace, totals: Totals) -> None:
+        super().__init__()
+        Bot.__init__(self, index, options, totals)
+        self.address = (options.host, options.port)
+        self.inbox: deque[tuple[float, dict]] = deque()    # (arrival, response), appended on d34dnet's thread
+        self.sizes: telemetry.SizeSampler = telemetry.SizeSampler()     # d34dnet frames the messages: JSON estimates
+        self.closed: bool = False
+        self.leaves: float = None   # when play stops; answers are awaited for `grace` more
+
+    def on_read(self, response: dict) -> None:
+        self.inbox.append((time.perf_counter(), response))
+
+    def on_disconnect(self) -> None:
+        self.closed = True
+
+    def output(self, method: str, params: dict) -> int:
+        request = self.build_request(method, params)
+        self.write(request)
+        return self.sizes.size(request)
+
+    def poll(self, now: float) -> None:
+        """ score what arrived, then take this tick's step """
+        while self.inbox:
+            arrival, response = self.inbox.popleft()
+            self.receive(response, self.sizes.size(response), arrival)
+        if self.pong2id is not None and now < self.leaves: self.step(now)
+
+    def close(self) -> None:
+        """ leave; a bot that never got its "join" counts as an error """
+        clean = self.pong2id is not None and not self.closed    # read before our own disconnect sets `closed`
+        try:
+            if clean: self.send("disconnect", {"pong2id": self.pong2id})
+            self.disconnect()
+        except OSError:
+            clean = False
+        if clean: self.totals.disconnects += 1
+        else: self.totals.errors += 1
+
+async def swarm(options: argparse.Namespace, bots: range) -> Totals:
+    """ keep `bots` connected for `duration` seconds, replacing each one as its lifetime ends """
+    totals = Totals()
+    rng = random.Random(options.seed + bots.start)
+    end = time.perf_counter() + options.duration
+
+    async def slot(index: int) -> None:
+        await asyncio.sleep((index - bots.start) / options.ramp)
+        while (remaining := end - time.perf_counter()) > options.grace:
+            lifetime = options.lifetime * rng.uniform(0.5, 1.5) if options.lifetime else remaining
+            await LineBot(index, options, totals).run(min(lifetime, remaining - options.grace))
+
+    await asyncio.gather(*(slot(index) for index in bots))
+    return totals
+
+def dnetSwarm(options: argparse.Namespace, bots: range) -> Totals:
+    """ `swarm` for d34dnet bots: this thread connects, writes and polls every one of them at `rate` """
+    totals = Totals()
+    rng = random.Random(options.seed + bots.start)
+    started = deadline = time.perf_counter()
+    end = started + options.duration
+    slots: dict[int, DnetBot] = {index: None for index in bots}
+    while (now := time.perf_counter()) < end:
+        for index, bot in slots.items():
+            if bot is None:
+                remaining = end - now
+                if now - started < (index - bots.start) / options.ramp or remaining <= options.grace: continue
+                lifetime = options.lifetime * rng.uniform(0.5, 1.5) if options.lifetime else remaining
+                bot = slots[index] = DnetBot(index, options, totals)
+                bot.leaves = now + min(lifetime, remaining - options.grace)
+                try:
+                    bot.connect()
+                except OSError:
+                    bot.closed = True
+            else:
+                try:
+                    bot.poll(now)
+                except OSError:
+                    bot.closed = True
+            if bot.closed or now >= bot.leaves + options.grace:
+                bot.close()
+                slots[index] = None
+        deadline += 1.0 / options.rate
+        time.sleep(max(0.0, deadline - time.perf_counter()))
+    for bot in slots.values():
+        if bot is not None: bot.close()
+    return totals
+
+def work(options: argparse.Namespace, bots: range) -> Totals:
+    if options.transport == "d34dnet": return dnetSwarm(options, bots)
+    return asyncio.run(swarm(options, bots))
+
+def cpuSeconds(pid: int) -> float|None:
+    """ user + system CPU of `pid` from /proc (None where there is no /proc) """
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+def spawn(options: argparse.Namespace) -> subprocess.Popen:
+    """ start a server on a free port and wait until it accepts connections """
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        options.port = probe.getsockname()[1]
+    backend = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+    if options.transport == "d34dnet":
+        command = [sys.executable, os.path.join(backend, "server.py"), "--stats", "0"]
+    elif options.shards:
+        command = [sys.executable, os.path.join(backend, "shards.py"), "--workers", str(options.shards)]
+    else:
+        command = [sys.executable, os.path.join(backend, "roomserver.py")]
+    command += ["--send-interval", str(options.sendInterval)]
+    if options.mode == "update": command.append("--relay")
+    server = subprocess.Popen([*command, "--host", options.host, "--port", str(options.port)])
+    for _ in range(100):
+        try:
+            socket.create_connection((options.host, options.port), timeout=0.1).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("the spawned server never accepted a connection")
+
+def serverPids(server: subprocess.Popen, options: argparse.Namespace) -> list[int]:
+    if server is None: return options.server_pid or []
+    if not options.shards: return [server.pid]
+    try:    # the dispatcher and its workers
+        with open(f"/proc/{server.pid}/task/{server.pid}/children") as children:
+            return [server.pid, *map(int, children.read().split())]
+    except OSError:
+        return [server.pid]
+
+def run(options: argparse.Namespace) -> dict:
+    server = spawn(options) if options.spawn else None
+    try:
+        if server is not None and options.shards: time.sleep(1.0)  # workers report in before placement is balanced
+        pids = serverPids(server, options)
+        cpuBefore = [cpuSeconds(pid) for pid in pids]
+        clientBefore = time.process_time()
+        started = time.perf_counter()
+
+        processes = max(1, options.processes)
+        shares = [range(options.bots * index // processes, options.bots * (index + 1) // processes) for index in range(processes)]
+        if processes == 1:
+            results = [work(options, shares[0])]
+        else:
+            with mp.get_context("spawn").Pool(processes) as pool:
+                results = pool.starmap(work, [(options, share) for share in shares])
+
+        elapsed = time.perf_counter() - started
+        cpuAfter = [cpuSeconds(pid) for pid in pids]
+        clientCpu = time.process_time() - clientBefore
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    totals = Totals()
+    for result in results:
+        totals.merge(result)
+    serverCpu = None
+    if pids and None not in cpuBefore + cpuAfter:
+        seconds = sum(cpuAfter) - sum(cpuBefore)
+        serverCpu = {"seconds": seconds, "percent": seconds / elapsed * 100.0, "pids": pids}
+    lost = totals.sent - totals.answered + totals.discarded
+    expected = totals.snapshots + totals.missed
+    return {
+        "target": f"{options.host}:{options.port}",
+        "transport": options.transport,
+        "mode": options.mode,
+        "codec": options.codec,
+        "deltas": options.deltas,
+        "bots": options.bots,
+        "rate": options.rate,
+        "durationS": elapsed,
+        "joins": totals.joins,
+        "disconnects": totals.disconnects,
+        "errors": totals.errors,
+        "throughput": {
+            "messagesOutPerS": totals.messagesOut / elapsed, "messagesInPerS": totals.messagesIn / elapsed,
+            "bytesOutPerS": totals.bytesOut / elapsed, "bytesInPerS": totals.bytesIn / elapsed,
+        },
+        "rttMs": profiler.summarize(totals.rtts),
+        "loss": {
+            "sent": totals.sent, "answered": totals.answered - totals.discarded, "discarded": totals.discarded,
+            "upstream": lost / totals.sent if totals.sent else 0.0,
+            "snapshots": totals.snapshots, "missedSnapshots": totals.missed, "downstream": totals.missed / expected if expected else 0.0,
+        },
+        "serverCpu": serverCpu,
+        "clientCpuPercent": clientCpu / elapsed * 100.0 if processes == 1 else None,  # pool workers aren't counted
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pong2 server load generator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="default: 8081 (rooms) | 8080 (d34dnet)")
+    parser.add_argument("--transport", choices=("rooms", "d34dnet"), default="rooms", help="roomserver.py/shards.py JSON lines, or server.py over d34dnet")
+    parser.add_argument("--bots", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--rate", type=float, default=60.0, help="sends per second per bot (input mode: one input per server tick)")
+    parser.add_argument("--mode", choices=("input", "update"), default="input", help="authoritative inputs or relay updates")
+    parser.add_argument("--codec", default=protocol.BinaryCodec.name, choices=list(protocol.CODECS))
+    parser.add_argument("--deltas", action="store_true", help="ask for delta replication")
+    parser.add_argument("--lifetime", type=float, default=0.0, help="seconds before a bot leaves and a new one joins (0: the whole run)")
+    parser.add_argument("--ramp", type=float, default=200.0, help="bots connected per second at the start")
+    parser.add_argument("--grace", type=float, default=0.5, help="seconds each bot waits for answers before disconnecting")
+    parser.add_argument("--send-interval", dest="sendInterval", type=int, default=1, help="the server's ticks between snapshots")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spawn", action="store_true", help="start a server for the run")
+    parser.add_argument("--shards", type=int, default=0, help="with --spawn: a sharded server with this many workers")
+    parser.add_argument("--server-pid", type=int, nargs="+", help="server processes to measure CPU for")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+    if args.transport == "d34dnet" and args.shards: parser.error("--shards serves the rooms transport only")
+    if args.port is None: args.port = 8080 if args.transport == "d34dnet" else 8081
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    print(json.dumps(report, indent=2))
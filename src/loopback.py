@@ -0,0 +1,200 @@
+"""
+in-process client/server loopback on simulated time, with artificial latency, jitter and loss
+
+    python src/loopback.py [--latency 0.1] [--jitter 0.02] [--loss 0.0] [--frames N] [--send-interval 1]
+                           [--no-prediction] [--no-interpolation]
+"""
+import os, sys, json, math, copy, random, argparse, contextlib
+from collections import deque
+
+import bench    # headless SDL setup, ScriptedEvents
+import main, inputs, profiler
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+import server as backend
+
+class DelayLine:
+    """ one direction of the link: FIFO delivery `latency` (+ up to `jitter`) seconds after sending """
+    def __init__(self, latency: float, jitter: float=0.0, loss: float=0.0, rng: random.Random=None) -> None:
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.loss: float = loss
+        self.rng: random.Random = rng or random.Random()
+        self.queue: deque[tuple[float, dict]] = deque()
+        self.lastDelivery: float = 0.0
+        self.sent: int = 0
+        self.dropped: int = 0
+
+    def send(self, message: dict, now: float) -> None:
+        self.sent += 1
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped += 1
+            return None
+        delivery = max(self.lastDelivery, now + self.latency + self.rng.random() * self.jitter)   # stream: never reorder
+        self.lastDelivery = delivery
+        self.queue.append((delivery, copy.deepcopy(message)))
+
+    def receive(self, now: float) -> list[dict]:
+        messages = []
+        while self.queue and self.queue[0][0] <= now:
+            messages.append(self.queue.popleft()[1])
+        return messages
+
+class Endpoint:
+    def __init__(self, addr: tuple) -> None:
+        self.addr: tuple = addr
+
+    def getpeername(self) -> tuple:
+        return self.addr
+
+class LoopbackServer(backend.Pong2Server):
+    def __init__(self, link: DelayLine, addr: tuple) -> None:
+        super().__init__()
+        self.link: DelayLine = link
+        self.now: float = 0.0
+        self.connections = {addr: None}
+
+    def queue_response(self, addr, response) -> None:
+        self.link.send(response, self.now)
+
+    def timestamp(self) -> float:
+        return self.now
+
+class LoopbackPong2(main.Pong2):
+    def __init__(self, link: DelayLine) -> None:
+        super().__init__()
+        self.link: DelayLine = link
+        self.now: float = 0.0
+        self.remote: list[float] = None     # the puck as placeRemote drew it, before rounding to pixels
+
+    def connect(self) -> None: ...
+    def disconnect(self) -> None: ...
+    def write(self, request) -> None:
+        self.link.send(request, self.now)
+    def timestamp(self) -> float:
+        return self.now     # pings are timed on simulated time
+    def placeRemote(self, sample) -> None:
+        self.remote = None if sample is None else sample[0][:2]
+        super().placeRemote(sample)
+
+# (keys held, frames)
+SCRIPT: list[tuple[tuple[int], int]] = [
+    ((), 30),
+    ((inputs.Keyboard.W,), 40), ((), 20),
+    ((inputs.Keyboard.S,), 70), ((), 30),
+    ((inputs.Keyboard.S, inputs.Keyboard.A), 25), ((inputs.Keyboard.W,), 15), ((), 10),
+    ((inputs.Keyboard.D,), 20), ((inputs.Keyboard.W, inputs.Keyboard.D), 35), ((), 45),
+]
+
+def run(latency: float, jitter: float, loss: float, frames: int, prediction: bool, seed: int=0, interpolation: bool=True, sendInterval: int=1) -> dict:
+    rng = random.Random(seed)
+    main.Pong2.settings.prediction = prediction
+    main.Pong2.settings.interpolation = interpolation
+    main.Pong2.settings.networkThread = False   # flush each frame's requests inline, on simulated time
+    backend.Pong2Server.settings.sendInterval = sendInterval
+    up, down = DelayLine(latency / 2, jitter / 2, loss, rng), DelayLine(latency / 2, jitter / 2, loss, rng)
+    endpoint = Endpoint(("loopback", 1))
+    server = LoopbackServer(down, endpoint.addr)
+    client = LoopbackPong2(up)
+    client.events = bench.ScriptedEvents()
+    client.network.connect()
+
+    deltaTime = 1.0 / client.settings.fps
+    serverStep = 1.0 / server.settings.tickRate
+    serverTime, now = 0.0, 0.0
+    server.on_connect(endpoint)
+    server.seat()
+    room = server.lobby.seating[endpoint.addr]
+    room.match.rng = random.Random(seed)     # same serves for every configuration
+    server.on_read(endpoint, {"method": "start", "params": {}})
+
+    script = [keys for keys, length in SCRIPT for _ in range(length)]
+    pressedAt, origin, lastKeys, responses = None, None, (), []
+    divergence, backtracks = [], []
+    puckSteps, hitches = deque(maxlen=3), 0
+    for frame in range(frames):
+        now += deltaTime
+        while serverTime + serverStep <= now:
+            serverTime += serverStep
+            server.now = serverTime
+            server.step(serverStep)
+        before = tuple(client.player.location)
+        for message in down.receive(now):
+            client.on_read(message)
+
+        keys = script[frame % len(script)]
+        client.events.pressed = set(keys)
+        client.now = now
+        client.game_state.deltaTime = deltaTime
+        client.events.update()
+        client.update()
+
+        held = client.readInput()
+        backtrack = -((client.player.location[0] - before[0]) * held[0] + (client.player.location[1] - before[1]) * held[1])
+        if backtrack > 0.5:     # pulled back against the key being held
+            backtracks.append(backtrack)
+        if keys and keys != lastKeys:   # a new press: time until the bar has visibly moved that way
+            pressedAt, origin = frame, before
+            direction = held
+        if pressedAt is not None:
+            travelled = (client.player.location[0] - origin[0]) * direction[0] + (client.player.location[1] - origin[1]) * direction[1]
+            if travelled >= 4.0:
+                responses.append((frame - pressedAt + 1) * deltaTime * 1000.0)
+                pressedAt = None
+            elif frame - pressedAt > 60: pressedAt = None     # blocked by a bound
+        lastKeys = keys
+
+        puck, alpha = client.board.puck, client.game_state.accumulator * client.settings.tickRate
+        if interpolation and client.remote is not None: puckSteps.append(client.remote)    # where it's drawn
+        else: puckSteps.append(puck.lastLocation + (puck.location - puck.lastLocation) * alpha)
+        if len(puckSteps) == 3:
+            (x0, y0), (x1, y1), (x2, y2) = puckSteps
+            before, after = (x1 - x0, y1 - y0), (x2 - x1, y2 - y1)
+            bounced = before[0] * after[0] < 0 or before[1] * after[1] < 0
+            if math.hypot(*before) and math.hypot(*after) and not bounced and abs(math.hypot(*after) - math.hypot(*before)) >= 3.0:
+                hitches += 1
+
+        for message in up.receive(now):
+            server.on_read(endpoint, message)
+
+        index = client.board.players.index(client.player)
+        serverBar = room.match.bars[index]
+        divergence.append(((serverBar.x - client.player.location[0])**2 + (serverBar.y - client.player.location[1])**2)**0.5)
+
+    stats = client.predictor.getStats() if client.predictor else {}
+    return {
+        "latencyMs": latency * 1000.0,
+        "jitterMs": jitter * 1000.0,
+        "loss": loss,
+        "frames": frames,
+        "prediction": prediction,
+        "sendInterval": sendInterval,
+        "responseMs": profiler.summarize(responses),
+        "backtracks": len(backtracks),
+        "backtrackPx": profiler.summarize(backtracks),
+        "divergencePx": profiler.summarize(divergence),
+        "finalDivergencePx": divergence[-1] if divergence else 0.0,
+        "predictor": stats,
+        "interpolation": client.snapshots.getStats() if interpolation else {},
+        "puckHitches": hitches,
+        "messages": {"up": up.sent, "down": down.sent, "dropped": up.dropped + down.dropped},
+        "pingRttMs": client.network.stats.getStats()["rttMs"],
+        "scores": {"server": [bar.score for bar in room.match.bars], "client": [bar.score for bar in client.board.match.bars]},
+        "serverTick": room.tick,
+        "clientTick": client.game_state.serverTick,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pong2 client/server loopback with artificial latency")
+    parser.add_argument("--latency", type=float, default=0.1, help="round-trip seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra round-trip seconds, uniformly random")
+    parser.add_argument("--loss", type=float, default=0.0, help="chance of dropping each message")
+    parser.add_argument("--frames", type=int, default=sum(length for _, length in SCRIPT) * 3, help="default: the input script 3 times, ending idle")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--send-interval", type=int, default=1, help="server ticks between snapshots")
+    parser.add_argument("--no-prediction", action="store_true")
+    parser.add_argument("--no-interpolation", action="store_true")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(args.latency, args.jitter, args.loss, args.frames, not args.no_prediction, args.seed, not args.no_interpolation, args.send_interval)
+    print(json.dumps(report, indent=2))
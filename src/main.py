@@ -1,9 +1,9 @@
-import random
+import time, random, logging
 from pygame.math import Vector2
 import pygame as pg, d34dnet as dnet
 import gfx, sfx, vfx, events, inputs
 
-import pBar, pPuck, physics, pBoard
+import pBar, pPuck, physics, pBoard, profiler, protocol, replication, prediction, interpolation, network, telemetry
 
 class Pong2(dnet.inet.BaseClient):
     class game_state:
@@ -12,11 +12,47 @@ class Pong2(dnet.inet.BaseClient):
         opponent_id: str = None
         running: bool = True
         deltaTime: float = 0.0
+        accumulator: float = 0.0
+        clock: float = 0.0
+        serverRate: float = 60.0
+        lastInput: tuple[int, int] = None
+        serverTick: int = 0
+        lastSequence: int = 0
+        lastAck: int = 0
+        resyncing: bool = False
+        lastPing: float = None
+        frame: int = 0
         clearColor: list[int] = [0, 0, 0]
 
 
     class settings:
         fps:float = 75.0
+        particleBackend: str = "sprite" # "sprite" (one gfx.Particle per spark) | "array" (NumPy struct-of-arrays)
+        batchedRender: bool = True # submit each render layer through Surface.fblits (F4 toggles for A/B)
+        dirtyRender: bool = False # present only changed regions with pg.display.update(rects)
+        profile: bool = False # per-phase frame profiler HUD (F5 toggles)
+        profileInterval: int = 15 # frames between profiler HUD refreshes
+        fixedStep: bool = True # simulate in fixed ticks of 1/tickRate and interpolate sprites for rendering
+        tickRate: float = 120.0 # simulation ticks per second (independent of fps)
+        maxSimSteps: int = 5 # most ticks simulated per frame; any further backlog is dropped
+        sweptCollision: bool = True # continuous (time-of-impact) puck collision instead of per-step overlap tests
+        authoritative: bool = True # the server runs the match: send inputs, adopt its "state" snapshots
+        transport: str = "d34dnet" # "d34dnet" (backend/server.py) | "rooms" (JSON lines to backend/roomserver.py and its shards)
+        roomServer: list = ["127.0.0.1", 8081] # host, port for the "rooms" transport
+        wireFormat: str = "binary/2" # preferred protocol.CODECS entry when the server offers it ("json": d34dnet dicts)
+        deltaReplication: bool = True # ask the server for change-only "delta" snapshots between keyframes
+        ackInterval: int = 60 # server ticks between delta acks
+        keyframeInterval: int = 150 # relay mode: frames between forced full "update" sends (unchanged ones are skipped)
+        prediction: bool = True # authoritative mode: move the local bar at once and reconcile with the server's input acks
+        interpolation: bool = True # authoritative mode: render the opponent and puck from buffered snapshots, interpolationDelay behind
+        interpolationDelay: float = 0.1 # seconds; covers a couple of snapshot intervals plus arrival jitter
+        maxExtrapolation: float = 0.25 # seconds a moving opponent bar is carried on once snapshots stop arriving
+        networkThread: bool = True # connect and write on a worker thread; frames only queue requests and drain responses
+        networkQueue: int = 256 # requests/responses buffered each way before the oldest are dropped
+        pingInterval: float = 1.0 # seconds between "ping"s while connected (round trip in the HUD)
+        telemetryInterval: int = 15 # frames between network HUD refreshes
+        logLevel: str = "WARNING" # pong2 loggers; DEBUG also lets d34dnet print every message
+        logSample: int = 100 # per-message logs: one in this many is printed
         sfxVolume: float = 15.5
         windowSize: list[int] = [1280, 720]
 
@@ -30,16 +66,19 @@ class Pong2(dnet.inet.BaseClient):
         super().__init__()
         self.clock = pg.time.Clock()
         
-        self.window: gfx.Window = gfx.Window(*self.settings.windowSize, "Pong2")
+        self.window: gfx.Window = gfx.Window(*self.settings.windowSize, "Pong2", self.settings.dirtyRender)
 
         self.sounds = sfx.SoundManager()
-        self.renderer = gfx.Renderer()
+        self.renderer = gfx.Renderer(self.settings.batchedRender)
         self.events = events.EventHandler()
         
         self.assets = gfx.AssetManager()
         self.loadAssets()
 
-        self.particles = gfx.ParticleSystem(self.assets, self.renderer, [0, 0], 10_000)
+        if self.settings.particleBackend == "array":
+            self.particles = gfx.ParticleArray(self.assets, self.renderer, [0, 0], 10_000)
+        else:
+            self.particles = gfx.ParticleSystem(self.assets, self.renderer, [0, 0], 10_000)
         
         pg.display.set_icon(self.assets.getImage("logo"))
 
@@ -50,30 +89,75 @@ class Pong2(dnet.inet.BaseClient):
             self.sounds,
             self.particles
         )
-        self.physics = physics.PPhysics(self.board)
+        self.physics = physics.PPhysics(self.board, self.settings.sweptCollision)
 
         self.player = self.board.player1
         self.opponent = self.board.player2
-        self.devDisplay = gfx.DevDisplay([200, 200], [0, self.window.size[1] - 100], "assets/fonts/megamax.ttf")
+        self.devDisplay = gfx.DevDisplay([200, 240], [0, self.window.size[1] - 240], "assets/fonts/megamax.ttf")   # room for the network telemetry lines
 
-        # self.set_state("log-stdout", False)
+        self.profiler = profiler.FrameProfiler(
+            ["events", "input", "physics", "board", "network", "render", "particles", "devdisplay", "present"],
+            enabled=self.settings.profile
+        )
+        self.profilerDisplay = gfx.DevDisplay([300, 200], [16, 32], "assets/fonts/megamax.ttf", textSize=14)
+        self.profilerFrame: int = 0
+
+        self.codec = protocol.DictCodec()     # until the server's "join" offers something better
+        self.decoder = protocol.BinaryCodec()
+        self.updateFilter = replication.ChangeFilter(self.settings.keyframeInterval)
+        self.predictor: prediction.Predictor = None
+        self.snapshots = interpolation.SnapshotBuffer(self.settings.interpolationDelay, self.settings.maxExtrapolation)
+        self.transport = self   # what the network worker connects and writes: d34dnet (this BaseClient) or a LineClient
+        if self.settings.transport == "rooms":
+            self.transport = network.LineClient(tuple(self.settings.roomServer), self.on_read, self.on_disconnect)
+        self.network = network.NetworkWorker(self.transport, self.settings.networkQueue, self.settings.networkThread, self.timestamp)
+
+        self.netLog = telemetry.SampledLogger("pong2.client", self.settings.logSample)
+        self.set_state("log-stdout", self.netLog.logger.isEnabledFor(logging.DEBUG))    # d34dnet's own per-message prints
 
     def on_connect(self):
-        self.log_stdout(f"pong2 client connected to server: {self.address}")
+        self.netLog.info("pong2 client connected to server: %s", self.address)
 
     def on_disconnect(self):
-        self.write(self.build_request("disconnect", {"pid": self.pid}))
+        self.network.disconnected()     # on d34dnet's thread: the goodbye "disconnect" goes through the worker (`run`)
  
     def on_write(self, request) -> None:
-        self.log_stdout(f"request sent: {request}")
+        self.netLog.debug("request sent: %s", request)
+
+    def timestamp(self) -> float:
+        return time.perf_counter()
+
+    def send(self, method: str, params: dict) -> None:
+        started = time.perf_counter()
+        request = self.transport.build_request(*protocol.wrap(self.codec, method, params))
+        self.network.stats.encoded(time.perf_counter() - started)
+        self.network.send(request)
 
     def on_read(self, response: dict) -> None:
-        method = response.get("method")
-        params = response.get("params")
+        self.network.deliver(response)  # handled when the next frame drains the inbox
+
+    def handle(self, response: dict) -> None:
+        method, params = protocol.unwrap(response.get("method"), response.get("params"), self.decoder)
+        sequence = params.get("seq")
+        if sequence is not None:    # binary frames: drop duplicates and out-of-order arrivals
+            if sequence <= self.game_state.lastSequence: return None
+            self.game_state.lastSequence = sequence
         match method.lower():
             case "join":
                 self.game_state.pong2id = params.get("pong2id")
-                if "1" in self.game_state.pong2id:
+                self.game_state.lastSequence = 0
+                self.game_state.serverTick = self.game_state.lastAck = 0
+                self.game_state.resyncing = False
+                self.game_state.serverRate = params.get("tickRate", 60.0)
+                self.snapshots.clear()
+                if params.get("codecs"):
+                    wireFormat = protocol.negotiate(params["codecs"], self.settings.wireFormat)
+                    self.codec = protocol.CODECS[wireFormat]()
+                    self.network.send(self.transport.build_request("hello", {
+                        "pong2id": self.game_state.pong2id, "codec": wireFormat, "deltas": self.settings.deltaReplication
+                    }))
+                seat = params.get("player")     # lobby servers: ids are unique, the seat comes separately
+                if seat == 1 or (seat is None and "1" in self.game_state.pong2id):
                     self.player = self.board.player1
                     self.opponent = self.board.player2
                     self.game_state.player_id = "player1"
@@ -83,10 +167,20 @@ class Pong2(dnet.inet.BaseClient):
                     self.opponent = self.board.player1
                     self.game_state.player_id = "player2"
                     self.game_state.opponent_id = "player1"
-            case "update":
-                player_info = params.pop(self.game_state.pong2id)
-                self.player.location = Vector2(player_info["location"])
-                self.player.velocity = Vector2(player_info["velocity"])
+                self.game_state.lastPing = None
+                self.board.match.referee = not self.settings.authoritative    # scores, serves and wins come from the server
+                self.predictor = None
+                if self.settings.authoritative and self.settings.prediction:
+                    index = self.board.players.index(self.player)
+                    self.predictor = prediction.Predictor(self.settings.windowSize, index, self.game_state.serverRate)
+                    self.predictor.reset([*self.player.location, *self.player.velocity])
+            case "pong":    # our "ping" back: the round trip
+                if params.get("t") is not None: self.network.stats.roundTrip((self.timestamp() - params["t"]) * 1000.0)
+            case "update":  # the server relays only the sender's entry, keyed by seat
+                player_info = params.pop(self.game_state.player_id.replace("player", "p"), None)
+                if player_info is not None:
+                    self.player.location = Vector2(player_info["location"])
+                    self.player.velocity = Vector2(player_info["velocity"])
                 try:
                     opponent_pong2id = self.game_state.opponent_id.replace("player", "p")
                     pucklocation = params.get("pucklocation")
@@ -98,37 +192,187 @@ class Pong2(dnet.inet.BaseClient):
                         self.board.puck.location = Vector2(pucklocation)
                         self.board.puck.velocity = Vector2(puckvelocity)
                 except KeyError as e: pass # no other player connected!
+            case "state":   # authoritative snapshot (keyframe) of the whole match
+                if params.get("tick", 0) <= self.game_state.serverTick: return None   # stale
+                self.game_state.serverTick = params.get("tick", 0)
+                self.game_state.resyncing = False
+                scores, puckY = [bar.score for bar in self.board.match.bars], self.board.match.puck.y
+                self.board.match.setState(params)
+                self.buffer(params.get("puck"), params["bars"])
+                self.reconcile(params["bars"], params.get("acks"))
+                self.board.pullState()
+                self.board.announce(scores, puckY)
+                self.acknowledge()
+            case "delta":   # changed fields on top of the last applied snapshot
+                if params["base"] != self.game_state.serverTick:    # missed one: wait for a keyframe
+                    if not self.game_state.resyncing:
+                        self.game_state.resyncing = True
+                        self.send("ack", {"pong2id": self.game_state.pong2id, "tick": self.game_state.serverTick, "resync": True})
+                    return None
+                self.game_state.serverTick = params["tick"]
+                scores, puckY = [bar.score for bar in self.board.match.bars], self.board.match.puck.y
+                replication.apply(self.board.match, params)
+                self.buffer(params.get("puck"), [params.get("bar1"), params.get("bar2")])
+                self.reconcile([params.get("bar1"), params.get("bar2")], params.get("acks"))
+                self.board.pullState()
+                self.board.announce(scores, puckY)
+                self.acknowledge()
 
-    def update(self) -> None:
-        self.devDisplay.setTextField("DT", f"{self.game_state.deltaTime}")
-        self.devDisplay.setTextField("FPS", f"{self.clock.get_fps()}")
+    def reconcile(self, bars: list[list[float]|None], acks: list[int]|None) -> None:
+        """ put the local bar back where the server has it, plus the inputs it hasn't applied yet """
+        if self.predictor is None: return None
+        index = self.predictor.index
+        self.predictor.reconcile(bars[index], None if acks is None else acks[index])
+        self.predictor.write(self.board.match.bars[index])
 
-        if self.events.keyPressed(inputs.Keyboard.Escape): self.game_state.running = False
-        
-        if self.events.keyTriggered(inputs.Keyboard.F1): self.board.start()
-        if self.events.keyTriggered(inputs.Keyboard.F2): self.board.fullReset()
-        if self.events.keyTriggered(inputs.Keyboard.F3): self.connect()
+    def buffer(self, puck: list[float]|None, bars: list[list[float]|None]) -> None:
+        """ keep the puck and opponent bar of the snapshot at `serverTick` for rendering """
+        serverTime = self.game_state.serverTick / self.game_state.serverRate
+        self.snapshots.push(serverTime, self.game_state.clock, puck, [bars[self.board.players.index(self.opponent)]])
+
+    def placeRemote(self, sample: tuple[list[float], list[list[float]]]|None) -> None:
+        """ draw the opponent and puck at a snapshot buffer `sample` (`interpolationDelay` ago); the simulation keeps the latest snapshot """
+        if sample is None: return None
+        puck, (bar,) = sample
+        self.board.puck.place(puck[0], puck[1])
+        self.opponent.place(bar[0], bar[1])
+
+    def predict(self) -> None:
+        """ step the local bar at the server's tick rate, sending each tick's input with its sequence number """
+        for _ in range(self.predictor.advance(self.game_state.deltaTime)):
+            dx, dy = self.readInput()
+            sequence = self.predictor.step(dx, dy)
+            if sequence is not None:
+                self.send("input", {"pong2id": self.game_state.pong2id, "dx": dx, "dy": dy, "sequence": sequence})
+
+    def placePlayer(self) -> None:
+        """ the predicted bar overrides whatever the local simulation did with it """
+        bar = self.predictor.bar
+        self.player.location.update(bar.x, bar.y)
+        self.player.velocity.update(bar.vx, bar.vy)
+        self.player.rect.topleft = self.player.location
+
+    def acknowledge(self) -> None:
+        if self.game_state.serverTick - self.game_state.lastAck < self.settings.ackInterval: return None
+        self.game_state.lastAck = self.game_state.serverTick
+        self.send("ack", {"pong2id": self.game_state.pong2id, "tick": self.game_state.serverTick})
+
+    def ping(self) -> None:
+        now = self.timestamp()
+        if self.game_state.lastPing is not None and now - self.game_state.lastPing < self.settings.pingInterval: return None
+        self.game_state.lastPing = now
+        self.send("ping", {"pong2id": self.game_state.pong2id, "t": now, "rtt": self.network.stats.lastRtt})
+
+    def goOffline(self) -> None:
+        """ the connection is gone: the match plays on locally and is refereed here again """
+        self.game_state.pong2id = None
+        self.game_state.lastInput = None
+        self.board.match.referee = True
+        self.predictor = None
+        self.snapshots.clear()
+        self.codec = protocol.DictCodec()
+
+    def online(self) -> bool:
+        return self.settings.authoritative and self.game_state.pong2id is not None
 
+    def readInput(self) -> tuple[int, int]:
+        """ held directions (-1, 0, 1) from WASD """
+        dx = self.events.keyPressed(inputs.Keyboard.D) - self.events.keyPressed(inputs.Keyboard.A)
+        dy = self.events.keyPressed(inputs.Keyboard.S) - self.events.keyPressed(inputs.Keyboard.W)
+        return int(dx), int(dy)
+
+    def sendInput(self) -> None:
+        """ authoritative mode: only changes in held input go over the wire """
+        held = self.readInput()
+        if held == self.game_state.lastInput: return None
+        self.game_state.lastInput = held
+        self.send("input", {"pong2id": self.game_state.pong2id, "dx": held[0], "dy": held[1]})
+
+    def applyInput(self) -> None:
         if self.events.keyPressed(inputs.Keyboard.A): self.player.moveLeft()
         if self.events.keyPressed(inputs.Keyboard.D): self.player.moveRight()
         if self.events.keyPressed(inputs.Keyboard.W): self.player.moveUp()
         if self.events.keyPressed(inputs.Keyboard.S): self.player.moveDown()
-        
+
+    def simulate(self, deltaTime: float) -> None:
+        predicting = self.online() and self.predictor is not None
+        if not predicting: self.applyInput()
         self.physics.update(
             self.settings.windowSize,
-            self.game_state.deltaTime,
+            deltaTime,
             self.particles,
             self.sounds
         )
-        self.board.update(self.game_state.deltaTime)
-
-        self.write(self.build_request("update", {
-            "pong2id": self.game_state.pong2id,
-            "velocity": [*self.player.velocity],
-            "location": [*self.player.location],
-            "puckvelocity": [*self.board.puck.velocity],
-            "pucklocation": [*self.board.puck.location]
-        }))
+        self.profiler.lap("physics")
+        self.board.update(deltaTime)
+        if predicting: self.placePlayer()
+        self.profiler.lap("board")
+
+    def update(self) -> None:
+        for response in self.network.drain():
+            self.handle(response)
+        if self.game_state.pong2id is not None and self.network.status != "connected": self.goOffline()
+        self.profiler.lap("network")
+        self.game_state.clock += self.game_state.deltaTime
+        self.devDisplay.setTextField("DT", f"{self.game_state.deltaTime}", glyphs=True)
+        self.devDisplay.setTextField("FPS", f"{self.clock.get_fps()}", glyphs=True)
+
+        if self.events.keyPressed(inputs.Keyboard.Escape): self.game_state.running = False
+        
+        if self.events.keyTriggered(inputs.Keyboard.F1):
+            if self.online(): self.send("start", {"pong2id": self.game_state.pong2id})
+            else: self.board.start()
+        if self.events.keyTriggered(inputs.Keyboard.F2):
+            if self.online(): self.send("reset", {"pong2id": self.game_state.pong2id})
+            else: self.board.fullReset()
+        if self.events.keyTriggered(inputs.Keyboard.F3): self.network.connect()
+        if self.events.keyTriggered(inputs.Keyboard.F4): self.renderer.batched = not self.renderer.batched
+        if self.events.keyTriggered(inputs.Keyboard.F5): self.profiler.toggle()
+
+        if self.online() and self.predictor is not None: self.predict()
+        interpolating = self.online() and self.settings.interpolation
+        self.profiler.lap("input")
+
+        if self.settings.fixedStep:
+            step = 1.0 / self.settings.tickRate
+            self.game_state.accumulator += self.game_state.deltaTime
+            steps = 0
+            while self.game_state.accumulator >= step and steps < self.settings.maxSimSteps:
+                self.board.snapshot()
+                self.simulate(step)
+                self.game_state.accumulator -= step
+                steps += 1
+            if self.game_state.accumulator >= step:     # maxSimSteps ran out: forget the rest rather than owe it to the next frame
+                self.game_state.accumulator %= step
+            self.board.interpolate(self.game_state.accumulator / step)
+            if interpolating: self.placeRemote(self.snapshots.sample(self.game_state.clock))
+        else:
+            self.simulate(self.game_state.deltaTime)
+            if interpolating: self.placeRemote(self.snapshots.sample(self.game_state.clock))
+
+        if self.game_state.pong2id is not None: self.ping()
+        if self.online():
+            if self.predictor is None: self.sendInput()   # predicted input already went out with each tick
+        elif self.updateFilter.changed([*self.player.location, *self.player.velocity, *self.board.puck.location, *self.board.puck.velocity]):
+            self.send("update", {
+                "pong2id": self.game_state.pong2id,
+                "velocity": [*self.player.velocity],
+                "location": [*self.player.location],
+                "puckvelocity": [*self.board.puck.velocity],
+                "pucklocation": [*self.board.puck.location]
+            })
+        self.network.update()
+        self.profiler.lap("network")
+
+        self.devDisplay.setTextField("NET", self.network.status if self.network.error is None else f"{self.network.status}: {self.network.error}")
+        self.game_state.frame += 1
+        if self.network.status == "connected" and self.game_state.frame % self.settings.telemetryInterval == 0:
+            self.updateNetworkDisplay()
+        if interpolating:
+            stats = self.snapshots.getStats()
+            self.devDisplay.setTextField("BUFFER", f"{stats['depth']}", glyphs=True)
+            self.devDisplay.setTextField("JITTER", f"{stats['jitterMs']:.1f}", glyphs=True)
+            self.devDisplay.setTextField("UNDERRUNS", f"{stats['underruns']}", glyphs=True)
        
     def postProcessing(self) -> None:
         # puck VFX
@@ -151,19 +395,53 @@ class Pong2(dnet.inet.BaseClient):
                 vfx.PBarTrail({"player": player, "particleSize": [4, 4]}, self.assets, self.particles)
         self.particles.update(self.game_state.deltaTime)
 
+    def updateNetworkDisplay(self) -> None:
+        """ rolling network telemetry: p50 | p99 (or per-second messages | KiB) """
+        stats = self.network.stats.getStats()
+        incoming, outgoing = stats["inPerS"], stats["outPerS"]
+        self.devDisplay.setTextField("RTT", f"{stats['rttMs']['p50']:.0f} | {stats['rttMs']['p99']:.0f}", glyphs=True)
+        self.devDisplay.setTextField("IN", f"{incoming['messages']:.0f} | {incoming['bytes'] / 1024:.1f}", glyphs=True)
+        self.devDisplay.setTextField("OUT", f"{outgoing['messages']:.0f} | {outgoing['bytes'] / 1024:.1f}", glyphs=True)
+        self.devDisplay.setTextField("QUEUE", f"{stats['queue']['p50']:.0f} | {stats['queue']['max']:.0f}", glyphs=True)
+        self.devDisplay.setTextField("ENCODE", f"{stats['serializeUs']['p50']:.0f} | {stats['serializeUs']['p99']:.0f}", glyphs=True)
+
+    def updateProfilerDisplay(self) -> None:
+        self.profilerFrame += 1
+        if self.profilerFrame % self.settings.profileInterval: return None
+        for phase, (p50, p95, p99) in self.profiler.getStats().items():
+            self.profilerDisplay.setTextField(phase, f"{p50:.2f} | {p95:.2f} | {p99:.2f}", glyphs=True)
+        self.profilerDisplay.setTextField("particles", f"{self.particles.liveCount}", glyphs=True)
+        self.profilerDisplay.setTextField("sprites", f"{self.renderer.spriteCount()}", glyphs=True)
+        budget = 1000.0 / self.settings.fps
+        self.profilerDisplay.setGraph(self.profiler.frame.values()[-120:].tolist(), budget * 2, budget)
+
     def render(self) -> None:
         self.window.fill(self.game_state.clearColor)
-        self.board.render(self.window.display)
-        self.renderer.render(self.window.display)
+        self.board.render(self.window)
+        self.renderer.render(self.window.display, self.window.dirtyRects if self.window.dirty else None)
+        self.profiler.lap("render")
         self.postProcessing()
+        self.profiler.lap("particles")
         self.devDisplay.render(self.window)
+        if self.profiler.enabled:
+            self.updateProfilerDisplay()
+            self.profilerDisplay.render(self.window)
+        self.profiler.lap("devdisplay")
         self.window.render()
+        self.profiler.lap("present")
  
     def run(self) -> None:
-        while self.game_state.running and self.events.update():
+        while self.game_state.running:
+            self.profiler.begin()
+            if not self.events.update(): break
+            self.profiler.lap("events")
             self.update()
             self.render()
+            self.profiler.end()
             self.game_state.deltaTime = self.clock.tick(self.settings.fps) / 1000.0 # ms -> sec
-        self.disconnect()
+        self.send("disconnect", {"pong2id": self.game_state.pong2id, "pid": self.pid})    # flushed by `stop` before the socket closes
+        self.network.stop()
 
-Pong2().run()
+if __name__ == "__main__":
+    logging.basicConfig(level=Pong2.settings.logLevel)
+    Pong2().run()
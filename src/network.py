@@ -0,0 +1,166 @@
+""" client socket I/O off the render thread: the frame queues requests and drains responses, a worker connects and writes """
+import json, time, socket, threading
+from collections import deque
+import telemetry
+
+class LineClient:
+    """ the client side of backend/roomserver.py: one JSON request/response per line over TCP """
+    def __init__(self, address: tuple[str, int], on_read, on_disconnect, timeout: float=5.0) -> None:
+        self.address: tuple[str, int] = address
+        self.on_read = on_read  # called on the reader thread with each response
+        self.on_disconnect = on_disconnect  # called on the reader thread when the server drops the connection
+        self.timeout: float = timeout
+        self.sock: socket.socket = None
+        self.reader: threading.Thread = None
+
+    def build_request(self, method: str, params: dict) -> dict:
+        return {"method": method, "params": params}
+
+    def connect(self) -> None:
+        sock = socket.create_connection(self.address, self.timeout)
+        sock.settimeout(None)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self.reader = threading.Thread(target=self.read, args=(sock,), name="pong2-reader", daemon=True)
+        self.reader.start()
+
+    def write(self, request: dict) -> None:
+        if self.sock is None: raise ConnectionError("not connected")
+        self.sock.sendall(json.dumps(request, separators=(",", ":")).encode() + b"\n")
+
+    def disconnect(self) -> None:
+        sock, self.sock = self.sock, None
+        if sock is None: return None
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError: pass
+        sock.close()
+
+    def read(self, sock: socket.socket) -> None:
+        try:
+            with sock.makefile("rb") as lines:
+                for line in lines:
+                    try:
+                        self.on_read(json.loads(line))
+                    except ValueError: pass     # not JSON: drop the line, not the connection
+        except OSError: pass
+        if self.sock is sock: self.on_disconnect()  # the server hung up, not us
+
+class NetworkWorker:
+    def __init__(self, client, capacity: int=256, threaded: bool=True, clock=time.monotonic) -> None:
+        self.client = client    # d34dnet BaseClient or LineClient: connected, written and disconnected from one thread only (the worker, or the frame when unthreaded)
+        self.threaded: bool = threaded
+        self.outbox: deque[dict] = deque(maxlen=capacity)
+        self.inbox: deque[dict] = deque(maxlen=capacity)
+        self.wake: threading.Event = threading.Event()
+        self.thread: threading.Thread = None
+        self.stopping: bool = False
+        self.status: str = "offline"    # offline | connecting | connected | failed
+        self.error: str = None
+        self.stats: telemetry.ConnectionStats = telemetry.ConnectionStats(clock=clock)
+        self.inSizes: telemetry.SizeSampler = telemetry.SizeSampler()     # one per thread: the reader's and the writer's
+        self.outSizes: telemetry.SizeSampler = telemetry.SizeSampler()
+
+        self.sent: int = 0
+        self.received: int = 0
+        self.droppedOut: int = 0
+        self.droppedIn: int = 0
+
+    def start(self) -> None:
+        if not self.threaded or self.thread is not None: return None
+        self.stopping = False
+        self.thread = threading.Thread(target=self.run, name="pong2-network", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float=1.0) -> None:
+        """ flush what's queued, disconnect, and join the worker """
+        self.stopping = True
+        if self.thread is not None:
+            self.wake.set()
+            self.thread.join(timeout)
+            self.thread = None
+        else:
+            self.close()
+
+    def connect(self) -> None:
+        """ ask for a connection; returns at once, `status` tells how it went """
+        if self.status in ("connecting", "connected"): return None
+        self.status, self.error = "connecting", None
+        if self.threaded:
+            self.start()
+            self.wake.set()
+        else:
+            self.open()
+
+    def send(self, request: dict) -> None:
+        """ queue one request; dropped while there is no connection to send it on """
+        if self.status != "connected": return None
+        if len(self.outbox) == self.outbox.maxlen: self.droppedOut += 1
+        self.outbox.append(request)
+        self.stats.queued(len(self.outbox))
+        if self.threaded: self.wake.set()
+
+    def deliver(self, response: dict) -> None:
+        """ a response from the socket (any thread) """
+        if len(self.inbox) == self.inbox.maxlen: self.droppedIn += 1
+        self.inbox.append(response)
+        self.received += 1
+        self.stats.received(self.inSizes.size(response))
+
+    def disconnected(self) -> None:
+        """ the connection dropped under the client (any thread): stop sending on it """
+        if self.status != "connected": return None
+        self.status = "offline"
+        self.outbox.clear()
+
+    def drain(self) -> list[dict]:
+        """ the responses that arrived since the last call, oldest first """
+        responses = []
+        for _ in range(len(self.inbox)):    # anything arriving meanwhile waits for the next frame
+            responses.append(self.inbox.popleft())
+        return responses
+
+    def update(self) -> None:
+        """ end of frame: unthreaded, this is where the outbox goes out """
+        if not self.threaded: self.flush()
+
+    def run(self) -> None:
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+            if self.status == "connecting": self.open()
+            self.flush()
+            if self.stopping: break
+        self.close()
+
+    def open(self) -> None:
+        try:
+            self.client.connect()
+            self.status = "connected"
+        except OSError as e:
+            self.status, self.error = "failed", str(e)
+
+    def flush(self) -> None:
+        while self.outbox and self.status == "connected":
+            request = self.outbox.popleft()
+            try:
+                self.client.write(request)
+                self.sent += 1
+                self.stats.sent(self.outSizes.size(request))
+            except OSError as e:
+                self.status, self.error = "failed", str(e)
+                self.outbox.clear()
+
+    def close(self) -> None:
+        if self.status != "connected": return None
+        self.flush()
+        try:
+            self.client.disconnect()
+        except OSError: pass
+        self.status = "offline"
+
+    def getStats(self) -> dict:
+        return {
+            "status": self.status, "outbox": len(self.outbox), "inbox": len(self.inbox),
+            "sent": self.sent, "received": self.received, "droppedOut": self.droppedOut, "droppedIn": self.droppedIn
+        }
@@ -8,7 +8,7 @@ class PBar(gfx.Sprite):
         self.hit: bool = False
         self.flashTime: float = 0.0
         self.facing: int = facing # (specify which half of the court the pBar faces) -1 left | 1 right
-        self.setImage(gfx.createSurfaceFADE(self.size, self.color, self.facing, 0))
+        self.setImage(gfx.getSurfaceFADE(self.size, self.color, self.facing, 0))
 
         # player cosmetics (asset strs)
         self.barSkin: str = "default"
@@ -19,6 +19,7 @@ class PBar(gfx.Sprite):
         self.rotSpeed = rotSpeed
         self.flashTime = 0.2
         self.hit = True
+        self.setImage(gfx.surfaceCache.get(self.size, [255, 255, 255]))
 
     def update(self, deltaTime: float) -> None:
         super().update(deltaTime)
@@ -31,7 +32,6 @@ class PBar(gfx.Sprite):
         
         if self.flashTime > 0:
             self.flashTime -= 1 * deltaTime
-            self.fillImage([255, 255, 255])
             if self.flashTime <= 0.0:
                 self.flashTime = 0.0
-                self.setImage(gfx.createSurfaceFADE(self.size, self.color, self.facing, 0))
+                self.setImage(gfx.getSurfaceFADE(self.size, self.color, self.facing, 0))
@@ -0,0 +1,234 @@
+"""
+Vectorized batch simulation of many Pong2 matches at once.
+
+`BatchMatch` keeps N matches in NumPy arrays and steps them together with
+the same rules as `pMatch.Match` in discrete mode (`continuous=False`):
+`checkBounds`, `checkCollisions`/`variableBounce`, `friction`, `isGoal` and
+the board update (countdown, resets, halfMark and window bounds). Paddle
+inputs are per-match directions, either scripted or produced by a policy
+callback each tick.
+
+    python src/pBatch.py --matches 10000 --ticks 5000
+"""
+import json, time, argparse
+import numpy as np
+
+class BatchMatch:
+    def __init__(self, count: int, windowSize: list[int]=[1280, 720], maxScore: int=3, seed: int=None) -> None:
+        self.count: int = count
+        self.width: float = float(windowSize[0])
+        self.height: float = float(windowSize[1])
+        self.halfMark: float = 2.0
+        self.maxScore: int = maxScore
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+
+        self.puckSpeed: float = 600.0
+        self.puckSize: tuple[float, float] = (48.0, 48.0)
+        self.puckSpawn: tuple[float, float] = (self.width / 2 - self.puckSize[0] / 2, self.height / 2 - self.puckSize[1] / 2)
+
+        self.barSpeed: float = 550.0
+        self.barSize: tuple[float, float] = (32.0, self.height / 4)
+        spawn1 = (self.width / 8, self.height / 2 - self.barSize[1] / 2)
+        spawn2 = (self.width - spawn1[0] - self.barSize[0], spawn1[1])
+        self.barSpawn: np.ndarray = np.array([spawn1, spawn2])     # (2, xy)
+
+        self.puck: np.ndarray = np.zeros((count, 4))               # x, y, vx, vy
+        self.puck[:, 0:2] = self.puckSpawn
+        self.bars: np.ndarray = np.zeros((count, 2, 4))            # [match, bar] -> x, y, vx, vy
+        self.bars[:, :, 0:2] = self.barSpawn
+
+        self.time: np.ndarray = np.zeros(count)
+        self.countdown: np.ndarray = np.zeros(count)
+        self.gameover: np.ndarray = np.zeros(count, dtype=bool)
+        self.scores: np.ndarray = np.zeros((count, 2), dtype=np.int32)
+
+        self.hits: np.ndarray = np.zeros((count, 2), dtype=np.int32)
+        self.rally: np.ndarray = np.zeros(count, dtype=np.int32)          # hits since the last serve
+        self.rallies: np.ndarray = np.zeros(count, dtype=np.int32)        # finished rallies (goals)
+        self.rallyHits: np.ndarray = np.zeros(count, dtype=np.int32)      # hits over finished rallies
+        self.longestRally: np.ndarray = np.zeros(count, dtype=np.int32)
+        self.ticks: int = 0
+
+    def start(self, mask: np.ndarray=None) -> None:
+        """ serve the puck from the spawn in a random diagonal (`Match.start`) """
+        mask = np.ones(self.count, dtype=bool) if mask is None else mask
+        serves = int(np.count_nonzero(mask))
+        if not serves: return None
+        self.puck[mask, 0:2] = self.puckSpawn
+        self.puck[mask, 2] = self.rng.choice([-self.puckSpeed, self.puckSpeed], serves)
+        self.puck[mask, 3] = self.rng.choice([-self.puckSpeed, self.puckSpeed], serves)
+        self.rally[mask] = 0
+
+    def midReset(self, mask: np.ndarray) -> None:
+        self.countdown[mask] = 3
+        self.puck[mask, 2:4] = 0.0
+        self.puck[mask, 0:2] = self.puckSpawn
+
+    def fullReset(self, mask: np.ndarray=None) -> None:
+        mask = np.ones(self.count, dtype=bool) if mask is None else mask
+        self.time[mask] = 0.0
+        self.midReset(mask)
+        self.gameover[mask] = False
+        self.bars[mask, :, 0:2] = self.barSpawn
+        self.scores[mask] = 0
+
+    # ------------------------------------------------------------ #
+    # physics
+    def applyInputs(self, inputs: np.ndarray) -> None:
+        """ (N, 2 bars, dx/dy) held directions in -1..1, like `Bar.move` """
+        inputs = np.asarray(inputs)
+        velocities = self.bars[:, :, 2:4]
+        np.copyto(velocities, self.barSpeed * inputs, where=inputs != 0)
+
+    def friction(self, deltaTime: float) -> None:
+        velocities = self.bars[:, :, 2:4]
+        decay = (self.barSpeed * 4) * deltaTime
+        velocities[:] = np.sign(velocities) * np.maximum(np.abs(velocities) - decay, 0.0)
+
+    def variableBounce(self, mask: np.ndarray, bar: int) -> None:
+        puck, bars = self.puck, self.bars
+        relativeHit = (puck[mask, 1] + self.puckSize[1] / 2) - (bars[mask, bar, 1] + self.barSize[1] / 2)
+        normalizedHit = np.clip(relativeHit / (self.barSize[1] / 2), -1, 1)
+        speed = (puck[mask, 2]**2 + puck[mask, 3]**2)**0.5
+        puck[mask, 3] = speed * np.sin(np.radians(90 * normalizedHit))
+        puck[mask, 2] = -puck[mask, 2]
+
+    def checkCollisions(self) -> None:
+        puck, bars = self.puck, self.bars
+        width, height = self.puckSize
+        barWidth, barHeight = self.barSize
+        for bar, heading in ((0, -1), (1, 1)):
+            barX, barY = bars[:, bar, 0], bars[:, bar, 1]
+            hit = ~(
+                ((puck[:, 1] + height) < barY) |
+                (puck[:, 0] > (barX + barWidth)) |
+                (puck[:, 1] > (barY + barHeight)) |
+                ((puck[:, 0] + width) < barX)
+            ) & (puck[:, 2] * heading > 0)
+            if not hit.any(): continue
+            if bar == 0: puck[hit, 0] = (barX[hit] + barWidth) + 1
+            else: puck[hit, 0] = (barX[hit] - width) - 1
+            self.variableBounce(hit, bar)
+            self.hits[hit, bar] += 1
+            self.rally[hit] += 1
+
+    def checkBounds(self) -> None:
+        puck = self.puck
+        width, height = self.puckSize
+        for axis, size, limit in ((1, height, self.height), (0, width, self.width)):
+            low = puck[:, axis] <= 0
+            high = ~low & ((puck[:, axis] + size) >= limit)
+            puck[low, axis] = 1
+            puck[high, axis] = (limit - size) - 1
+            bounced = low | high
+            puck[bounced, axis + 2] = -puck[bounced, axis + 2]
+
+    # ------------------------------------------------------------ #
+    # board
+    def isGoal(self, active: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """ (goal, won) masks; scores are updated for goals """
+        puck = self.puck
+        won = active & (self.scores == self.maxScore).any(axis=1)
+        playing = active & ~won
+        right = playing & ((puck[:, 0] + self.puckSize[0]) >= self.width)
+        left = playing & ~right & (puck[:, 0] <= 0)
+        self.scores[right, 0] += 1
+        self.scores[left, 1] += 1
+        return right | left, won
+
+    def update(self, deltaTime: float) -> None:
+        active = ~self.gameover
+        self.time[active] += deltaTime
+
+        counting = active & (self.countdown > 0)
+        self.countdown[counting] -= deltaTime
+        serve = counting & (self.countdown <= 0)
+        self.countdown[serve] = 0
+        self.start(serve)
+
+        self.puck[active, 0:2] += self.puck[active, 2:4] * deltaTime
+        goal, won = self.isGoal(active)
+        if goal.any():
+            rally = self.rally[goal]
+            self.rallies[goal] += 1
+            self.rallyHits[goal] += rally
+            self.longestRally[goal] = np.maximum(self.longestRally[goal], rally)
+            self.rally[goal] = 0
+            self.midReset(goal)
+        self.gameover |= won
+
+        # bar halfMark bound
+        bars = self.bars
+        center = self.width / 2
+        np.minimum(bars[:, 0, 0], center - self.barSize[0], out=bars[:, 0, 0])
+        np.maximum(bars[:, 1, 0], center + self.halfMark, out=bars[:, 1, 0])
+
+        bars[:, :, 0:2] += bars[:, :, 2:4] * deltaTime
+
+        # bar window bounds
+        np.clip(bars[:, :, 0], 0, self.width - self.barSize[0], out=bars[:, :, 0])
+        np.clip(bars[:, :, 1], 0, self.height - self.barSize[1], out=bars[:, :, 1])
+
+    def step(self, deltaTime: float, inputs: np.ndarray=None) -> None:
+        """ one `Match.step` (discrete rules) for every match """
+        if inputs is not None:
+            self.applyInputs(inputs)
+        self.checkBounds()
+        self.checkCollisions()
+        self.friction(deltaTime)
+        self.update(deltaTime)
+        self.ticks += 1
+
+    def run(self, ticks: int, deltaTime: float, inputs=None) -> dict:
+        """
+        Step `ticks` times. `inputs` is None (no input), an (N, 2, 2) array held
+        for every tick, a (ticks, N, 2, 2) script, or a callback `inputs(batch)`
+        returning the (N, 2, 2) directions for the next tick.
+        """
+        for tick in range(ticks):
+            if callable(inputs): self.step(deltaTime, inputs(self))
+            elif inputs is not None and np.ndim(inputs) == 4: self.step(deltaTime, inputs[tick])
+            else: self.step(deltaTime, inputs)
+        return self.results()
+
+    def results(self) -> dict[str, np.ndarray]:
+        return {
+            "scores": self.scores.copy(),
+            "hits": self.hits.copy(),
+            "rallies": self.rallies.copy(),
+            "longestRally": np.maximum(self.longestRally, self.rally),  # including the rally in progress
+            "meanRally": self.rallyHits / np.maximum(self.rallies, 1),
+            "gameover": self.gameover.copy(),
+            "time": self.time.copy(),
+        }
+
+def track(batch: BatchMatch, deadzone: float=8.0) -> np.ndarray:
+    """ policy: both bars chase the puck vertically """
+    offsets = (batch.puck[:, None, 1] + batch.puckSize[1] / 2) - (batch.bars[:, :, 1] + batch.barSize[1] / 2)
+    inputs = np.zeros((batch.count, 2, 2), dtype=np.int8)
+    inputs[:, :, 1] = np.where(np.abs(offsets) < deadzone, 0, np.sign(offsets))
+    return inputs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="vectorized Pong2 batch simulation throughput")
+    parser.add_argument("--matches", type=int, default=10_000)
+    parser.add_argument("--ticks", type=int, default=5_000)
+    parser.add_argument("--tick-rate", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    batch = BatchMatch(args.matches, seed=args.seed)
+    batch.start()
+    started = time.perf_counter()
+    results = batch.run(args.ticks, 1.0 / args.tick_rate, track)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "matches": args.matches,
+        "ticks": args.ticks,
+        "seconds": elapsed,
+        "matchTicksPerSecond": args.matches * args.ticks / elapsed,
+        "finished": int(results["gameover"].sum()),
+        "meanHits": float(results["hits"].sum(axis=1).mean()),
+        "meanRally": float(results["meanRally"].mean()),
+        "longestRally": int(results["longestRally"].max()),
+    }, indent=2))
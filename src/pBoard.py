@@ -1,11 +1,11 @@
-import random
 import pygame as pg
 from pygame.math import Vector2
 
 import gfx, vfx, sfx
-import pBar, pPuck
+import pBar, pPuck, pMatch
 
 class PBoard:
+    """ sprite/VFX view over a `pMatch.Match`: `pushState` copies sprites into the match, `pullState` copies them back """
     def __init__(
             self,
             windowSize:list[int],
@@ -23,24 +23,16 @@ class PBoard:
         self.soundManager: sfx.SoundManager = soundManager
         self.particleSystem: gfx.ParticleSystem = particleSystem
 
-        self.puckSize = [48, 48]
-        self.puckSpawn = Vector2(
-            self.windowSize[0] / 2 - (self.puckSize[0] / 2),
-            self.windowSize[1] / 2 - self.puckSize[1] / 2
-        )
+        self.match: pMatch.Match = pMatch.Match(windowSize)
+        self.puckSize = [self.match.puck.width, self.match.puck.height]
+        self.puckSpawn = Vector2(self.match.puckSpawn)
 
-        self.barSize = [32, self.windowSize[1] / 4]
-        self.barSpawn1 = Vector2(
-            self.windowSize[0] / 8,
-            self.windowSize[1] / 2 - self.barSize[1] / 2
-        )
-        self.barSpawn2 = Vector2(
-            self.windowSize[0] - self.barSpawn1[0] - self.barSize[0],
-            self.barSpawn1[1]
-        )
+        self.barSize = [self.match.bars[0].width, self.match.bars[0].height]
+        self.barSpawn1 = Vector2(self.match.barSpawns[0])
+        self.barSpawn2 = Vector2(self.match.barSpawns[1])
 
         self.matchInfo: dict = {
-            "max": 3,
+            "max": self.match.maxScore,
             "time": 0.0,
             "countdown": 0,
             "gameover": False,
@@ -92,6 +84,13 @@ class PBoard:
         self.player1: pBar.PBar = self.matchInfo["playerInfo"]["player1"]["bar"]
         self.player2: pBar.PBar = self.matchInfo["playerInfo"]["player2"]["bar"]
         self.players: list[pBar.PBar] = [self.player1, self.player2]
+        self.bodies: list[tuple[gfx.Sprite, pMatch.Body]] = [
+            (self.puck, self.match.puck),
+            (self.player1, self.match.bars[0]),
+            (self.player2, self.match.bars[1])
+        ]
+        for sprite, _ in self.bodies:
+            sprite.integrate = False    # the match moves them
  
         self.halfMark: gfx.Sprite = gfx.Sprite(
             self.matchInfo["boardInfo"]["halfMark"]["size"], 0.0,
@@ -127,77 +126,92 @@ class PBoard:
             print(f"playerInfo key not found: {field} | {e}\n")
             return {}
 
+    def snapshot(self) -> None:
+        """ remember every moving sprite's location before a simulation step """
+        self.puck.snap()
+        for player in self.players:
+            player.snap()
+
+    def interpolate(self, alpha: float) -> None:
+        self.puck.interpolate(alpha)
+        for player in self.players:
+            player.interpolate(alpha)
+
+    def pushState(self) -> None:
+        """ copy sprite locations/velocities (set by input or the network) into the match """
+        for sprite, body in self.bodies:
+            body.x, body.y = sprite.location
+            body.vx, body.vy = sprite.velocity
+
+    def pullState(self) -> None:
+        """ copy the match state back out to the sprites and `matchInfo` """
+        for sprite, body in self.bodies:
+            sprite.location.update(body.x, body.y)
+            sprite.velocity.update(body.vx, body.vy)
+        self.matchInfo["time"] = self.match.time
+        self.matchInfo["countdown"] = self.match.countdown
+        self.matchInfo["gameover"] = self.match.gameover
+        self.matchInfo["playerInfo"]["player1"]["score"] = self.match.bars[0].score
+        self.matchInfo["playerInfo"]["player2"]["score"] = self.match.bars[1].score
+
     def start(self) -> None:
-        self.puck.location = self.puckSpawn.copy()
-        self.puck.velocity[0] = random.choice([-self.puck.speed, self.puck.speed])
-        self.puck.velocity[1] = random.choice([-self.puck.speed, self.puck.speed])
+        self.pushState()
+        self.match.start()
+        self.pullState()
+        self.puck.snap()
         
     def midReset(self) -> None:
-        self.matchInfo["countdown"] = 3
-        self.puck.velocity = Vector2(0.0, 0.0)
-        self.puck.location = self.puckSpawn.copy()
+        self.match.midReset()
+        self.pullState()
+        self.puck.snap()
     
     def fullReset(self) -> None:
-        self.matchInfo["time"] = 0.0
-        self.matchInfo["countdown"] = 3
-        self.matchInfo["gameover"] = False
-        self.puck.velocity = Vector2(0.0, 0.0)
-        self.puck.location = self.puckSpawn.copy()
-        self.player1.location = self.barSpawn1.copy()
-        self.player2.location = self.barSpawn2.copy()
-        self.matchInfo["playerInfo"]["player1"]["score"] = 0
-        self.matchInfo["playerInfo"]["player2"]["score"] = 0
+        self.match.fullReset()
+        self.pullState()
+        self.snapshot()
+
+    def handleEvents(self) -> None:
+        """ goal and win effects for the events of the last `Match.update` """
+        for event in self.match.drainEvents():
+            match event:
+                case ("goal", index, puckY):
+                    goal = self.rightGoal if index == 0 else self.leftGoal
+                    vfx.PPuckGoal(
+                        {"location": [goal.location[0], puckY - goal.location[1]], "player": self.players[index]},
+                        self.assetManager, self.particleSystem
+                    )
+                case ("win", index, puckY):
+                    goal = self.rightGoal if index == 0 else self.leftGoal
+                    vfx.PPuckWin(
+                        {"location": [goal.location[0], puckY - goal.location[1]], "player": self.players[index]},
+                        self.assetManager, self.particleSystem
+                    )
+                    print(f"Player {index + 1} Wins!")
+
+    def announce(self, scores: list[int], puckY: float) -> None:
+        """ goal and win effects for the scores a server snapshot raised from `scores` (the match isn't refereeing) """
+        for index, bar in enumerate(self.match.bars):
+            if bar.score > scores[index]:
+                self.match.events.append(("goal", index, puckY))
+                if bar.score >= self.match.maxScore: self.match.events.append(("win", index, puckY))
+        self.handleEvents()
 
     def isGoal(self, puck: pPuck.PPuck) -> int: # ret: 0 = No goal, 1 = goal, 2 = game over
-        result = 0
-        score1 = self.matchInfo["playerInfo"]["player1"]["score"]
-        score2 = self.matchInfo["playerInfo"]["player2"]["score"]
-        if score1 == self.matchInfo["max"]:
-            vfx.PPuckWin(
-                {"location": [self.rightGoal.location[0], self.puck.location[1] - self.rightGoal.location[1]], "player": self.player1},
-                self.assetManager, self.particleSystem
-            )
-            print(f"Player 1 Wins!")
-            return 2
-        elif score2 == self.matchInfo["max"]:
-            vfx.PPuckWin(
-                {"location": [self.leftGoal.location[0], self.puck.location[1] - self.leftGoal.location[1]], "player": self.player2},
-                self.assetManager, self.particleSystem
-            )
-            print(f"Player 2 Wins!")
-            return 2
-
-        if (puck.location[0] + puck.size[0]) >= self.windowSize[0]:
-            vfx.PPuckGoal(
-                {"location": [self.rightGoal.location[0], self.puck.location[1] - self.rightGoal.location[1]], "player": self.player1},
-                self.assetManager, self.particleSystem
-            )
-            self.matchInfo["playerInfo"]["player1"]["score"] += 1
-            result = 1
-        elif puck.location[0] <= 0:
-            vfx.PPuckGoal(
-                {"location": [self.leftGoal.location[0], self.puck.location[1] - self.leftGoal.location[1]], "player": self.player2},
-                self.assetManager, self.particleSystem
-            )
-            self.matchInfo["playerInfo"]["player2"]["score"] += 1
-            result = 1
+        self.pushState()
+        result = self.match.isGoal()
+        self.pullState()
+        self.handleEvents()
         return result
 
-    def render(self, window: pg.Surface) -> None:
+    def render(self, window: gfx.Window) -> None:
         score1 = self.matchInfo["playerInfo"]["player1"]["score"]
         score1Text = f"{self.player1.name}: {score1} {"".join(["|" for _ in range(score1)])}"
-        score1Surface: pg.Surface = self.font.render(
-            antialias=True, color=self.player1.color,
-            text=score1Text
-        )
+        score1Surface: pg.Surface = gfx.textCache.render(self.font, score1Text, self.player1.color)
         score1Location = [self.leftGoal.size[0], 0]
 
         score2 = self.matchInfo["playerInfo"]["player2"]["score"]
         score2Text = f"{"".join(["|" for _ in range(score2)])} {score2} :{self.player2.name}"
-        score2Surface: pg.Surface = self.font.render(
-            antialias=True, color=self.player2.color,
-            text=score2Text
-        )
+        score2Surface: pg.Surface = gfx.textCache.render(self.font, score2Text, self.player2.color)
         score2Location = [
             self.windowSize[0] - (self.rightGoal.size[0] + score2Surface.get_size()[0]),
             0
@@ -207,40 +221,12 @@ class PBoard:
         window.blit(score2Surface, score2Location)
 
     def update(self, deltaTime:float) -> None:
-        if not self.matchInfo["gameover"]:
-            self.matchInfo["time"] += deltaTime
-        
-            if self.matchInfo["countdown"] > 0:
-                self.matchInfo["countdown"] -= 1 * deltaTime
-                if self.matchInfo["countdown"] <= 0:
-                    self.matchInfo["countdown"] = 0
-                    self.start()
+        self.pushState()
+        self.match.update(deltaTime)
+        self.pullState()
+        self.handleEvents()
 
+        if not self.match.gameover:
             self.puck.update(deltaTime)
-            goal = self.isGoal(self.puck)
-            if goal == 1:   # goal
-                self.midReset()
-            elif goal == 2: # game ended
-                self.matchInfo["gameover"] = True
-
-        # player halfMark bound
-        if self.player1.location[0] + self.player1.size[0] > self.windowSize[0] / 2:
-            self.player1.location[0] = self.windowSize[0] / 2 - self.player1.size[0]
-        if self.player2.location[0] < self.windowSize[0] / 2 + self.halfMark.size[0]:
-            self.player2.location[0] = self.windowSize[0] / 2 + self.halfMark.size[0]
-        
         for player in self.players:
             player.update(deltaTime)
-
-            # player window bound x
-            if player.location[0] < 0:
-                player.location[0] = 0
-            if player.location[0] + player.size[0] > self.windowSize[0]:
-                player.location[0] = self.windowSize[0] - player.size[0]
-
-            # player window bound y
-            if player.location[1] < 0:
-                player.location[1] = 0
-            if player.location[1] + player.size[1] > self.windowSize[1]:
-                player.location[1] = self.windowSize[1] - player.size[1]
-
@@ -0,0 +1,323 @@
+""" pygame-free Pong2 match simulation: puck, bars, scores and rules as plain floats, runnable headless on the server """
+import math, random
+
+class Body:
+    __slots__ = ("x", "y", "vx", "vy", "width", "height", "speed")
+
+    def __init__(self, x: float, y: float, width: float, height: float, speed: float) -> None:
+        self.x: float = x
+        self.y: float = y
+        self.vx: float = 0.0
+        self.vy: float = 0.0
+        self.width: float = width
+        self.height: float = height
+        self.speed: float = speed
+
+class Bar(Body):
+    __slots__ = ("facing", "score")
+
+    def __init__(self, x: float, y: float, width: float, height: float, facing: int) -> None:
+        super().__init__(x, y, width, height, 550.0)
+        self.score: int = 0
+        self.facing: int = facing  # -1 faces left | 1 faces right
+
+    def move(self, dx: int, dy: int) -> None:
+        """ apply held directions (-1, 0, 1) like `gfx.Sprite.moveLeft`/`moveRight`/`moveUp`/`moveDown` """
+        if dx: self.vx = self.speed * dx
+        if dy: self.vy = self.speed * dy
+
+def sweepAABB(x: float, y: float, width: float, height: float, dx: float, dy: float, boxX: float, boxY: float, boxWidth: float, boxHeight: float) -> float|None:
+    """
+    Time of impact (0 to 1) of a box moving by (dx, dy) against a static box,
+    0 when they already overlap, or None when they don't meet during the move.
+    """
+    if not (
+        (y + height) < boxY or
+        x > (boxX + boxWidth) or
+        y > (boxY + boxHeight) or
+        (x + width) < boxX
+    ): return 0.0
+
+    enter, exit = 0.0, 1.0
+    for location, size, displacement, boxLocation, boxSize in ((x, width, dx, boxX, boxWidth), (y, height, dy, boxY, boxHeight)):
+        if displacement == 0:
+            if (location + size) < boxLocation or location > (boxLocation + boxSize):
+                return None
+            continue
+        near = (boxLocation - (location + size)) / displacement
+        far = (boxLocation + boxSize - location) / displacement
+        if near > far: near, far = far, near
+        enter, exit = max(enter, near), min(exit, far)
+        if enter > exit: return None
+    return enter
+
+class Match:
+    __slots__ = (
+        "width", "height", "halfMark", "maxScore", "time", "countdown", "gameover",
+        "puck", "bars", "puckSpawn", "barSpawns", "continuous", "maxImpacts", "events", "rng", "referee"
+    )
+
+    def __init__(self, windowSize: list[int], maxScore: int=3, continuous: bool=True, seed: int=None) -> None:
+        self.width: float = windowSize[0]
+        self.height: float = windowSize[1]
+        self.halfMark: float = 2
+        self.maxScore: int = maxScore
+        self.time: float = 0.0
+        self.countdown: float = 0
+        self.gameover: bool = False
+        self.continuous: bool = continuous
+        self.maxImpacts: int = 4
+        self.events: list[tuple] = []   # ("wall",) | ("hit", bar, rotSpeed) | ("goal", bar, puckY) | ("win", bar, puckY)
+        self.rng = random if seed is None else random.Random(seed)
+        self.referee: bool = True   # apply goal, win and serve rules
+
+        puckSize = [48, 48]
+        self.puckSpawn: tuple[float, float] = (self.width / 2 - puckSize[0] / 2, self.height / 2 - puckSize[1] / 2)
+        self.puck: Body = Body(*self.puckSpawn, *puckSize, 600.0)
+
+        barSize = [32, self.height / 4]
+        spawn1 = (self.width / 8, self.height / 2 - barSize[1] / 2)
+        spawn2 = (self.width - spawn1[0] - barSize[0], spawn1[1])
+        self.barSpawns: list[tuple[float, float]] = [spawn1, spawn2]
+        self.bars: list[Bar] = [Bar(*spawn1, *barSize, 1), Bar(*spawn2, *barSize, -1)]
+
+    def drainEvents(self) -> list[tuple]:
+        events, self.events = self.events, []
+        return events
+
+    def getState(self) -> dict:
+        """ JSON-friendly snapshot of everything a remote view needs """
+        return {
+            "time": self.time,
+            "countdown": self.countdown,
+            "gameover": self.gameover,
+            "scores": [bar.score for bar in self.bars],
+            "puck": [self.puck.x, self.puck.y, self.puck.vx, self.puck.vy],
+            "bars": [[bar.x, bar.y, bar.vx, bar.vy] for bar in self.bars],
+        }
+
+    def setState(self, state: dict) -> None:
+        self.time = state["time"]
+        self.countdown = state["countdown"]
+        self.gameover = state["gameover"]
+        self.puck.x, self.puck.y, self.puck.vx, self.puck.vy = state["puck"]
+        for bar, body, score in zip(self.bars, state["bars"], state["scores"]):
+            bar.x, bar.y, bar.vx, bar.vy = body
+            bar.score = score
+
+    def start(self) -> None:
+        puck = self.puck
+        puck.x, puck.y = self.puckSpawn
+        puck.vx = self.rng.choice([-puck.speed, puck.speed])
+        puck.vy = self.rng.choice([-puck.speed, puck.speed])
+
+    def midReset(self) -> None:
+        self.countdown = 3
+        self.puck.vx = self.puck.vy = 0.0
+        self.puck.x, self.puck.y = self.puckSpawn
+
+    def fullReset(self) -> None:
+        self.time = 0.0
+        self.countdown = 3
+        self.gameover = False
+        self.puck.vx = self.puck.vy = 0.0
+        self.puck.x, self.puck.y = self.puckSpawn
+        for bar, spawn in zip(self.bars, self.barSpawns):
+            bar.x, bar.y = spawn
+            bar.score = 0
+
+    # ------------------------------------------------------------ #
+    # physics
+    def friction(self, bar: Bar, deltaTime: float) -> None:
+        decay = (bar.speed * 4) * deltaTime
+        if bar.vx > 0: bar.vx = max(bar.vx - decay, 0.0)
+        elif bar.vx < 0: bar.vx = min(bar.vx + decay, 0.0)
+        if bar.vy > 0: bar.vy = max(bar.vy - decay, 0.0)
+        elif bar.vy < 0: bar.vy = min(bar.vy + decay, 0.0)
+
+    def aabb(self, bar: Bar, puck: Body) -> bool:
+        return not (
+            (puck.y + puck.height) < bar.y or
+            puck.x > (bar.x + bar.width) or
+            puck.y > (bar.y + bar.height) or
+            (puck.x + puck.width) < bar.x
+        )
+
+    def variableBounce(self, bar: Bar, puck: Body) -> None:
+        # normalized (-1 to 1) hit position relative to the bar's center
+        relativeHit = (puck.y + (puck.height / 2)) - (bar.y + (bar.height / 2))
+        normalizedHit = max(-1, min(1, relativeHit / (bar.height / 2)))
+
+        # deflect by up to 90 degrees, preserving the puck's speed
+        speed = (puck.vx**2 + puck.vy**2)**0.5
+        puck.vy = speed * math.sin(math.radians(90 * normalizedHit))
+        puck.vx = -puck.vx
+
+    def checkCollisions(self) -> None:
+        puck = self.puck
+        bar1, bar2 = self.bars
+        rotSpeed = 500 * (-1 if puck.vy < 0 else 1)
+
+        if self.aabb(bar1, puck) and puck.vx < 0:
+            puck.x = (bar1.x + bar1.width) + 1
+            self.variableBounce(bar1, puck)
+            self.events.append(("hit", 0, rotSpeed))
+
+        if self.aabb(bar2, puck) and puck.vx > 0:
+            puck.x = (bar2.x - puck.width) - 1
+            self.variableBounce(bar2, puck)
+            self.events.append(("hit", 1, -rotSpeed))
+
+    def checkBounds(self) -> None:
+        puck = self.puck
+        # puck vertical bounce
+        if puck.y <= 0:
+            puck.y = 1
+            puck.vy = -puck.vy
+            self.events.append(("wall",))
+        elif (puck.y + puck.height) >= self.height:
+            puck.y = (self.height - puck.height) - 1
+            puck.vy = -puck.vy
+            self.events.append(("wall",))
+
+        # puck horizontal bounce
+        if puck.x <= 0:
+            puck.x = 1
+            puck.vx = -puck.vx
+            self.events.append(("wall",))
+        elif (puck.x + puck.width) >= self.width:
+            puck.x = (self.width - puck.width) - 1
+            puck.vx = -puck.vx
+            self.events.append(("wall",))
+
+    def sweepPuck(self, deltaTime: float) -> None:
+        """ move the puck through the step, resolving bar and top/bottom impacts in time order """
+        puck = self.puck
+        remaining = deltaTime
+        for _ in range(self.maxImpacts):
+            elapsed = deltaTime - remaining
+            dx, dy = puck.vx * remaining, puck.vy * remaining
+            impact, target = 1.0, None
+
+            # bars, swept in each bar's frame of reference (only the one the puck is heading towards)
+            for index, bar in enumerate(self.bars):
+                if puck.vx * bar.facing >= 0: continue
+                time = sweepAABB(
+                    puck.x, puck.y, puck.width, puck.height,
+                    dx - bar.vx * remaining, dy - bar.vy * remaining,
+                    bar.x + bar.vx * elapsed, bar.y + bar.vy * elapsed, bar.width, bar.height
+                )
+                if time is not None and time < impact:
+                    impact, target = time, index
+
+            # top/bottom window bounds (left/right are goals)
+            if dy < 0:
+                time = max(0.0, -puck.y / dy)
+                if time < impact: impact, target = time, "top"
+            elif dy > 0:
+                time = max(0.0, (self.height - puck.height - puck.y) / dy)
+                if time < impact: impact, target = time, "bottom"
+
+            puck.x += dx * impact
+            puck.y += dy * impact
+            if target is None: break
+            remaining *= 1.0 - impact
+
+            if target == "top":
+                puck.y = 1
+                puck.vy = -puck.vy
+                self.events.append(("wall",))
+            elif target == "bottom":
+                puck.y = (self.height - puck.height) - 1
+                puck.vy = -puck.vy
+                self.events.append(("wall",))
+            else:
+                bar = self.bars[target]
+                rotSpeed = 500 * (-1 if puck.vy < 0 else 1)
+                barX = bar.x + bar.vx * (deltaTime - remaining)
+                if target == 0:
+                    puck.x = (barX + bar.width) + 1
+                else:
+                    puck.x = (barX - puck.width) - 1
+                    rotSpeed = -rotSpeed
+                self.variableBounce(bar, puck)
+                self.events.append(("hit", target, rotSpeed))
+
+    def physics(self, deltaTime: float) -> None:
+        """ one `PPhysics.update` step """
+        if self.continuous:
+            for bar in self.bars:
+                self.friction(bar, deltaTime)
+            self.sweepPuck(deltaTime)
+        else:
+            self.checkBounds()
+            self.checkCollisions()
+            for bar in self.bars:
+                self.friction(bar, deltaTime)
+
+    # ------------------------------------------------------------ #
+    # board
+    def isGoal(self) -> int: # ret: 0 = No goal, 1 = goal, 2 = game over
+        puck = self.puck
+        for index, bar in enumerate(self.bars):
+            if bar.score == self.maxScore:
+                self.events.append(("win", index, puck.y))
+                return 2
+
+        if (puck.x + puck.width) >= self.width:
+            self.bars[0].score += 1
+            self.events.append(("goal", 0, puck.y))
+            return 1
+        elif puck.x <= 0:
+            self.bars[1].score += 1
+            self.events.append(("goal", 1, puck.y))
+            return 1
+        return 0
+
+    def update(self, deltaTime: float) -> None:
+        """ one `PBoard.update` step """
+        if not self.gameover:
+            self.time += deltaTime
+
+            if self.countdown > 0:
+                self.countdown -= 1 * deltaTime
+                if self.countdown <= 0:
+                    self.countdown = 0
+                    if self.referee: self.start()
+
+            if not self.continuous:     # the sweep already moved the puck
+                self.puck.x += self.puck.vx * deltaTime
+                self.puck.y += self.puck.vy * deltaTime
+            goal = self.isGoal() if self.referee else 0
+            if goal == 1:   # goal
+                self.midReset()
+            elif goal == 2: # game ended
+                self.gameover = True
+
+        for index in range(len(self.bars)):
+            self.moveBar(index, deltaTime)
+
+    def moveBar(self, index: int, deltaTime: float) -> None:
+        """ the bar half of `update`: halfMark bound, integration, window bounds """
+        bar = self.bars[index]
+        center = self.width / 2
+        if index == 0 and bar.x + bar.width > center:
+            bar.x = center - bar.width
+        elif index == 1 and bar.x < center + self.halfMark:
+            bar.x = center + self.halfMark
+
+        bar.x += bar.vx * deltaTime
+        bar.y += bar.vy * deltaTime
+
+        # bar window bounds
+        bar.x = min(max(bar.x, 0), self.width - bar.width)
+        bar.y = min(max(bar.y, 0), self.height - bar.height)
+
+    def stepBar(self, index: int, deltaTime: float) -> None:
+        """ a bar's share of `step` on its own (bars never depend on the puck), for client prediction """
+        self.friction(self.bars[index], deltaTime)
+        self.moveBar(index, deltaTime)
+
+    def step(self, deltaTime: float) -> None:
+        self.physics(deltaTime)
+        self.update(deltaTime)
@@ -1,102 +1,32 @@
-import math, random
-import sfx, gfx, vfx
-import pBar, pPuck, pBoard
+import sfx, gfx
+import pBoard, pMatch
 
 class PPhysics:
-    def __init__(self, board: pBoard.PBoard) -> None:
+    """ puck/bar physics view over the board's `pMatch.Match`: steps it and turns its events into sounds and hit state """
+    def __init__(self, board: pBoard.PBoard, continuous: bool=True) -> None:
         self.board: pBoard.PBoard = board
+        self.match: pMatch.Match = board.match
+        self.match.continuous = continuous
 
-    def friction(self, player: pBar.PBar, deltaTime: float) -> None:
-        if player.velocity[0] > 0:
-            player.velocity[0] -= (player.speed * 4) * deltaTime
-            if player.velocity[0] <= 0:
-                player.velocity[0] = 0
-
-        if player.velocity[0] < 0:
-            player.velocity[0] += (player.speed * 4) * deltaTime
-            if player.velocity[0] >= 0:
-                player.velocity[0] = 0
-        
-        if player.velocity[1] > 0:
-            player.velocity[1] -= (player.speed * 4) * deltaTime
-            if player.velocity[1] <= 0:
-                player.velocity[1] = 0
-
-        if player.velocity[1] < 0:
-            player.velocity[1] += (player.speed * 4) * deltaTime
-            if player.velocity[1] >= 0:
-                player.velocity[1] = 0
-        
-    def aabb(self, player: pBar.PBar, puck: pPuck.PPuck) -> bool:
-        if (not(
-            (puck.location[1] + puck.size[1]) < player.location[1] or
-            puck.location[0] > (player.location[0] + player.size[0]) or
-            puck.location[1] > (player.location[1] + player.size[1]) or
-            (puck.location[0] + puck.size[0]) < player.location[0]
-        )): return True
-        else: return False
+    @property
+    def continuous(self) -> bool:
+        return self.match.continuous
 
     def collisionFX(self, particleSystem: gfx.ParticleSystem, soundHandler: sfx.SoundManager) -> None:
         soundHandler.playSound("puck")
 
-    def checkCollisions(self, particleSystem: gfx.ParticleSystem, soundHandler: sfx.SoundManager) -> None:
-        rotSpeed = 500 * (-1 if self.board.puck.velocity[1] < 0 else 1)
-
-        def variableBounce(player: pBar.PBar, puck: pPuck.PPuck) -> None:
-            # calculate relative hit position
-            playerCenter = player.location[1] + (player.size[1] / 2)
-            relativeHit = (puck.location[1] + (puck.size[1] / 2)) - playerCenter
-
-            # normalize relative hit (-1 to 1)
-            normalizedHit = relativeHit / (player.size[1] / 2)
-            normalizedHit = max(-1, min(1, normalizedHit))  # Clamp to [-1, 1]
-
-            # adjust the puck's vertical velocity based on hit position
-            # convert bounce angle to radians and compute new velocity
-            bounceAngle = 90 * normalizedHit
-            speed = (puck.velocity[0]**2 + puck.velocity[1]**2)**0.5  # preserve puck speed
-            puck.velocity[1] = speed * math.sin(math.radians(bounceAngle))
-            puck.velocity[0] = -puck.velocity[0]
-
-        if self.aabb(self.board.player1, self.board.puck) and self.board.puck.velocity[0] < 0:
-            self.board.puck.location[0] = (self.board.player1.location[0] + self.board.player1.size[0]) + 1
-            variableBounce(self.board.player1, self.board.puck)
-            self.collisionFX(particleSystem, soundHandler)
-            self.board.player1.onHit(rotSpeed)
-            self.board.puck.onHit()
-
-        if self.aabb(self.board.player2, self.board.puck) and self.board.puck.velocity[0] > 0:
-            self.board.puck.location[0] = (self.board.player2.location[0] - self.board.puck.size[0]) - 1
-            variableBounce(self.board.player2, self.board.puck)
-            self.collisionFX(particleSystem, soundHandler)
-            self.board.player2.onHit(-rotSpeed)
-            self.board.puck.onHit()
-
-    def checkBounds(self, windowSize: list[int], soundHandler: sfx.SoundManager) -> None:
-        # puck vertical bounce
-        if self.board.puck.location[1] <= 0:
-            soundHandler.playSound("puck2")
-            self.board.puck.location[1] = 1
-            self.board.puck.velocity[1] = -self.board.puck.velocity[1]
-        elif (self.board.puck.location[1] + self.board.puck.size[1]) >= windowSize[1]:
-            soundHandler.playSound("puck2")
-            self.board.puck.location[1] = (windowSize[1] - self.board.puck.size[1]) - 1
-            self.board.puck.velocity[1] = -self.board.puck.velocity[1]
-
-        # puck horizontal bounce
-        if self.board.puck.location[0] <= 0:
-            soundHandler.playSound("puck2")
-            self.board.puck.location[0] = 1
-            self.board.puck.velocity[0] = -self.board.puck.velocity[0]
-        elif (self.board.puck.location[0] + self.board.puck.size[0]) >= windowSize[0]:
-            soundHandler.playSound("puck2")
-            self.board.puck.location[0] = (windowSize[0] - self.board.puck.size[0]) - 1
-            self.board.puck.velocity[0] = -self.board.puck.velocity[0]
-
     def update(self, windowSize: list[int], deltaTime: float, particleSystem: gfx.ParticleSystem,  soundHandler: sfx.SoundManager) -> None:
-        self.checkBounds(windowSize, soundHandler)
-        self.checkCollisions(particleSystem, soundHandler)
-        for player in self.board.players:
-            self.friction(player, deltaTime)
+        self.board.pushState()
+        self.match.physics(deltaTime)
+        self.board.pullState()
+
+        for event in self.match.drainEvents():
+            match event:
+                case ("wall",):
+                    soundHandler.playSound("puck2")
+                case ("hit", index, rotSpeed):
+                    self.collisionFX(particleSystem, soundHandler)
+                    self.board.players[index].onHit(rotSpeed)
+                    self.board.puck.onHit()
         self.board.matchInfo["playerInfo"]["player1"]["location"] = [*self.board.player1.location]
         self.board.matchInfo["playerInfo"]["player2"]["location"] = [*self.board.player2.location]
@@ -0,0 +1,76 @@
+""" client-side prediction of the local bar, reconciled against the input sequence the server acks """
+from collections import deque
+import pMatch
+
+class Predictor:
+    def __init__(self, windowSize: list[int], index: int, tickRate: float, maxPending: int=256) -> None:
+        self.index: int = index
+        self.deltaTime: float = 1.0 / tickRate
+        self.shadow: pMatch.Match = pMatch.Match(windowSize)    # only its bar `index` is stepped
+        self.bar: pMatch.Bar = self.shadow.bars[index]
+        self.pending: deque[tuple[int, int, int]] = deque(maxlen=maxPending)
+        self.sequence: int = 0
+        self.ack: int = 0
+        self.server: list[float] = None
+        self.idle: bool = False
+        self.accumulator: float = 0.0
+
+        self.corrections: int = 0
+        self.lastCorrection: float = 0.0
+        self.maxCorrection: float = 0.0
+
+    def reset(self, body: list[float]) -> None:
+        self.bar.x, self.bar.y, self.bar.vx, self.bar.vy = body
+        self.server = list(body)
+        self.pending.clear()
+
+    def step(self, dx: int, dy: int) -> int|None:
+        """ predict one tick of held input; the sequence number to send, or None while the bar idles at rest """
+        bar = self.bar
+        idle = not (dx or dy or bar.vx or bar.vy)
+        if idle and self.idle: return None     # the server repeats its last (idle) input: nothing to replay either
+        self.idle = idle
+
+        self.sequence += 1
+        self.pending.append((self.sequence, dx, dy))
+        bar.move(dx, dy)
+        self.shadow.stepBar(self.index, self.deltaTime)
+        return self.sequence
+
+    def advance(self, deltaTime: float) -> int:
+        """ prediction ticks due after `deltaTime` seconds of frame time """
+        self.accumulator += deltaTime
+        steps = int(self.accumulator / self.deltaTime)
+        self.accumulator -= steps * self.deltaTime
+        return steps
+
+    def reconcile(self, body: list[float]|None, ack: int|None) -> None:
+        """ rewind to the server's bar (`body`, or the last one seen) after input `ack` and replay the rest """
+        if body is not None: self.server = list(body)
+        if ack is not None: self.ack = max(self.ack, ack)
+        if self.server is None: return None
+
+        while self.pending and self.pending[0][0] <= self.ack:
+            self.pending.popleft()
+
+        bar = self.bar
+        before = (bar.x, bar.y)
+        bar.x, bar.y, bar.vx, bar.vy = self.server
+        for _, dx, dy in self.pending:
+            bar.move(dx, dy)
+            self.shadow.stepBar(self.index, self.deltaTime)
+
+        error = ((bar.x - before[0])**2 + (bar.y - before[1])**2)**0.5
+        self.lastCorrection = error
+        if error > 0.5:     # beyond wire precision
+            self.corrections += 1
+            self.maxCorrection = max(self.maxCorrection, error)
+
+    def write(self, body: pMatch.Body) -> None:
+        body.x, body.y, body.vx, body.vy = self.bar.x, self.bar.y, self.bar.vx, self.bar.vy
+
+    def getStats(self) -> dict:
+        return {
+            "pending": len(self.pending), "ack": self.ack, "sequence": self.sequence,
+            "corrections": self.corrections, "maxCorrection": self.maxCorrection
+        }
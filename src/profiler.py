@@ -0,0 +1,89 @@
+import time
+import numpy as np
+
+class RingBuffer:
+    """ fixed-size sample buffer, overwriting the oldest sample once full """
+    def __init__(self, capacity: int) -> None:
+        self.index: int = 0
+        self.count: int = 0
+        self.capacity: int = capacity
+        self.samples: np.ndarray = np.zeros(capacity, dtype=np.float64)
+
+    def push(self, value: float) -> None:
+        self.samples[self.index] = value
+        self.index = (self.index + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def clear(self) -> None:
+        self.index = 0
+        self.count = 0
+
+    def values(self) -> np.ndarray:
+        """ samples in chronological order """
+        if self.count < self.capacity:
+            return self.samples[:self.count]
+        return np.roll(self.samples, -self.index)
+
+    def percentiles(self, q: list[float]=[50, 95, 99]) -> list[float]:
+        if not self.count: return [0.0 for _ in q]
+        return np.percentile(self.samples[:self.count], q).tolist()
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """ mean, p50/p95/p99 and max of a run's samples (empty: {}) """
+    if not samples: return {}
+    values = np.array(samples)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]).tolist()
+    return {"mean": float(values.mean()), "p50": p50, "p95": p95, "p99": p99, "max": float(values.max())}
+
+class FrameProfiler:
+    """
+    Per-phase frame timer.
+
+    A frame is bracketed by `begin`/`end`; every `lap(phase)` charges the time
+    since the previous lap to `phase`. Per-frame totals land in one ring buffer
+    per phase plus `frame` for the whole frame. While disabled every call
+    returns immediately, so the instrumentation can stay in the loop.
+    """
+    def __init__(self, phases: list[str], capacity: int=300, enabled: bool=False) -> None:
+        self.enabled: bool = enabled
+        self.phases: list[str] = phases
+        self.frame: RingBuffer = RingBuffer(capacity)
+        self.buffers: dict[str, RingBuffer] = {phase: RingBuffer(capacity) for phase in phases}
+        self.current: dict[str, float] = dict.fromkeys(phases, 0.0)
+        self.frameStart: float = 0.0
+        self.lastLap: float = 0.0
+
+    def toggle(self) -> bool:
+        self.enabled = not self.enabled
+        self.clear()
+        return self.enabled
+
+    def clear(self) -> None:
+        self.frame.clear()
+        for buffer in self.buffers.values():
+            buffer.clear()
+
+    def begin(self) -> None:
+        if not self.enabled: return None
+        for phase in self.current:
+            self.current[phase] = 0.0
+        self.frameStart = self.lastLap = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        if not self.enabled: return None
+        now = time.perf_counter()
+        self.current[phase] += now - self.lastLap
+        self.lastLap = now
+
+    def end(self) -> None:
+        if not self.enabled: return None
+        self.frame.push((time.perf_counter() - self.frameStart) * 1000.0)
+        for phase, elapsed in self.current.items():
+            self.buffers[phase].push(elapsed * 1000.0)
+
+    def getStats(self) -> dict[str, list[float]]:
+        """ rolling [p50, p95, p99] in milliseconds for every phase and the whole frame """
+        stats = {phase: buffer.percentiles() for phase, buffer in self.buffers.items()}
+        stats["frame"] = self.frame.percentiles()
+        return stats
@@ -0,0 +1,245 @@
+""" Pong2 wire codecs: d34dnet dicts ("json") or fixed-layout structs ("binary/2"), picked per connection with "join"/"hello" """
+import json, time, base64, struct, argparse
+
+POSITION_SCALE: float = 16.0    # int16 steps per px (+-2047 px)
+VELOCITY_SCALE: float = 8.0     # int16 steps per px/s (+-4095 px/s)
+
+class DictCodec:
+    name: str = "json"
+
+    def encode(self, method: str, params: dict) -> bytes:
+        return json.dumps({"method": method, "params": params}, separators=(",", ":")).encode()
+
+    def decode(self, data: bytes) -> tuple[str, dict]:
+        message = json.loads(data)
+        return message["method"], message["params"]
+
+def idNumber(pong2id: str) -> int:
+    return int(pong2id[1:]) if pong2id else 0
+
+def idString(index: int) -> str|None:
+    return f"p{index}" if index else None
+
+def quantize(values: list[float], scales: tuple[float]) -> list[int]:
+    return [max(-32768, min(32767, round(value * scale))) for value, scale in zip(values, scales)]
+
+def dequantize(values: tuple[int], scales: tuple[float]) -> list[float]:
+    return [value / scale for value, scale in zip(values, scales)]
+
+BODY_SCALES: tuple[float] = (POSITION_SCALE, POSITION_SCALE, VELOCITY_SCALE, VELOCITY_SCALE)   # x, y, vx, vy
+
+class BinaryCodec:
+    name: str = "binary/2"
+
+    # message types
+    JOIN: int = 1
+    INPUT: int = 2
+    STATE: int = 3
+    UPDATE: int = 4
+    PLAYERS: int = 5
+    START: int = 6
+    RESET: int = 7
+    DELTA: int = 8
+
+    # whole frames: header (type, sequence) + body
+    HEADER: struct.Struct = struct.Struct("<BI")
+    JOIN_FRAME: struct.Struct = struct.Struct("<BII")                   # id
+    INPUT_FRAME: struct.Struct = struct.Struct("<BIIbbI")               # id, dx, dy, input sequence (0: unsequenced)
+    STATE_FRAME: struct.Struct = struct.Struct("<BIIffBBB12h2I")        # tick, time, countdown, gameover, scores, puck + bars (x, y, vx, vy), input acks
+    UPDATE_FRAME: struct.Struct = struct.Struct("<BII8h")               # id, location, velocity, puck location, puck velocity
+    PLAYERS_FRAME: struct.Struct = struct.Struct("<BI4hB")              # puck location, puck velocity, player count
+    PLAYER_BODY: str = "I4h"                                            # id, location, velocity (repeated per player)
+    DELTA_FRAME: struct.Struct = struct.Struct("<BIIIB")                # tick, base tick, field mask + the masked DELTA_FIELDS
+    DELTA_FIELDS: tuple[tuple[str, str]] = (
+        ("puck", "4h"), ("bar1", "4h"), ("bar2", "4h"), ("scores", "BB"), ("countdown", "f"), ("gameover", "B"), ("acks", "2I")
+    )
+
+    METHODS: dict[str, int] = {"join": JOIN, "input": INPUT, "state": STATE, "start": START, "reset": RESET, "delta": DELTA}
+
+    def __init__(self) -> None:
+        self.sequence: int = 0
+        self.playerFrames: dict[int, struct.Struct] = {}
+        self.deltaFrames: dict[int, struct.Struct] = {}
+
+    def playersFrame(self, count: int) -> struct.Struct:
+        frame = self.playerFrames.get(count)
+        if frame is None:
+            frame = self.playerFrames[count] = struct.Struct(self.PLAYERS_FRAME.format + self.PLAYER_BODY * count)
+        return frame
+
+    def deltaFrame(self, mask: int) -> struct.Struct:
+        frame = self.deltaFrames.get(mask)
+        if frame is None:
+            fields = "".join(layout for bit, (_, layout) in enumerate(self.DELTA_FIELDS) if mask & (1 << bit))
+            frame = self.deltaFrames[mask] = struct.Struct(self.DELTA_FRAME.format + fields)
+        return frame
+
+    def next(self) -> int:
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        return self.sequence
+
+    def encode(self, method: str, params: dict) -> bytes:
+        match method:
+            case "join":
+                return self.JOIN_FRAME.pack(self.JOIN, self.next(), idNumber(params["pong2id"]))
+            case "input":
+                return self.INPUT_FRAME.pack(
+                    self.INPUT, self.next(), idNumber(params["pong2id"]), params["dx"], params["dy"], params.get("sequence") or 0
+                )
+            case "start" | "reset":
+                return self.JOIN_FRAME.pack(self.METHODS[method], self.next(), idNumber(params.get("pong2id")))
+            case "state":
+                bars = params["bars"]
+                return self.STATE_FRAME.pack(
+                    self.STATE, self.next(), params["tick"], params["time"], params["countdown"], params["gameover"], *params["scores"],
+                    *quantize([*params["puck"], *bars[0], *bars[1]], BODY_SCALES * 3), *params.get("acks", (0, 0))
+                )
+            case "delta":
+                mask, values = 0, []
+                for bit, (field, _) in enumerate(self.DELTA_FIELDS):
+                    if field not in params: continue
+                    mask |= 1 << bit
+                    if bit < 3: values += quantize(params[field], BODY_SCALES)
+                    elif field in ("scores", "acks"): values += params[field]
+                    else: values.append(params[field])
+                return self.deltaFrame(mask).pack(self.DELTA, self.next(), params["tick"], params["base"], mask, *values)
+            case "update" if "pong2id" in params:   # client -> server relay
+                return self.UPDATE_FRAME.pack(
+                    self.UPDATE, self.next(), idNumber(params["pong2id"]),
+                    *quantize([*params["location"], *params["velocity"], *params["pucklocation"], *params["puckvelocity"]], BODY_SCALES * 2)
+                )
+            case "update":                          # server -> clients relay broadcast
+                ids, floats = [], [*(params["pucklocation"] or [0, 0]), *(params["puckvelocity"] or [0, 0])]
+                for key, info in params.items():
+                    if key in ("pucklocation", "puckvelocity", "seq"): continue
+                    ids.append(idNumber(key))
+                    floats += info["location"]
+                    floats += info["velocity"]
+                quantized = quantize(floats, BODY_SCALES * (len(ids) + 1))
+                values = [self.PLAYERS, self.next(), *quantized[0:4], len(ids)]
+                for index, pong2id in enumerate(ids, 1):
+                    values.append(pong2id)
+                    values += quantized[index * 4:index * 4 + 4]
+                return self.playersFrame(len(ids)).pack(*values)
+        raise ValueError(f"{self.name} cannot encode method: {method}")
+
+    def decode(self, data: bytes) -> tuple[str, dict]:
+        kind, sequence = self.HEADER.unpack_from(data)
+        match kind:
+            case self.JOIN | self.START | self.RESET:
+                method = {self.JOIN: "join", self.START: "start", self.RESET: "reset"}[kind]
+                return method, {"seq": sequence, "pong2id": idString(self.JOIN_FRAME.unpack_from(data)[2])}
+            case self.INPUT:
+                _, _, pong2id, dx, dy, inputSequence = self.INPUT_FRAME.unpack_from(data)
+                return "input", {"seq": sequence, "pong2id": idString(pong2id), "dx": dx, "dy": dy, "sequence": inputSequence or None}
+            case self.STATE:
+                _, _, tick, matchTime, countdown, gameover, score1, score2, *quantized = self.STATE_FRAME.unpack_from(data)
+                acks = [*quantized[12:]]
+                bodies = dequantize(quantized[:12], BODY_SCALES * 3)
+                return "state", {
+                    "seq": sequence, "tick": tick, "time": matchTime, "countdown": countdown, "gameover": bool(gameover),
+                    "scores": [score1, score2], "puck": bodies[0:4], "bars": [bodies[4:8], bodies[8:12]], "acks": acks
+                }
+            case self.DELTA:
+                _, _, tick, base, mask, *values = self.deltaFrame(data[self.DELTA_FRAME.size - 1]).unpack_from(data)
+                params, offset = {"seq": sequence, "tick": tick, "base": base}, 0
+                for bit, (field, _) in enumerate(self.DELTA_FIELDS):
+                    if not mask & (1 << bit): continue
+                    if bit < 3:
+                        params[field] = dequantize(values[offset:offset + 4], BODY_SCALES)
+                        offset += 4
+                    elif field in ("scores", "acks"):
+                        params[field] = [*values[offset:offset + 2]]
+                        offset += 2
+                    else:
+                        params[field] = bool(values[offset]) if field == "gameover" else values[offset]
+                        offset += 1
+                return "delta", params
+            case self.UPDATE:
+                _, _, pong2id, *quantized = self.UPDATE_FRAME.unpack_from(data)
+                values = dequantize(quantized, BODY_SCALES * 2)
+                return "update", {
+                    "seq": sequence, "pong2id": idString(pong2id), "location": values[0:2], "velocity": values[2:4],
+                    "pucklocation": values[4:6], "puckvelocity": values[6:8]
+                }
+            case self.PLAYERS:
+                count = data[self.PLAYERS_FRAME.size - 1]
+                fields = self.playersFrame(count).unpack_from(data)
+                quantized = [*fields[2:6]]
+                for index in range(7, len(fields), 5):
+                    quantized += fields[index + 1:index + 5]
+                values = dequantize(quantized, BODY_SCALES * (count + 1))
+                params = {"seq": sequence, "pucklocation": values[0:2], "puckvelocity": values[2:4]}
+                for player, index in enumerate(range(7, len(fields), 5), 1):
+                    params[idString(fields[index])] = {"location": values[player * 4:player * 4 + 2], "velocity": values[player * 4 + 2:player * 4 + 4]}
+                return "update", params
+        raise ValueError(f"{self.name} unknown message type: {kind}")
+
+CODECS: dict[str, type] = {codec.name: codec for codec in (BinaryCodec, DictCodec)}    # in order of preference
+
+def negotiate(offered: list[str], preferred: str) -> str:
+    """ the preferred codec when the peer offers it, otherwise the original dict format """
+    return preferred if preferred in offered and preferred in CODECS else DictCodec.name
+
+def wrap(codec, method: str, params: dict) -> tuple[str, dict]:
+    """ (method, params) to hand to d34dnet's build_request/build_response """
+    if isinstance(codec, DictCodec) or (method not in BinaryCodec.METHODS and method != "update"):
+        return method, params
+    return "pkt", {"data": base64.b64encode(codec.encode(method, params)).decode("ascii")}
+
+def unwrap(method: str, params: dict, codec: BinaryCodec=None) -> tuple[str, dict]:
+    """ undo `wrap` for a received message (dict-format messages pass through); ValueError for a corrupt frame """
+    if method != "pkt": return method, params
+    try:
+        return (codec or BinaryCodec()).decode(base64.b64decode(params["data"]))
+    except (struct.error, IndexError, KeyError, TypeError) as e:   # short or mangled frames (bad base64 is a ValueError already)
+        raise ValueError(f"corrupt {BinaryCodec.name} frame: {e!r}") from e
+
+# ------------------------------------------------------------ #
+# benchmark
+SAMPLES: dict[str, dict] = {
+    "update": {
+        "pong2id": "p1", "location": [160.0, 270.0], "velocity": [0.0, -550.0],
+        "pucklocation": [612.3456, 333.9876], "puckvelocity": [-600.0, 412.38]
+    },
+    "players": {
+        "p1": {"name": "pong2-player", "location": [160.0, 270.0], "velocity": [0.0, -550.0]},
+        "p2": {"name": "pong2-player", "location": [1088.0, 270.0], "velocity": [0.0, 0.0]},
+        "pucklocation": [612.3456, 333.9876], "puckvelocity": [-600.0, 412.38]
+    },
+    "state": {
+        "tick": 1234, "time": 20.566, "countdown": 0, "gameover": False, "scores": [1, 2],
+        "puck": [612.3456, 333.9876, -600.0, 412.38], "bars": [[160.0, 270.0, 0.0, -550.0], [1088.0, 270.0, 0.0, 0.0]]
+    },
+}
+
+def measure(codec, method: str, params: dict, count: int) -> dict[str, float]:
+    data = codec.encode(method, params)
+    started = time.perf_counter()
+    for _ in range(count): codec.encode(method, params)
+    encoded = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(count): codec.decode(data)
+    decoded = time.perf_counter() - started
+    return {
+        "bytes": len(data),
+        "wireBytes": len(json.dumps({"method": "pkt", "params": {"data": base64.b64encode(data).decode()}})) if codec.name != DictCodec.name else len(data),
+        "encodeUs": encoded / count * 1e6,
+        "decodeUs": decoded / count * 1e6,
+    }
+
+def benchmark(count: int=100_000) -> dict:
+    report = {}
+    for sample, params in SAMPLES.items():
+        method = "update" if sample == "players" else sample
+        results = {codec.name: measure(codec(), method, params, count) for codec in (DictCodec, BinaryCodec)}
+        dict_, binary = results[DictCodec.name], results[BinaryCodec.name]
+        results["ratio"] = {key: dict_[key] / binary[key] for key in dict_}
+        report[sample] = results
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pong2 wire codec encode/decode benchmark")
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.count), indent=2))
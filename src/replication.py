@@ -0,0 +1,127 @@
+""" change-only replication of `pMatch.Match` snapshots: per-connection baselines, deltas and keyframes """
+import math
+import protocol
+
+def flatten(state: dict) -> dict:
+    """ `Match.getState` snapshot -> replicated fields, with the bodies at wire precision for comparing """
+    quantized = protocol.quantize([*state["puck"], *state["bars"][0], *state["bars"][1]], protocol.BODY_SCALES * 3)
+    return {
+        "time": state["time"],
+        "puck": state["puck"],
+        "bar1": state["bars"][0],
+        "bar2": state["bars"][1],
+        "scores": state["scores"],
+        "countdown": state["countdown"],
+        "gameover": state["gameover"],
+        "acks": state.get("acks", [0, 0]),
+        "quantized": {"puck": quantized[0:4], "bar1": quantized[4:8], "bar2": quantized[8:12]},
+    }
+
+def apply(match, delta: dict) -> None:
+    """ write the fields present in a `delta` onto a `pMatch.Match` """
+    if "puck" in delta:
+        match.puck.x, match.puck.y, match.puck.vx, match.puck.vy = delta["puck"]
+    for index, field in enumerate(("bar1", "bar2")):
+        if field in delta:
+            bar = match.bars[index]
+            bar.x, bar.y, bar.vx, bar.vy = delta[field]
+    if "scores" in delta:
+        for bar, score in zip(match.bars, delta["scores"]):
+            bar.score = score
+    if "countdown" in delta: match.countdown = delta["countdown"]
+    if "gameover" in delta: match.gameover = delta["gameover"]
+
+class Replica:
+    def __init__(self, keyframeInterval: int=240, ackTimeout: int=120) -> None:
+        if ackTimeout >= keyframeInterval:
+            raise ValueError(f"ackTimeout ({ackTimeout}) must be shorter than keyframeInterval ({keyframeInterval})")
+        self.keyframeInterval: int = keyframeInterval
+        self.ackTimeout: int = ackTimeout
+        self.baseline: dict = None
+        self.baseTick: int = 0          # tick of the last message sent
+        self.keyframeTick: int = 0
+        self.ackedTick: int = 0
+        self.resync: bool = True
+
+        self.keyframes: int = 0
+        self.deltas: int = 0
+        self.skipped: int = 0
+        self.fields: int = 0
+
+    def acknowledge(self, tick: int, resync: bool=False) -> None:
+        self.ackedTick = max(self.ackedTick, tick)
+        if resync: self.resync = True
+
+    def changes(self, current: dict) -> dict:
+        baseline = self.baseline
+        changed = {}
+
+        # puck: compare against where the client's own integration puts it
+        elapsed = current["time"] - baseline["time"]
+        x, y, vx, vy = baseline["puck"]
+        if protocol.quantize([x + vx * elapsed, y + vy * elapsed, vx, vy], protocol.BODY_SCALES) != current["quantized"]["puck"]:
+            changed["puck"] = current["puck"]
+
+        for field in ("bar1", "bar2"):   # a moving bar decays by the client's friction, so it goes out every tick it moves
+            if current[field][2] or current[field][3] or baseline["quantized"][field] != current["quantized"][field]:
+                changed[field] = current[field]
+        if baseline["scores"] != current["scores"]:
+            changed["scores"] = current["scores"]
+        if math.ceil(baseline["countdown"]) != math.ceil(current["countdown"]):     # the client counts down itself
+            changed["countdown"] = current["countdown"]
+        if baseline["gameover"] != current["gameover"]:
+            changed["gameover"] = current["gameover"]
+        if baseline["acks"] != current["acks"]:     # input sequences for client prediction
+            changed["acks"] = current["acks"]
+        return changed
+
+    def update(self, tick: int, state: dict, current: dict=None) -> tuple[str, dict]|None:
+        """
+        ("state", keyframe) | ("delta", changed fields) | None for this connection;
+        `current` is `flatten(state)` when the caller shares it between replicas
+        """
+        if current is None: current = flatten(state)
+        if (
+            self.resync or self.baseline is None or
+            tick - self.keyframeTick >= self.keyframeInterval or
+            tick - max(self.ackedTick, self.keyframeTick) >= self.ackTimeout    # silent client: at most one keyframe per timeout
+        ):
+            self.resync = False
+            self.baseline, self.baseTick, self.keyframeTick = current, tick, tick
+            self.keyframes += 1
+            return "state", {**state, "tick": tick}
+
+        changed = self.changes(current)
+        if not changed:
+            self.skipped += 1
+            return None
+
+        # the baseline keeps the puck the client is extrapolating unless it was resent
+        if "puck" not in changed:
+            current = {
+                **current, "puck": self.baseline["puck"], "time": self.baseline["time"],
+                "quantized": {**current["quantized"], "puck": self.baseline["quantized"]["puck"]}
+            }
+        delta = {"tick": tick, "base": self.baseTick, **changed}
+        self.baseline, self.baseTick = current, tick
+        self.deltas += 1
+        self.fields += len(changed)
+        return "delta", delta
+
+    def getStats(self) -> dict[str, int]:
+        return {"keyframes": self.keyframes, "deltas": self.deltas, "skipped": self.skipped, "fields": self.fields}
+
+class ChangeFilter:
+    """ client side: let a message through only when its quantized values changed, plus every `keyframeInterval` calls """
+    def __init__(self, keyframeInterval: int=120) -> None:
+        self.keyframeInterval: int = keyframeInterval
+        self.last: list[int] = None
+        self.calls: int = 0
+
+    def changed(self, values: list[float]) -> bool:
+        self.calls += 1
+        quantized = protocol.quantize(values, protocol.BODY_SCALES * (len(values) // 4))
+        if quantized == self.last and self.calls < self.keyframeInterval:
+            return False
+        self.last, self.calls = quantized, 0
+        return True
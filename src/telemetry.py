@@ -0,0 +1,130 @@
+""" per-connection traffic counters, rolling rtt/encode/queue windows and sampled logging, cheap enough for the message path """
+import json, time, logging
+from collections import deque
+import numpy as np
+import profiler
+
+PACKET_OVERHEAD: int = len('{"method":"pkt","params":{"data":""}}')
+
+def wireSize(message: dict) -> int:
+    return len(json.dumps(message, separators=(",", ":")))
+
+class SizeSampler:
+    """ `wireSize` without a second encode per message: binary packets exactly, dict messages measured one in `every` per method """
+    def __init__(self, every: int=16) -> None:
+        self.every: int = every
+        self.sizes: dict[str, int] = {}
+        self.counts: dict[str, int] = {}
+
+    def size(self, message: dict) -> int:
+        method = message.get("method")
+        if method == "pkt": return len(message["params"]["data"]) + PACKET_OVERHEAD   # the codec's bytes, base64'd
+        count = self.counts.get(method, 0)
+        self.counts[method] = count + 1
+        size = self.sizes.get(method)
+        if size is None or count % self.every == 0:
+            size = self.sizes[method] = wireSize(message)
+        return size
+
+class ConnectionStats:
+    def __init__(self, window: float=5.0, samples: int=120, clock=time.monotonic, sampleEvery: int=1) -> None:
+        self.window: float = window
+        self.clock = clock
+        self.sampleEvery: int = sampleEvery
+        self.messagesIn: int = 0
+        self.messagesOut: int = 0
+        self.bytesIn: int = 0
+        self.bytesOut: int = 0
+        self.history: deque[tuple[float, int, int, int, int]] = deque()    # (time, messagesIn, bytesIn, messagesOut, bytesOut)
+        self.rtt: profiler.RingBuffer = profiler.RingBuffer(samples)         # ms
+        self.serialize: profiler.RingBuffer = profiler.RingBuffer(samples)   # us per encoded message
+        self.queue: profiler.RingBuffer = profiler.RingBuffer(samples)       # send queue depth
+        self.lastRtt: float = None
+        self.lastQueue: int = 0
+        self.queueReports: int = 0
+
+    def received(self, size: int, count: int=1) -> None:
+        self.messagesIn += count
+        self.bytesIn += size
+
+    def sent(self, size: int, count: int=1) -> None:
+        self.messagesOut += count
+        self.bytesOut += size
+
+    def roundTrip(self, milliseconds: float) -> None:
+        self.lastRtt = milliseconds
+        self.rtt.push(milliseconds)
+
+    def encoded(self, seconds: float) -> None:
+        self.serialize.push(seconds * 1e6)
+
+    def queued(self, depth: int) -> None:
+        self.lastQueue = depth
+        self.queueReports += 1
+        if self.queueReports % self.sampleEvery == 0: self.queue.push(depth)
+
+    def rates(self) -> tuple[float, float, float, float]:
+        """ (messagesIn, bytesIn, messagesOut, bytesOut) per second over about the last `window` seconds """
+        now = self.clock()
+        current = (now, self.messagesIn, self.bytesIn, self.messagesOut, self.bytesOut)
+        history = self.history
+        if not history or now - history[-1][0] >= 0.25: history.append(current)
+        while len(history) > 2 and now - history[1][0] >= self.window:    # keep one snapshot at least `window` old
+            history.popleft()
+        oldest = history[0]
+        elapsed = now - oldest[0]
+        if elapsed <= 0: return (0.0, 0.0, 0.0, 0.0)
+        return tuple((value - before) / elapsed for value, before in zip(current[1:], oldest[1:]))
+
+    def getStats(self) -> dict:
+        messagesIn, bytesIn, messagesOut, bytesOut = self.rates()
+        rtt50, rtt99 = self.rtt.percentiles([50, 99])
+        encode50, encode99 = self.serialize.percentiles([50, 99])
+        queue50, queueMax = self.queue.percentiles([50, 100])
+        return {
+            "messagesIn": self.messagesIn, "messagesOut": self.messagesOut, "bytesIn": self.bytesIn, "bytesOut": self.bytesOut,
+            "inPerS": {"messages": messagesIn, "bytes": bytesIn}, "outPerS": {"messages": messagesOut, "bytes": bytesOut},
+            "rttMs": {"last": self.lastRtt, "p50": rtt50, "p99": rtt99},
+            "serializeUs": {"p50": encode50, "p99": encode99},
+            "queue": {"p50": queue50, "max": queueMax},
+        }
+
+def combine(connections: list[ConnectionStats], serialize: profiler.RingBuffer) -> dict:
+    """ `ConnectionStats.getStats` for a whole server: `connections` summed, encode times from `serialize` """
+    totals, rates, rtts, depths = [0, 0, 0, 0], [0.0, 0.0, 0.0, 0.0], [], []
+    for connection in connections:     # counters only: no per-connection percentiles
+        for index, value in enumerate((connection.messagesIn, connection.bytesIn, connection.messagesOut, connection.bytesOut)):
+            totals[index] += value
+        for index, value in enumerate(connection.rates()):
+            rates[index] += value
+        if connection.lastRtt is not None: rtts.append(connection.lastRtt)
+        depths.append(connection.lastQueue)
+    rtt50, rtt99 = np.percentile(rtts, [50, 99]).tolist() if rtts else (0.0, 0.0)
+    encode50, encode99 = serialize.percentiles([50, 99])
+    return {
+        "messagesIn": totals[0], "messagesOut": totals[2], "bytesIn": totals[1], "bytesOut": totals[3],
+        "inPerS": {"messages": rates[0], "bytes": rates[1]}, "outPerS": {"messages": rates[2], "bytes": rates[3]},
+        "rttMs": {"p50": rtt50, "p99": rtt99},      # over every connection's latest report
+        "serializeUs": {"p50": encode50, "p99": encode99},
+        "queue": {"p50": float(np.median(depths)) if depths else 0.0, "max": max(depths, default=0)},
+    }
+
+class SampledLogger:
+    def __init__(self, name: str, every: int=100) -> None:
+        self.logger: logging.Logger = logging.getLogger(name)
+        self.every: int = every
+        self.counts: dict[str, int] = {}
+
+    def log(self, level: int, message: str, *args) -> None:
+        """ `message % args` at `level`, for the first call and then one in every `every` """
+        if not self.logger.isEnabledFor(level): return None
+        count = self.counts.get(message, 0)
+        self.counts[message] = count + 1
+        if count % self.every: return None
+        self.logger.log(level, message, *args)
+
+    def debug(self, message: str, *args) -> None:
+        self.log(logging.DEBUG, message, *args)
+
+    def info(self, message: str, *args) -> None:
+        self.log(logging.INFO, message, *args)
@@ -17,7 +17,7 @@ class PPuckTrail(VFX):
         puck = data["puck"]
         self.particleSystem.addParticle(
             0.1, random.choice([[pow(2, i+1), pow(2, i+1)] for i in range(4)]),
-            [puck.location[0] + (puck.size[0] / 2), puck.location[1] + (puck.size[1] / 2)],
+            [puck.drawnLocation[0] + (puck.size[0] / 2), puck.drawnLocation[1] + (puck.size[1] / 2)],
             velocity=[0, -120], color=puck.color, wireSize=2
         )
 
@@ -28,7 +28,7 @@ class PPuckCollision(VFX):
         for i in range(random.randrange(25, 50)):
             self.particleSystem.addParticle(
                 0.2, random.choice([[pow(2, i+1), pow(2, i+1)] for i in range(2)]),
-                puck.location, [random.randrange(-80, 200), random.randrange(-80, 200)],
+                puck.drawnLocation, [random.randrange(-80, 200), random.randrange(-80, 200)],
                 wireSize=random.randint(1, 4)
             )
         puck.hit = False
@@ -63,7 +63,7 @@ class PBarFlash(VFX):
         self.particleSystem.addParticle(
             lifeSpan=0.1,
             size=player.size,
-            location=player.location,
+            location=player.drawnLocation,
             velocity=[
                 -(player.velocity[0] / abs(player.velocity[0] + 1)),
                 -(player.velocity[1] / abs(player.velocity[1] + 1))
@@ -80,21 +80,21 @@ class PBarTrail(VFX):
         self.particleSystem.addParticle(
             lifeSpan=0.1,
             size=particleSize,
-            location=[player.location[0] + (player.size[0] / 2), player.location[1]],
+            location=[player.drawnLocation[0] + (player.size[0] / 2), player.drawnLocation[1]],
             velocity=[0, -120], color=player.color, wireSize=1
         )
         # middle bar trail
         self.particleSystem.addParticle(
             lifeSpan=0.1,
             size=particleSize,
-            location=[player.location[0] + (player.size[0] / 2), player.location[1] + (player.size[1] / 2)],
+            location=[player.drawnLocation[0] + (player.size[0] / 2), player.drawnLocation[1] + (player.size[1] / 2)],
             velocity=[0, -120], color=player.color, wireSize=1
         )
         # bottom bar trail
         self.particleSystem.addParticle(
             lifeSpan=0.1,
             size=particleSize,
-            location=[player.location[0] + (player.size[0] / 2), player.location[1] + player.size[1]],
+            location=[player.drawnLocation[0] + (player.size[0] / 2), player.drawnLocation[1] + player.size[1]],
             velocity=[0, -120], color=player.color, wireSize=1
         )
 